@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# ===================================================================
+# Thai Herbal GACP Platform - Inference Backend Latency Benchmark
+# ===================================================================
+# Compares per-batch latency of the eager, TorchScript and ONNX Runtime
+# backends (fp32 and int8) from yolo-api/utils/inference_backend.py.
+#
+# Usage:
+#   python bench_inference_backends.py                       # resnet18 stand-in
+#   python bench_inference_backends.py --yolo models/herb_yolo.pt
+#   python bench_inference_backends.py --threads 4 --json results.json
+# ===================================================================
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'yolo-api'))
+
+from utils.inference_backend import BACKENDS, PRECISIONS, create_backend  # noqa: E402
+
+
+def build_model(args) -> Any:
+    if args.yolo:
+        from ultralytics import YOLO
+        return YOLO(args.yolo)
+    import torchvision
+    return torchvision.models.resnet18(weights=None, num_classes=args.num_classes)
+
+
+def example_input(args, batch_size: int) -> np.ndarray:
+    if args.yolo:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (args.image_size, args.image_size, 3), dtype=np.uint8)
+                for _ in range(batch_size)]
+    return np.random.default_rng(0).standard_normal(
+        (batch_size, 3, args.image_size, args.image_size)
+    ).astype(np.float32)
+
+
+def time_backend(backend, inputs, iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        backend(inputs)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': statistics.fmean(samples),
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare CPU inference backends')
+    parser.add_argument('--yolo', help='Path to a YOLO .pt model (default: resnet18 classifier stand-in)')
+    parser.add_argument('--image-size', type=int, default=224)
+    parser.add_argument('--num-classes', type=int, default=6)
+    parser.add_argument('--batch-sizes', default='1,8')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--precisions', default=','.join(PRECISIONS))
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    model = build_model(args)
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+    export_dir = tempfile.mkdtemp(prefix='backend-bench-')
+    results: List[Dict[str, Any]] = []
+
+    for backend_name in args.backends.split(','):
+        for precision in args.precisions.split(','):
+            try:
+                backend = create_backend(
+                    'bench', model, backend_name, precision,
+                    example_input=example_input(args, 1),
+                    export_dir=export_dir,
+                    threads=args.threads
+                )
+            except Exception as e:
+                print(f"{backend_name:12s} {precision:5s} unavailable: {e}")
+                continue
+            for batch_size in batch_sizes:
+                timing = time_backend(backend, example_input(args, batch_size), args.iterations)
+                row = {'backend': backend_name, 'precision': precision, 'batch_size': batch_size,
+                       'load_time_s': backend.load_time, 'warmup_time_s': backend.warmup_time, **timing}
+                results.append(row)
+                print(f"{backend_name:12s} {precision:5s} batch={batch_size:<3d} "
+                      f"mean={timing['mean_ms']:8.2f}ms p50={timing['p50_ms']:8.2f}ms "
+                      f"p95={timing['p95_ms']:8.2f}ms per-image={timing['mean_ms'] / batch_size:7.2f}ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
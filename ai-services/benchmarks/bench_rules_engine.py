@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# ===================================================================
+# Thai Herbal GACP Platform - Rules Engine Benchmark
+# ===================================================================
+# Compares the compiled, vectorized rules engine
+# (reasoning-engine/rules_engine.py) with the per-request dict traversal
+# generate_recommendations used before it: hard-coded thresholds plus a
+# knowledge_base["herbs"] walk for every reading.
+#
+# Usage:
+#   python bench_rules_engine.py
+#   python bench_rules_engine.py --readings 1,100,10000 --json results.json
+# ===================================================================
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'reasoning-engine'))
+
+from rules_engine import RulesEngine  # noqa: E402
+
+KNOWLEDGE_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '..', 'reasoning-engine', 'knowledge', 'gacp_rules.json')
+HERBS = ['andrographis', 'curcuma', 'ginger', 'turmeric', 'lemongrass']
+
+
+def legacy_recommendations(knowledge_base: Dict[str, Any], features: Dict, herbs: List[str]) -> List[str]:
+    """generate_recommendations as it was before the rules engine"""
+    recs = []
+    moisture = features.get("soil_moisture", 0.5)
+    if moisture < 0.3:
+        recs.append("ควรเพิ่มการรดน้ำ ดินมีความชื้นต่ำเกินไป")
+    elif moisture > 0.7:
+        recs.append("ควรลดการรดน้ำ ดินมีความชื้นสูงเกินไป")
+    temp = features.get("temperature", 25)
+    if temp < 20:
+        recs.append("อุณหภูมิต่ำเกินไปสำหรับสมุนไพรบางชนิด ควรพิจารณาใช้โรงเรือน")
+    for herb in herbs:
+        recs.extend(knowledge_base.get("herbs", {}).get(herb, {}).get("recommendations", []))
+    return recs[:5]
+
+
+def make_readings(count: int):
+    rng = np.random.default_rng(0)
+    readings = [
+        {
+            'soil_moisture': float(rng.uniform(0.1, 0.9)),
+            'temperature': float(rng.uniform(15, 35)),
+            'soil_ph': float(rng.uniform(4.5, 8.0)),
+            'organic_matter': float(rng.uniform(0.5, 4.0)),
+        }
+        for _ in range(count)
+    ]
+    herbs = [[HERBS[i % len(HERBS)]] for i in range(count)]
+    return readings, herbs
+
+
+def time_call(fn: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {'mean_ms': statistics.fmean(samples), 'p50_ms': samples[len(samples) // 2]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the GACP rules engine')
+    parser.add_argument('--readings', default='1,100,1000,10000')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    engine = RulesEngine(KNOWLEDGE_BASE, check_interval=3600)
+    rules = engine.current
+    knowledge_base = engine.knowledge_base
+    results = []
+
+    for count in [int(n) for n in args.readings.split(',')]:
+        readings, herbs = make_readings(count)
+        timings = {
+            'legacy_per_reading': time_call(
+                lambda: [legacy_recommendations(knowledge_base, r, h) for r, h in zip(readings, herbs)],
+                args.iterations),
+            'compiled_per_reading': time_call(
+                lambda: [rules.recommendations([r], [h]) for r, h in zip(readings, herbs)], args.iterations),
+            'compiled_batch': time_call(lambda: rules.recommendations(readings, herbs), args.iterations),
+            'compiled_violations': time_call(lambda: rules.violations(readings), args.iterations),
+        }
+        for name, timing in timings.items():
+            results.append({'readings': count, 'method': name, **timing})
+            print(f"{name:22s} readings={count:<6d} mean={timing['mean_ms']:9.3f}ms "
+                  f"p50={timing['p50_ms']:9.3f}ms per-reading={timing['mean_ms'] / count * 1000:8.2f}us")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# ===================================================================
+# Thai Herbal GACP Platform - Synthetic Benchmark Corpora
+# ===================================================================
+# Deterministic (seeded) test inputs so benchmark runs are comparable
+# between machines and releases without shipping real photos or
+# documents: textured "herb lot" photos at several resolutions and
+# small text-layer PDFs for the document validator.
+# ===================================================================
+
+import io
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Phone and scanner resolutions seen in production uploads
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    'vga': (640, 480),
+    'hd': (1280, 720),
+    'fhd': (1920, 1080),
+    '12mp': (4000, 3000),
+}
+
+DOCUMENT_TEXT = {
+    'commercial_registration': 'Commercial registration certificate. Company name: Thai Herbal Farm Co., Ltd. '
+                               'Registration number 0105561234567.',
+    'land_document': 'Land title deed. Title number 12345. Land area 5 rai 2 ngan.',
+}
+
+
+def synthetic_image(width: int, height: int, image_format: str = 'JPEG', seed: int = 0) -> bytes:
+    """Encoded photo-like image: smooth colour gradients plus high-frequency texture"""
+    rng = np.random.default_rng(seed)
+    # Build at low resolution and upscale so encoding cost resembles a real photo,
+    # not pure noise (which JPEG compresses far worse than camera output)
+    base_w, base_h = max(8, width // 8), max(8, height // 8)
+    base = rng.integers(40, 200, (base_h, base_w, 3), dtype=np.uint8)
+    image = Image.fromarray(base).resize((width, height), Image.Resampling.BICUBIC)
+    pixels = np.asarray(image, dtype=np.int16)
+    pixels = pixels + rng.integers(-12, 12, pixels.shape, dtype=np.int16)
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, format='JPEG', quality=90)
+    else:
+        image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def image_corpus(resolutions: List[str], count: int = 4, image_format: str = 'JPEG') -> Dict[str, List[bytes]]:
+    """``count`` distinct images per named resolution (distinct so result caches miss)"""
+    return {
+        name: [synthetic_image(*RESOLUTIONS[name], image_format=image_format, seed=seed)
+               for seed in range(count)]
+        for name in resolutions
+    }
+
+
+def _pdf_text_stream(text: str) -> bytes:
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    lines = [escaped[i:i + 80] for i in range(0, len(escaped), 80)]
+    body = ['BT', '/F1 11 Tf', '14 TL', '72 760 Td']
+    for line in lines:
+        body.append(f'({line}) Tj T*')
+    body.append('ET')
+    return '\n'.join(body).encode('latin-1')
+
+
+def synthetic_pdf(text: str, pages: int = 1, compress: bool = True) -> bytes:
+    """Minimal valid PDF with a real text layer on every page"""
+    objects: List[bytes] = []
+    page_ids = [3 + 2 * i for i in range(pages)]
+    font_id = 3 + 2 * pages
+
+    objects.append(b'<< /Type /Catalog /Pages 2 0 R >>')
+    kids = ' '.join(f'{pid} 0 R' for pid in page_ids)
+    objects.append(f'<< /Type /Pages /Kids [{kids}] /Count {pages} >>'.encode())
+    for index, page_id in enumerate(page_ids):
+        stream = _pdf_text_stream(f'{text} Page {index + 1} of {pages}.')
+        filters = ''
+        if compress:
+            stream = zlib.compress(stream)
+            filters = ' /Filter /FlateDecode'
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {page_id + 1} 0 R '
+            f'/Resources << /Font << /F1 {font_id} 0 R >> >> >>'.encode()
+        )
+        objects.append(f'<< /Length {len(stream)}{filters} >>\nstream\n'.encode() + stream + b'\nendstream')
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f'{number} 0 obj\n'.encode() + obj + b'\nendobj\n')
+    xref = out.tell()
+    out.write(f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode())
+    for offset in offsets:
+        out.write(f'{offset:010d} 00000 n \n'.encode())
+    out.write(f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+    return out.getvalue()
+
+
+def document_corpus(pages: int = 2) -> Dict[str, bytes]:
+    """One PDF per PDF-validated document type, named as the API expects (<type>.pdf)"""
+    return {f'{doc_type}.pdf': synthetic_pdf(text, pages=pages) for doc_type, text in DOCUMENT_TEXT.items()}
@@ -0,0 +1,175 @@
+# ===================================================================
+# Thai Herbal GACP Platform - Closed-loop Load Generator
+# ===================================================================
+# Drives one endpoint with a fixed number of concurrent clients, each
+# sending its next request as soon as the previous one returns, and
+# records per-request latency plus the resident memory of the process
+# serving the requests.
+# ===================================================================
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import psutil
+
+# send(client_index, request_index) -> HTTP status code
+SendFunction = Callable[[int, int], int]
+
+
+@dataclass
+class LoadResult:
+    """Latency percentiles, throughput and memory for one scenario"""
+    scenario: str
+    requests: int
+    errors: int
+    concurrency: int
+    duration_s: float
+    throughput_rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    rss_start_mb: float
+    rss_peak_mb: float
+    status_codes: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RssSampler:
+    """Tracks the peak resident set size of a process on a background thread"""
+
+    def __init__(self, pid: Optional[int] = None, interval: float = 0.05):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.start_bytes = self.process.memory_info().rss
+        self.peak_bytes = self.start_bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                rss = self.process.memory_info().rss
+                # Include child processes (e.g. the batch decode pool)
+                for child in self.process.children(recursive=True):
+                    rss += child.memory_info().rss
+            except psutil.Error:
+                break
+            self.peak_bytes = max(self.peak_bytes, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> 'RssSampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _percentile(values: np.ndarray, q: float) -> float:
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+def run_load(scenario: str,
+             send: SendFunction,
+             concurrency: int = 4,
+             requests: int = 200,
+             warmup: int = 5,
+             server_pid: Optional[int] = None) -> LoadResult:
+    """Send ``requests`` requests from ``concurrency`` clients after ``warmup`` untimed ones"""
+    for index in range(warmup):
+        send(0, index)
+
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    statuses: List[List[int]] = [[] for _ in range(concurrency)]
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+
+    def client(client_index: int):
+        while True:
+            with counter_lock:
+                request_index = next(counter, None)
+            if request_index is None:
+                return
+            started = time.perf_counter()
+            try:
+                status = send(client_index, request_index)
+            except Exception:
+                status = 599
+            latencies[client_index].append((time.perf_counter() - started) * 1000)
+            statuses[client_index].append(status)
+
+    with RssSampler(server_pid) as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(client, range(concurrency)))
+        duration = time.perf_counter() - started
+
+    samples = np.array([value for per_client in latencies for value in per_client])
+    codes = [code for per_client in statuses for code in per_client]
+    status_codes: Dict[str, int] = {}
+    for code in codes:
+        status_codes[str(code)] = status_codes.get(str(code), 0) + 1
+
+    return LoadResult(
+        scenario=scenario,
+        requests=len(codes),
+        errors=sum(1 for code in codes if code >= 400),
+        concurrency=concurrency,
+        duration_s=round(duration, 3),
+        throughput_rps=round(len(codes) / duration, 2) if duration else 0.0,
+        mean_ms=round(float(samples.mean()), 2) if len(samples) else 0.0,
+        p50_ms=round(_percentile(samples, 50), 2),
+        p95_ms=round(_percentile(samples, 95), 2),
+        p99_ms=round(_percentile(samples, 99), 2),
+        max_ms=round(float(samples.max()), 2) if len(samples) else 0.0,
+        rss_start_mb=round(rss.start_bytes / 1024 / 1024, 1),
+        rss_peak_mb=round(rss.peak_bytes / 1024 / 1024, 1),
+        status_codes=status_codes
+    )
+
+
+def check_thresholds(results: List[LoadResult], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """Violations of absolute limits: max_p95_ms, max_p99_ms, min_throughput_rps, max_rss_mb, max_error_rate"""
+    violations = []
+    for result in results:
+        limits = thresholds.get(result.scenario)
+        if not limits:
+            continue
+        checks = [
+            ('max_p95_ms', result.p95_ms, lambda value, limit: value <= limit),
+            ('max_p99_ms', result.p99_ms, lambda value, limit: value <= limit),
+            ('min_throughput_rps', result.throughput_rps, lambda value, limit: value >= limit),
+            ('max_rss_mb', result.rss_peak_mb, lambda value, limit: value <= limit),
+            ('max_error_rate', result.errors / max(result.requests, 1), lambda value, limit: value <= limit),
+        ]
+        for name, value, ok in checks:
+            if name in limits and not ok(value, limits[name]):
+                violations.append(f"{result.scenario}: {name} {value:g} (limit {limits[name]:g})")
+    return violations
+
+
+def compare_to_baseline(results: List[LoadResult], baseline: Dict[str, Dict[str, Any]],
+                        tolerance: float = 0.15) -> List[str]:
+    """Regressions of more than ``tolerance`` against a previous run's results"""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.scenario)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'rss_peak_mb'):
+            before, now = previous.get(metric), getattr(result, metric)
+            if before and now > before * (1 + tolerance):
+                regressions.append(f"{result.scenario}: {metric} {before:g} -> {now:g}")
+        before = previous.get('throughput_rps')
+        if before and result.throughput_rps < before * (1 - tolerance):
+            regressions.append(f"{result.scenario}: throughput_rps {before:g} -> {result.throughput_rps:g}")
+    return regressions
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# ===================================================================
+# Thai Herbal GACP Platform - Endpoint Benchmark Suite
+# ===================================================================
+# Load-tests /api/v1/analyze and /api/v1/batch/analyze (YOLO API) and
+# /validate-documents and /predict (reasoning engine) with synthetic
+# corpora. The reasoning engine runs in-process on stub models by
+# default, so it needs no GPU, network or model files (--reasoning-url
+# measures a running deployment instead). The YOLO API is only
+# benchmarked against a running instance given with --yolo-url: its
+# app module cannot be imported outside a full deployment.
+#
+# Reports p50/p95/p99 latency, throughput and peak RSS per scenario,
+# and fails (exit 1) when results break thresholds.json or regress
+# against a previous run.
+#
+# Usage:
+#   python run_benchmarks.py                                   # reasoning engine, in-process
+#   python run_benchmarks.py --requests 500 --output results.json --baseline last_release.json
+#   python run_benchmarks.py --services yolo --yolo-url http://localhost:5000 --server-pid 1234
+# ===================================================================
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, List, Sequence, Tuple
+
+from corpus import RESOLUTIONS, document_corpus, image_corpus, synthetic_image
+from loadgen import LoadResult, check_thresholds, compare_to_baseline, run_load
+from stub_models import build_reasoning_models
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICES_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_THRESHOLDS = os.path.join(BENCH_DIR, 'thresholds.json')
+
+# The in-process ASGI client logs every request at INFO
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+# (form field, filename, content, content type)
+Upload = Tuple[str, str, bytes, str]
+
+
+# -------------------------------------------------------------------
+# Targets: how a request reaches the service
+# -------------------------------------------------------------------
+
+class HttpTarget:
+    """A running service (httpx) or an in-process ASGI app (Starlette TestClient)"""
+
+    def __init__(self, client_factory: Callable[[], Any]):
+        self.client_factory = client_factory
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def post(self, path: str, files: Sequence[Upload] = (), json_body: Any = None) -> int:
+        if json_body is not None:
+            return self._client().post(path, json=json_body).status_code
+        return self._client().post(
+            path, files=[(field, (filename, content, ctype)) for field, filename, content, ctype in files]
+        ).status_code
+
+
+def _load_module(name: str, path: str):
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def yolo_target(args) -> HttpTarget:
+    import httpx
+    return HttpTarget(lambda: httpx.Client(base_url=args.yolo_url, timeout=120))
+
+
+def reasoning_target(args) -> HttpTarget:
+    if args.reasoning_url:
+        import httpx
+        return HttpTarget(lambda: httpx.Client(base_url=args.reasoning_url, timeout=120))
+    os.environ.update(build_reasoning_models(tempfile.mkdtemp(prefix='gacp-bench-models-')))
+    module = _load_module('reasoning_engine_app', os.path.join(SERVICES_DIR, 'reasoning-engine', 'app.py'))
+    from fastapi.testclient import TestClient
+    return HttpTarget(lambda: TestClient(module.app))
+
+
+# -------------------------------------------------------------------
+# Scenarios
+# -------------------------------------------------------------------
+
+def yolo_scenarios(args, target) -> List[Tuple[str, Callable[[int, int], int], int]]:
+    images = image_corpus(args.resolutions, count=args.corpus_size)
+    scenarios = []
+    for resolution, corpus in images.items():
+        def send(client, index, corpus=corpus):
+            return target.post('/api/v1/analyze', files=[('image', 'lot.jpg', corpus[index % len(corpus)], 'image/jpeg')])
+        scenarios.append((f'yolo.analyze.{resolution}', send, args.requests))
+
+    batch = [synthetic_image(*RESOLUTIONS['fhd'], seed=100 + i) for i in range(args.batch_size)]
+
+    def send_batch(client, index):
+        return target.post('/api/v1/batch/analyze',
+                           files=[('images', f'lot_{i}.jpg', content, 'image/jpeg') for i, content in enumerate(batch)])
+    scenarios.append((f'yolo.batch_analyze.{args.batch_size}x_fhd', send_batch, max(1, args.requests // 4)))
+    return scenarios
+
+
+def reasoning_scenarios(args, target) -> List[Tuple[str, Callable[[int, int], int], int]]:
+    pdfs = [('files', name, content, 'application/pdf') for name, content in document_corpus(pages=2).items()]
+    scans = [
+        ('files', f'{doc_type}.jpg', synthetic_image(*RESOLUTIONS['fhd'], seed=200 + i), 'image/jpeg')
+        for i, doc_type in enumerate(('farm_map', 'soil_test_report'))
+    ]
+    prediction = {
+        'features': {'soil_moisture': 0.45, 'temperature': 28.0, 'rainfall': 120.0, 'soil_ph': 6.2},
+        'herbal_types': [{'name': 'turmeric', 'thai_name': 'ขมิ้น'}, {'name': 'ginger', 'thai_name': 'ขิง'}]
+    }
+    farms = {'farms': [
+        dict(prediction, farm_id=f'farm-{i}',
+             features=dict(prediction['features'], soil_moisture=0.2 + (i % 7) / 10))
+        for i in range(args.batch_rows)
+    ]}
+    return [
+        ('reasoning.validate_documents.pdf', lambda c, i: target.post('/validate-documents', files=pdfs), args.requests),
+        ('reasoning.validate_documents.scan', lambda c, i: target.post('/validate-documents', files=scans), args.requests),
+        ('reasoning.predict', lambda c, i: target.post('/predict', json_body=prediction), args.requests),
+        (f'reasoning.predict_batch.{args.batch_rows}', lambda c, i: target.post('/predict/batch', json_body=farms),
+         args.requests),
+    ]
+
+
+# -------------------------------------------------------------------
+# Reporting
+# -------------------------------------------------------------------
+
+def print_table(results: List[LoadResult]):
+    header = f"{'scenario':40} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r.scenario:40} {r.requests:6d} {r.errors:4d} {r.throughput_rps:8.1f} "
+              f"{r.p50_ms:9.1f} {r.p95_ms:9.1f} {r.p99_ms:9.1f} {r.rss_peak_mb:8.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the GACP AI service endpoints')
+    parser.add_argument('--services', default='reasoning', help='yolo and/or reasoning (yolo needs --yolo-url)')
+    parser.add_argument('--scenarios', help='Only run scenarios whose name contains one of these (comma separated)')
+    parser.add_argument('--yolo-url', help='Running YOLO API to benchmark (required for --services yolo)')
+    parser.add_argument('--reasoning-url', help='Benchmark a running reasoning engine instead of the in-process app')
+    parser.add_argument('--server-pid', type=int, help='Sample RSS of this process (remote targets)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--resolutions', default='vga,fhd,12mp')
+    parser.add_argument('--corpus-size', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--batch-rows', type=int, default=256, help='Farms per /predict/batch request')
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS)
+    parser.add_argument('--baseline', help='Previous --output file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args()
+    args.resolutions = [r.strip() for r in args.resolutions.split(',') if r.strip()]
+    services = {s.strip() for s in args.services.split(',')}
+    filters = [f.strip() for f in args.scenarios.split(',')] if args.scenarios else None
+    if 'yolo' in services and not args.yolo_url:
+        parser.error('--services yolo requires --yolo-url (the YOLO API cannot run in-process)')
+
+    scenarios = []
+    if 'yolo' in services:
+        scenarios += yolo_scenarios(args, yolo_target(args))
+    if 'reasoning' in services:
+        scenarios += reasoning_scenarios(args, reasoning_target(args))
+    if filters:
+        scenarios = [s for s in scenarios if any(f in s[0] for f in filters)]
+
+    results = []
+    for name, send, requests in scenarios:
+        print(f"Running {name} ({requests} requests, concurrency {args.concurrency})...", file=sys.stderr)
+        results.append(run_load(name, send, concurrency=args.concurrency, requests=requests,
+                                warmup=args.warmup, server_pid=args.server_pid))
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({r.scenario: r.to_dict() for r in results}, f, indent=2)
+
+    failures: List[str] = []
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            failures += check_thresholds(results, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare_to_baseline(results, json.load(f), args.tolerance)
+
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# ===================================================================
+# Thai Herbal GACP Platform - Stub Models for Offline Benchmarks
+# ===================================================================
+# Small, deterministic stand-ins for the production models so the
+# benchmark suite runs on a CPU-only machine with no model downloads.
+# They do real (if small) tensor work, so request handling, decoding,
+# batching and serialization dominate the measurements the same way
+# they do in production.
+#
+# Real model files are written to a temp MODEL_DIR (TorchScript document
+# classifier, joblib yield predictor) for the in-process reasoning engine.
+# ===================================================================
+
+import os
+import shutil
+from typing import Dict
+
+import numpy as np
+
+KNOWLEDGE_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '..', 'reasoning-engine', 'knowledge', 'gacp_rules.json')
+
+
+# -------------------------------------------------------------------
+# Reasoning engine
+# -------------------------------------------------------------------
+
+class StubYieldModel:
+    """Bagged linear yield model over a fixed schema (numeric features plus one-hot herbs)"""
+
+    feature_names_in_ = np.array(
+        ['soil_moisture', 'temperature', 'rainfall', 'humidity', 'soil_ph', 'sunlight_hours']
+        + [f'herb_{herb}' for herb in ('andrographis', 'curcuma', 'ginger', 'turmeric', 'lemongrass')],
+        dtype=object
+    )
+
+    def __init__(self, members: int = 10):
+        rng = np.random.default_rng(0)
+        self.estimators_ = [
+            _StubLinearMember(rng.uniform(0.05, 0.15, len(self.feature_names_in_))) for _ in range(members)
+        ]
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        return np.mean([member.predict(features) for member in self.estimators_], axis=0)
+
+
+class _StubLinearMember:
+    def __init__(self, weights: np.ndarray):
+        self.weights = weights
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        return np.asarray(features, dtype=np.float64) @ self.weights + 1.0
+
+
+def build_reasoning_models(model_dir: str, num_document_types: int = 4) -> Dict[str, str]:
+    """Write stub model files and return the env vars the reasoning engine reads"""
+    import joblib
+    import torch
+
+    os.makedirs(model_dir, exist_ok=True)
+    torch.manual_seed(0)
+    classifier = torch.nn.Sequential(
+        torch.nn.Conv2d(3, 8, 3, stride=2),
+        torch.nn.ReLU(),
+        torch.nn.AdaptiveAvgPool2d(1),
+        torch.nn.Flatten(),
+        torch.nn.Linear(8, num_document_types)
+    ).eval()
+    torch.jit.script(classifier).save(os.path.join(model_dir, 'document_classifier.pt'))
+    joblib.dump(StubYieldModel(), os.path.join(model_dir, 'yield_predictor.pkl'))
+
+    knowledge_path = os.path.join(model_dir, 'gacp_rules.json')
+    shutil.copyfile(KNOWLEDGE_BASE, knowledge_path)
+    return {'MODEL_DIR': model_dir, 'KNOWLEDGE_BASE_PATH': knowledge_path}
@@ -1,7 +1,9 @@
 import os
+import asyncio
+import hmac
 import logging
-import json
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import Depends, FastAPI, UploadFile, File, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
@@ -10,10 +12,18 @@ from PIL import Image
 import io
 import torch
 from torchvision import transforms
-import pandas as pd
 from sklearn.base import BaseEstimator
 import joblib
 
+import metrics
+from executor import InferenceExecutor, OverloadedError
+from inference_scheduler import InferenceScheduler, QueueFullError
+from knowledge_graph import KnowledgeGraph
+from pdf_validation import PdfValidator
+from rules_engine import RulesEngine
+from yield_model import YieldFeatureSchema, YieldPredictor
+from profiler import ProfilerBusyError, RuntimeProfiler
+
 # Initialize logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,6 +38,9 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Request latency middleware and /metrics endpoint
+metrics.instrument(app)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +54,35 @@ app.add_middleware(
 class Config:
     MODEL_DIR = os.getenv("MODEL_DIR", "/app/models")
     KNOWLEDGE_BASE_PATH = os.getenv("KNOWLEDGE_BASE_PATH", "/app/knowledge/gacp_rules.json")
+    # CPU-bound work (decode, torch, sklearn) runs on this many threads, off the event loop
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Calls allowed to wait for a worker before requests are rejected with 503
+    INFERENCE_QUEUE_LIMIT = int(os.getenv("INFERENCE_QUEUE_LIMIT", "32"))
+    # Image documents from concurrent requests are classified together in batches
+    DOCUMENT_BATCH_SIZE = int(os.getenv("DOCUMENT_BATCH_SIZE", "16"))
+    DOCUMENT_BATCH_WAIT_MS = float(os.getenv("DOCUMENT_BATCH_WAIT_MS", "5"))
+    # Documents waiting for the classifier before requests are rejected with 503
+    DOCUMENT_QUEUE_LIMIT = int(os.getenv("DOCUMENT_QUEUE_LIMIT", "64"))
+    # Files of one request validated at a time, so a large upload queues behind
+    # itself instead of filling the executor queue and being rejected
+    DOCUMENT_REQUEST_CONCURRENCY = int(os.getenv("DOCUMENT_REQUEST_CONCURRENCY", str(max(1, INFERENCE_WORKERS))))
+    # PDF validation: scanned pages are OCR'd in a separate process pool
+    PDF_OCR_WORKERS = int(os.getenv("PDF_OCR_WORKERS", "2"))
+    PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+    PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", "200"))
+    PDF_OCR_LANG = os.getenv("PDF_OCR_LANG", "tha+eng")
+    PDF_OCR_CACHE_SIZE = int(os.getenv("PDF_OCR_CACHE_SIZE", "256"))
+    # Yield prediction
+    PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "1000"))
+    YIELD_DEFAULT_CONFIDENCE = float(os.getenv("YIELD_DEFAULT_CONFIDENCE", "0.85"))
+    # Knowledge graph traversal bounds and memoization
+    KNOWLEDGE_MAX_DEPTH = int(os.getenv("KNOWLEDGE_MAX_DEPTH", "4"))
+    KNOWLEDGE_MAX_EDGES = int(os.getenv("KNOWLEDGE_MAX_EDGES", "500"))
+    KNOWLEDGE_CACHE_SIZE = int(os.getenv("KNOWLEDGE_CACHE_SIZE", "4096"))
+    # Rules engine: the knowledge base file is re-checked this often and recompiled on change
+    RULES_CHECK_INTERVAL = float(os.getenv("RULES_CHECK_INTERVAL", "2"))
+    RULES_MAX_READINGS = int(os.getenv("RULES_MAX_READINGS", "10000"))
+    EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
     DOCUMENT_TYPES = {
         "commercial_registration": "ทะเบียนพาณิชย์",
         "land_document": "เอกสารสิทธิ์ในที่ดิน",
@@ -55,6 +97,12 @@ class Config:
         "lemongrass": "ตะไคร้",
     }
 
+def reload_knowledge(new_knowledge_base: Dict):
+    """Swap in the knowledge graph for a reloaded knowledge base file"""
+    global knowledge_base, knowledge_graph
+    knowledge_graph = KnowledgeGraph(new_knowledge_base, cache_size=Config.KNOWLEDGE_CACHE_SIZE)
+    knowledge_base = new_knowledge_base
+
 # Load models and knowledge base
 try:
     # Load document classification model
@@ -66,15 +114,47 @@ try:
         os.path.join(Config.MODEL_DIR, "yield_predictor.pkl")
     )
     
-    # Load knowledge base
-    with open(Config.KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
-        knowledge_base = json.load(f)
+    # Load knowledge base and compile its rules (recompiled when the file changes)
+    rules_engine = RulesEngine(
+        Config.KNOWLEDGE_BASE_PATH,
+        check_interval=Config.RULES_CHECK_INTERVAL,
+        on_reload=reload_knowledge,
+    )
+    knowledge_base = rules_engine.knowledge_base
+    knowledge_graph = KnowledgeGraph(knowledge_base, cache_size=Config.KNOWLEDGE_CACHE_SIZE)
     
     logger.info("AI models and knowledge base loaded successfully")
 except Exception as e:
     logger.error(f"Failed to load models: {str(e)}")
     raise RuntimeError("Model loading failed") from e
 
+# Inference executor with admission control
+inference_executor = InferenceExecutor(
+    Config.INFERENCE_WORKERS,
+    Config.INFERENCE_QUEUE_LIMIT,
+    on_queue_wait=metrics.EXECUTOR_QUEUE_WAIT.observe,
+)
+metrics.EXECUTOR_PENDING.set_function(lambda: inference_executor.pending)
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    metrics.REJECTED_REQUESTS.inc()
+    logger.warning(f"Rejecting {request.url.path}: {exc}")
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    app.state.loop_lag_task = asyncio.create_task(
+        metrics.monitor_event_loop_lag(Config.EVENT_LOOP_LAG_INTERVAL)
+    )
+
+@app.on_event("shutdown")
+async def stop_background_work():
+    app.state.loop_lag_task.cancel()
+    inference_executor.shutdown(wait=False)
+    document_scheduler.shutdown()
+    pdf_validator.shutdown()
+
 # Transformation for document images
 document_transform = transforms.Compose([
     transforms.Resize((224, 224)),
@@ -82,6 +162,30 @@ document_transform = transforms.Compose([
     transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
 ])
 
+# Cross-request batching for the document classifier
+document_scheduler = InferenceScheduler(
+    max_batch_size=Config.DOCUMENT_BATCH_SIZE,
+    max_wait_ms=Config.DOCUMENT_BATCH_WAIT_MS,
+    max_queue=Config.DOCUMENT_QUEUE_LIMIT,
+)
+document_scheduler.register("document_classifier", lambda tensors: classify_document_batch(tensors))
+
+# Yield predictor over the model's fixed feature order
+yield_predictor = YieldPredictor(
+    predictive_model,
+    YieldFeatureSchema.from_model(predictive_model, list(Config.HERBAL_TYPES)),
+    default_confidence=Config.YIELD_DEFAULT_CONFIDENCE,
+)
+
+# PDF validation engine
+pdf_validator = PdfValidator(
+    ocr_workers=Config.PDF_OCR_WORKERS,
+    max_pages=Config.PDF_MAX_PAGES,
+    ocr_dpi=Config.PDF_OCR_DPI,
+    ocr_lang=Config.PDF_OCR_LANG,
+    cache_size=Config.PDF_OCR_CACHE_SIZE,
+)
+
 # Pydantic models
 class DocumentValidationRequest:
     document_type: str
@@ -111,13 +215,64 @@ class PredictionResult(BaseModel):
     confidence: float
     recommendations: List[str]
 
+class FarmFeatures(BaseModel):
+    farm_id: Optional[str] = None
+    features: Dict[str, float]
+    herbal_types: List[HerbalType]
+
+class BatchPredictionRequest(BaseModel):
+    farms: List[FarmFeatures]
+
+class BatchPredictionItem(PredictionResult):
+    farm_id: Optional[str] = None
+    missing_features: List[str]
+    unknown_features: List[str]
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionItem]
+    feature_order: List[str]
+    confidence_source: str
+
+class FarmReading(BaseModel):
+    farm_id: Optional[str] = None
+    values: Dict[str, float]
+
+class RulesEvaluationRequest(BaseModel):
+    readings: List[FarmReading]
+
+class RuleViolation(BaseModel):
+    rule: str
+    feature: str
+    value: float
+    bound: float
+    violation: str
+    message: str
+
+class RulesEvaluationResult(BaseModel):
+    farm_id: Optional[str] = None
+    passed: bool
+    violations: List[RuleViolation]
+
+class RulesEvaluationResponse(BaseModel):
+    rules_version: str
+    results: List[RulesEvaluationResult]
+
 class KnowledgeGraphQuery(BaseModel):
     entities: List[str]
     relationships: List[str]
+    max_depth: int = 1
+    direction: str = "out"
+    limit: int = 100
 
 class KnowledgeGraphResponse(BaseModel):
     results: List[Dict]
 
+class KnowledgeGraphBatchQuery(BaseModel):
+    queries: List[KnowledgeGraphQuery]
+
+class KnowledgeGraphBatchResponse(BaseModel):
+    responses: List[KnowledgeGraphResponse]
+
 # Document validation endpoint
 @app.post("/validate-documents", response_model=DocumentValidationResponse)
 async def validate_documents(files: List[UploadFile] = File(...)):
@@ -126,100 +281,101 @@ async def validate_documents(files: List[UploadFile] = File(...)):
     
     - **files**: List of document files to validate
     """
-    results = []
-    overall_valid = True
+    # Files are validated concurrently, at most DOCUMENT_REQUEST_CONCURRENCY at a
+    # time; image documents from this and any concurrent request share batched
+    # classifier forward passes
+    fan_out = asyncio.Semaphore(Config.DOCUMENT_REQUEST_CONCURRENCY)
+
+    async def validate_bounded(file: UploadFile) -> DocumentValidationResult:
+        async with fan_out:
+            return await validate_upload(file)
+
+    results = await asyncio.gather(*(validate_bounded(file) for file in files))
     
-    for file in files:
-        try:
-            # Read file content
-            content = await file.read()
-            
-            # Get document type from filename
-            document_type = os.path.splitext(file.filename)[0]
-            thai_name = Config.DOCUMENT_TYPES.get(document_type, "เอกสารไม่ระบุประเภท")
-            
-            # Validate document
-            if document_type in ["commercial_registration", "land_document"]:
-                # PDF validation logic
-                is_valid, confidence, issues = validate_pdf(content, document_type)
-            else:
-                # Image validation logic
-                is_valid, confidence, issues = validate_image(content, document_type)
-            
-            if not is_valid:
-                overall_valid = False
-                
-            results.append(DocumentValidationResult(
-                document_type=document_type,
-                is_valid=is_valid,
-                confidence=confidence,
-                issues=issues,
-                thai_name=thai_name
-            ))
-            
-        except Exception as e:
-            logger.error(f"Error validating document {file.filename}: {str(e)}")
-            results.append(DocumentValidationResult(
-                document_type=document_type,
-                is_valid=False,
-                confidence=0.0,
-                issues=[f"Validation error: {str(e)}"],
-                thai_name="เอกสารไม่ระบุประเภท"
-            ))
-            overall_valid = False
-            
     return DocumentValidationResponse(
-        overall_valid=overall_valid,
+        overall_valid=all(result.is_valid for result in results),
         results=results
     )
 
-def validate_pdf(content: bytes, doc_type: str) -> (bool, float, List[str]):
-    """Validate PDF documents using OCR and rule-based checks"""
-    # In production, we'd use OCR libraries like Tesseract
-    # For demo, we'll simulate validation
-    
-    # Check if document is valid PDF
-    if content[:4] != b'%PDF':
-        return False, 0.0, ["รูปแบบไฟล์ไม่ถูกต้อง ควรเป็น PDF"]
-    
-    # Simulate content validation
-    content_str = content[:1000].decode('latin-1', errors='ignore').lower()
-    
-    issues = []
-    if doc_type == "commercial_registration":
-        if "company" not in content_str and "registration" not in content_str:
-            issues.append("ไม่พบข้อมูลทะเบียนพาณิชย์")
+async def validate_upload(file: UploadFile) -> DocumentValidationResult:
+    """Validate one uploaded document, reporting failures as an invalid result"""
+    document_type = os.path.splitext(file.filename)[0]
+    try:
+        # Read file content
+        content = await file.read()
         
-        # Check expiration date logic would go here
+        # Get document type from filename
+        thai_name = Config.DOCUMENT_TYPES.get(document_type, "เอกสารไม่ระบุประเภท")
         
-    elif doc_type == "land_document":
-        if "land" not in content_str and "title" not in content_str:
-            issues.append("ไม่พบข้อมูลเอกสารสิทธิ์ในที่ดิน")
-    
-    is_valid = len(issues) == 0
-    confidence = 0.95 if is_valid else 0.45
-    
-    return is_valid, confidence, issues
+        # Validate document
+        if document_type in ["commercial_registration", "land_document"]:
+            # PDF validation logic
+            is_valid, confidence, issues = await inference_executor.run(validate_pdf_timed, content, document_type)
+        else:
+            # Image validation logic
+            is_valid, confidence, issues = await validate_image(content, document_type)
+        
+        return DocumentValidationResult(
+            document_type=document_type,
+            is_valid=is_valid,
+            confidence=confidence,
+            issues=issues,
+            thai_name=thai_name
+        )
+        
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Error validating document {file.filename}: {str(e)}")
+        return DocumentValidationResult(
+            document_type=document_type,
+            is_valid=False,
+            confidence=0.0,
+            issues=[f"Validation error: {str(e)}"],
+            thai_name="เอกสารไม่ระบุประเภท"
+        )
 
-def validate_image(content: bytes, doc_type: str) -> (bool, float, List[str]):
-    """Validate image documents using computer vision"""
-    try:
-        # Load and preprocess image
+def validate_pdf_timed(content: bytes, doc_type: str) -> (bool, float, List[str]):
+    """Run validate_pdf as the "pdf" stage (blocking; runs on the inference executor)"""
+    with metrics.stage("pdf"):
+        return validate_pdf(content, doc_type)
+
+def validate_pdf(content: bytes, doc_type: str) -> (bool, float, List[str]):
+    """Validate PDF documents from their text layer, with OCR for scanned pages"""
+    return pdf_validator.validate(content, doc_type)
+
+def load_document_image(content: bytes) -> (Image.Image, torch.Tensor):
+    """Decode an image document into its classifier input (blocking; runs on the inference executor)"""
+    with metrics.stage("decode"):
         img = Image.open(io.BytesIO(content))
         
         if img.mode != 'RGB':
             img = img.convert('RGB')
             
-        img_tensor = document_transform(img).unsqueeze(0)
+        return img, document_transform(img)
+
+def classify_document_batch(tensors: List[torch.Tensor]) -> List[tuple]:
+    """One forward pass over stacked document images -> (predicted class, confidence) per image"""
+    metrics.DOCUMENT_BATCH_SIZE.observe(len(tensors))
+    with metrics.stage("classify"), runtime_profiler.model_call("document_classifier"), torch.no_grad():
+        output = document_model(torch.stack(tensors))
+        confidences, preds = torch.nn.functional.softmax(output, dim=1).max(dim=1)
+    return list(zip(preds.tolist(), confidences.tolist()))
+
+async def validate_image(content: bytes, doc_type: str) -> (bool, float, List[str]):
+    """Validate image documents using computer vision"""
+    try:
+        # Load and preprocess image
+        img, img_tensor = await inference_executor.run(load_document_image, content)
         
-        # Predict with model
-        with torch.no_grad():
-            output = document_model(img_tensor)
-            _, pred = torch.max(output, 1)
-            confidence = torch.nn.functional.softmax(output, dim=1)[0][pred].item()
+        # Predict with model (batched with other queued documents)
+        try:
+            prediction = document_scheduler.submit("document_classifier", img_tensor)
+        except QueueFullError as e:
+            raise OverloadedError(str(e)) from e
+        predicted_class, confidence = await asyncio.wrap_future(prediction)
         
         # Check if prediction matches document type
-        predicted_class = pred.item()
         target_class = list(Config.DOCUMENT_TYPES.keys()).index(doc_type)
         is_valid = predicted_class == target_class
         
@@ -237,6 +393,8 @@ def validate_image(content: bytes, doc_type: str) -> (bool, float, List[str]):
         
         return is_valid, confidence, issues
         
+    except OverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Image validation error: {str(e)}")
         return False, 0.0, [f"Image processing error: {str(e)}"]
@@ -256,51 +414,104 @@ async def predict_yield(request: PredictionRequest):
     - **herbal_types**: List of herbal types to predict
     """
     try:
-        # Prepare features
-        feature_df = pd.DataFrame([request.features])
+        return await inference_executor.run(run_yield_prediction, request)
         
-        # Add herbal type features
-        for herb in request.herbal_types:
-            feature_df[f"herb_{herb.name}"] = 1
-        
-        # Predict
-        prediction = predictive_model.predict(feature_df)[0]
-        
-        # Generate recommendations
-        recommendations = generate_recommendations(request.features, request.herbal_types)
-        
-        return PredictionResult(
-            prediction=prediction,
-            confidence=0.85,  # Confidence would come from model in production
-            recommendations=recommendations
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def run_yield_prediction(request: PredictionRequest) -> PredictionResult:
+    """Predict one farm's yield (blocking; runs on the inference executor)"""
+    result = run_batch_yield_prediction([request])[0]
+    return PredictionResult(
+        prediction=result.prediction,
+        confidence=result.confidence,
+        recommendations=result.recommendations
+    )
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_yield_batch(request: BatchPredictionRequest):
+    """
+    Predict yields for many farms with a single model call
+    
+    - **farms**: Feature rows, each with its herbal types and an optional farm_id
+    """
+    if len(request.farms) > Config.PREDICT_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {Config.PREDICT_BATCH_MAX_ROWS} farms per batch (got {len(request.farms)})"
         )
+    try:
+        results = await inference_executor.run(run_batch_yield_prediction, request.farms)
+        return BatchPredictionResponse(results=results, **yield_predictor.info())
         
+    except OverloadedError:
+        raise
     except Exception as e:
-        logger.error(f"Prediction error: {str(e)}")
+        logger.error(f"Batch prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-def generate_recommendations(features: Dict, herbs: List[HerbalType]) -> List[str]:
-    """Generate cultivation recommendations based on features and herbs"""
-    recs = []
+def run_batch_yield_prediction(farms: List[FarmFeatures]) -> List[BatchPredictionItem]:
+    """Map rows onto the model's feature order and predict them in one call"""
+    rows = [(farm.features, [herb.name for herb in farm.herbal_types]) for farm in farms]
     
-    # Soil moisture recommendations
-    moisture = features.get("soil_moisture", 0.5)
-    if moisture < 0.3:
-        recs.append("ควรเพิ่มการรดน้ำ ดินมีความชื้นต่ำเกินไป")
-    elif moisture > 0.7:
-        recs.append("ควรลดการรดน้ำ ดินมีความชื้นสูงเกินไป")
+    # Predict
+    with metrics.stage("predict"):
+        predictions, confidences, reports = yield_predictor.predict(rows)
     
-    # Temperature recommendations
-    temp = features.get("temperature", 25)
-    if temp < 20:
-        recs.append("อุณหภูมิต่ำเกินไปสำหรับสมุนไพรบางชนิด ควรพิจารณาใช้โรงเรือน")
+    # Generate recommendations
+    recommendations = rules_engine.current.recommendations(
+        [farm.features for farm in farms], [herbs for _, herbs in rows]
+    )
     
-    # Herb-specific recommendations
-    for herb in herbs:
-        herb_recs = knowledge_base.get("herbs", {}).get(herb.name, {}).get("recommendations", [])
-        recs.extend(herb_recs)
+    return [
+        BatchPredictionItem(
+            farm_id=getattr(farm, "farm_id", None),
+            prediction=float(prediction),
+            confidence=float(confidence),
+            recommendations=recs,
+            missing_features=report.missing_features,
+            unknown_features=report.unknown_features
+        )
+        for farm, prediction, confidence, report, recs in zip(farms, predictions, confidences, reports, recommendations)
+    ]
+
+# Rules evaluation endpoint
+@app.post("/rules/evaluate", response_model=RulesEvaluationResponse)
+async def evaluate_rules(request: RulesEvaluationRequest):
+    """
+    Check farm readings against the GACP soil-test and cultivation rules
     
-    return recs[:5]  # Return top 5 recommendations
+    - **readings**: Measured values per farm, e.g. `{"soil_ph": 5.1, "soil_moisture": 0.2}`
+    """
+    if len(request.readings) > Config.RULES_MAX_READINGS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {Config.RULES_MAX_READINGS} readings per call (got {len(request.readings)})"
+        )
+    try:
+        return await inference_executor.run(run_rules_evaluation, request.readings)
+        
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Rules evaluation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def run_rules_evaluation(readings: List[FarmReading]) -> RulesEvaluationResponse:
+    """Evaluate every reading against every rule in one vectorized pass"""
+    rules = rules_engine.current
+    with metrics.stage("rules"):
+        violations = rules.violations([reading.values for reading in readings])
+    return RulesEvaluationResponse(
+        rules_version=rules.version,
+        results=[
+            RulesEvaluationResult(farm_id=reading.farm_id, passed=not found, violations=found)
+            for reading, found in zip(readings, violations)
+        ]
+    )
 
 # Knowledge graph endpoint
 @app.post("/query-knowledge", response_model=KnowledgeGraphResponse)
@@ -308,37 +519,148 @@ async def query_knowledge_graph(query: KnowledgeGraphQuery):
     """
     Query the GACP knowledge graph
     
-    - **entities**: Entities to query
-    - **relationships**: Relationships to explore
+    - **entities**: Entities to query (keys, Thai names or scientific names)
+    - **relationships**: Relationships to explore (empty follows all)
+    - **max_depth**: Hops to traverse, e.g. 2 for herb → quality standard → required document
+    - **direction**: `out`, `in` (reverse edges) or `both`
     """
+    check_knowledge_query(query)
     try:
-        results = []
-        
-        # In production, this would query a real knowledge graph
-        # For demo, we'll simulate results from our knowledge base
-        
-        for entity in query.entities:
-            entity_data = knowledge_base.get("entities", {}).get(entity, {})
-            if entity_data:
-                result = {"entity": entity, "data": entity_data}
-                
-                # Add relationships
-                for rel in query.relationships:
-                    if rel in entity_data.get("relationships", {}):
-                        result[rel] = entity_data["relationships"][rel]
-                
-                results.append(result)
-        
+        results = await inference_executor.run(query_knowledge_base, query)
         return KnowledgeGraphResponse(results=results)
         
+    except OverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Knowledge query error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query-knowledge/batch", response_model=KnowledgeGraphBatchResponse)
+async def query_knowledge_graph_batch(batch: KnowledgeGraphBatchQuery):
+    """Run several knowledge graph queries in one request"""
+    for query in batch.queries:
+        check_knowledge_query(query)
+    try:
+        graph = current_knowledge_graph()
+        responses = await inference_executor.run(
+            lambda: [KnowledgeGraphResponse(results=query_knowledge_base(query, graph)) for query in batch.queries]
+        )
+        return KnowledgeGraphBatchResponse(responses=responses)
+        
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Knowledge batch query error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def check_knowledge_query(query: KnowledgeGraphQuery):
+    """Reject traversals outside the configured bounds"""
+    if not 1 <= query.max_depth <= Config.KNOWLEDGE_MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"max_depth must be between 1 and {Config.KNOWLEDGE_MAX_DEPTH}")
+    if not 1 <= query.limit <= Config.KNOWLEDGE_MAX_EDGES:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {Config.KNOWLEDGE_MAX_EDGES}")
+    if query.direction not in ("out", "in", "both"):
+        raise HTTPException(status_code=400, detail="direction must be 'out', 'in' or 'both'")
+
+def current_knowledge_graph() -> KnowledgeGraph:
+    """Knowledge graph of the current knowledge base file"""
+    # Runs the rules engine's periodic file check, which swaps knowledge_graph on change
+    rules_engine.current
+    return knowledge_graph
+
+def query_knowledge_base(query: KnowledgeGraphQuery, graph: Optional[KnowledgeGraph] = None) -> List[Dict]:
+    """Traverse the knowledge graph from each entity (blocking; runs on the inference executor)"""
+    # One graph for the whole query: a reload may swap the global mid-way
+    if graph is None:
+        graph = current_knowledge_graph()
+    results = []
+    
+    with metrics.stage("knowledge"):
+        for entity in query.entities:
+            edges = graph.traverse(
+                entity, query.relationships, query.max_depth, query.direction, query.limit
+            )
+            if edges is None:
+                continue
+            node = graph.resolve(entity)
+            entity_data = graph.entities[graph.node_names[node]]
+            result = {"entity": entity, "data": entity_data}
+            
+            # Direct relationships, as listed in the knowledge base
+            for rel in query.relationships:
+                if rel in entity_data.get("relationships", {}):
+                    result[rel] = entity_data["relationships"][rel]
+            
+            result["edges"] = edges
+            results.append(result)
+    
+    return results
+
+# Admin: on-demand profiling
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+runtime_profiler = RuntimeProfiler(max_duration=float(os.getenv("PROFILER_MAX_SECONDS", "60")))
+
+def require_admin(
+    x_admin_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """Reject the request unless it carries the configured admin token"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_TOKEN is not set)")
+    supplied = x_admin_token or ""
+    if authorization and authorization.startswith("Bearer "):
+        supplied = authorization[len("Bearer "):]
+    if not hmac.compare_digest(supplied.encode("utf-8"), ADMIN_API_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+def profile_workers(
+    seconds: float = 10.0,
+    interval_ms: float = 5.0,
+    include_torch: bool = Query(True, alias="torch"),
+    format: str = "folded",
+):
+    """
+    Sample every thread (including the event loop) for N seconds
+    
+    - **format**: `folded` stacks for flamegraph.pl/speedscope, or `json` with torch operator totals
+    """
+    # A sync endpoint runs in the threadpool, so the event loop keeps serving while it samples
+    if format not in ("folded", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'folded' or 'json'")
+    try:
+        session = runtime_profiler.profile(seconds, interval_ms / 1000, include_torch)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "json":
+        return session.to_dict()
+    return PlainTextResponse(session.folded() + "\n")
+
+@app.post("/admin/rules/reload", dependencies=[Depends(require_admin)])
+def reload_rules():
+    """Recompile the rules now instead of waiting for the next file check"""
+    reloaded = rules_engine.reload(force=True)
+    return {"reloaded": reloaded, **rules_engine.stats()}
+
 # Health check endpoint
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "model_loaded": True}
+    return {
+        "status": "healthy",
+        "model_loaded": True,
+        "inference_executor": {
+            "workers": inference_executor.max_workers,
+            "pending": inference_executor.pending,
+            "capacity": inference_executor.capacity,
+        },
+        "document_batching": document_scheduler.get_metrics(),
+        "yield_model": yield_predictor.info(),
+        "knowledge_graph": knowledge_graph.stats(),
+        "rules": rules_engine.stats(),
+        "pdf_validation": dict(pdf_validator.stats(), ocr_available=pdf_validator.ocr_available),
+    }
 
 # Main entry point
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class OverloadedError(Exception):
+    """Raised when the executor already holds as much work as it may queue"""
+
+
+class InferenceExecutor:
+    """Bounded thread pool for CPU-bound model work called from async endpoints
+
+    torch, NumPy and PIL release the GIL in their heavy loops, so threads
+    give real parallelism here without loading a model copy per process.
+    At most ``max_workers + max_queue`` calls are admitted at once; beyond
+    that ``run`` raises ``OverloadedError`` instead of growing the queue.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "inference",
+                 on_queue_wait: Optional[Callable[[float], None]] = None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.capacity = max_workers + max_queue
+        self.on_queue_wait = on_queue_wait
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Calls admitted and not yet finished (running plus queued)"""
+        return self._pending
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def _timed(self, submitted: float, fn: Callable, args, kwargs):
+        if self.on_queue_wait is not None:
+            self.on_queue_wait(time.perf_counter() - submitted)
+        return fn(*args, **kwargs)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result"""
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise OverloadedError(
+                    f"Inference queue is full ({self._pending} pending, capacity {self.capacity})"
+                )
+            self._pending += 1
+        try:
+            future = self._pool.submit(self._timed, time.perf_counter(), fn, args, kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # Released from the worker thread, so a cancelled request still
+        # holds its slot until the work it started has actually finished
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,233 @@
+# Thai Herbal GACP Platform v3.0 - Inference Scheduler
+# ===================================================================
+# Collects concurrent requests for the same model into micro-batches
+# so each forward pass runs on a stacked batch instead of one image.
+# ===================================================================
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+BatchFunction = Callable[[List[Any]], Sequence[Any]]
+
+# Sentinel used to stop a model worker thread
+_SHUTDOWN = object()
+
+
+class QueueFullError(Exception):
+    """Raised by ``submit`` when a model already has ``max_queue`` requests waiting"""
+
+
+@dataclass
+class _PendingRequest:
+    payload: Any
+    future: Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class BatchStats:
+    """Thread-safe batch size and queue wait counters for one model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total_batches = 0
+        self.total_items = 0
+        self.max_batch_size = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.failed_batches = 0
+
+    def record(self, batch_size: int, queue_waits: List[float], failed: bool = False):
+        with self._lock:
+            self.total_batches += 1
+            self.total_items += batch_size
+            self.max_batch_size = max(self.max_batch_size, batch_size)
+            self.batch_size_histogram[batch_size] = self.batch_size_histogram.get(batch_size, 0) + 1
+            self.total_queue_wait += sum(queue_waits)
+            self.max_queue_wait = max(self.max_queue_wait, max(queue_waits, default=0.0))
+            if failed:
+                self.failed_batches += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'total_batches': self.total_batches,
+                'total_items': self.total_items,
+                'failed_batches': self.failed_batches,
+                'mean_batch_size': self.total_items / self.total_batches if self.total_batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'batch_size_histogram': {str(k): v for k, v in sorted(self.batch_size_histogram.items())},
+                'mean_queue_wait_ms': (self.total_queue_wait / self.total_items * 1000) if self.total_items else 0.0,
+                'max_queue_wait_ms': self.max_queue_wait * 1000,
+            }
+
+
+class _ModelQueue:
+    """Request queue and batching worker for a single model"""
+
+    def __init__(self, name: str, batch_fn: BatchFunction, max_batch_size: int, max_wait: float,
+                 max_queue: int = 0):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.stats = BatchStats()
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name=f"inference-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, payload: Any) -> Future:
+        pending = _PendingRequest(payload=payload, future=Future())
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            raise QueueFullError(f"Queue for '{self.name}' is full ({self.max_queue} requests waiting)") from None
+        return pending.future
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._queue.put(_SHUTDOWN)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _SHUTDOWN:
+                return
+
+            batch = [first]
+            # The wait window opens when the oldest request arrived, so requests
+            # that already queued behind a running batch are dispatched at once.
+            deadline = first.enqueued_at + self.max_wait
+            stop_requested = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _SHUTDOWN:
+                    stop_requested = True
+                    break
+                batch.append(item)
+
+            self._execute(batch)
+            if stop_requested:
+                return
+
+    def _execute(self, batch: List[_PendingRequest]):
+        # Drop requests whose callers gave up before the batch started
+        batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        started = time.monotonic()
+        queue_waits = [started - item.enqueued_at for item in batch]
+
+        try:
+            outputs = list(self.batch_fn([item.payload for item in batch]))
+            if len(outputs) != len(batch):
+                raise RuntimeError(
+                    f"Batch function for '{self.name}' returned {len(outputs)} results for {len(batch)} inputs"
+                )
+        except Exception as e:
+            logger.error(f"Batched inference failed for {self.name} (batch of {len(batch)}): {str(e)}")
+            self.stats.record(len(batch), queue_waits, failed=True)
+            for item in batch:
+                item.future.set_exception(e)
+            return
+
+        self.stats.record(len(batch), queue_waits)
+        for item, output in zip(batch, outputs):
+            item.future.set_result(output)
+
+
+class InferenceScheduler:
+    """Central dynamic micro-batching scheduler for model calls
+
+    Each registered model gets its own queue and worker thread. A worker
+    takes the oldest request, waits at most ``max_wait_ms`` for more
+    requests to arrive, and runs the model once on up to
+    ``max_batch_size`` inputs. With ``max_queue`` set, ``submit`` raises
+    ``QueueFullError`` once that many requests are waiting for a model
+    (0 leaves the queues unbounded).
+    """
+
+    def __init__(self, max_batch_size: int = 8, max_wait_ms: float = 10.0, timeout: Optional[float] = 30.0,
+                 max_queue: int = 0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._lock = threading.Lock()
+
+    def register(self,
+                 name: str,
+                 batch_fn: BatchFunction,
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None,
+                 max_queue: Optional[int] = None):
+        """Register a batch function that maps a list of inputs to a list of outputs"""
+        with self._lock:
+            if name in self._queues:
+                raise ValueError(f"Model '{name}' is already registered")
+            self._queues[name] = _ModelQueue(
+                name,
+                batch_fn,
+                max_batch_size or self.max_batch_size,
+                (self.max_wait_ms if max_wait_ms is None else max_wait_ms) / 1000.0,
+                self.max_queue if max_queue is None else max_queue,
+            )
+
+    def submit(self, name: str, payload: Any) -> Future:
+        """Queue a single input and return a future for its result"""
+        try:
+            model_queue = self._queues[name]
+        except KeyError:
+            raise KeyError(f"No model registered under '{name}'") from None
+        return model_queue.submit(payload)
+
+    def run(self, name: str, payload: Any, timeout: Optional[float] = None) -> Any:
+        """Queue a single input and block until its batch has run"""
+        return self.submit(name, payload).result(timeout if timeout is not None else self.timeout)
+
+    def run_many(self, name: str, payloads: Sequence[Any], timeout: Optional[float] = None) -> List[Any]:
+        """Queue several inputs at once so they can share batches"""
+        futures = [self.submit(name, payload) for payload in payloads]
+        wait = timeout if timeout is not None else self.timeout
+        return [future.result(wait) for future in futures]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Batch size, queue wait and queue depth per model"""
+        metrics = {}
+        for name, model_queue in self._queues.items():
+            metrics[name] = model_queue.stats.to_dict()
+            metrics[name]['queue_depth'] = model_queue.depth()
+            metrics[name]['max_batch_size_limit'] = model_queue.max_batch_size
+            metrics[name]['max_wait_ms'] = model_queue.max_wait * 1000
+            metrics[name]['max_queue'] = model_queue.max_queue
+        return metrics
+
+    def shutdown(self, timeout: Optional[float] = 5.0):
+        """Stop all worker threads after draining queued requests"""
+        with self._lock:
+            queues = list(self._queues.values())
+            self._queues.clear()
+        for model_queue in queues:
+            model_queue.stop(timeout)
@@ -0,0 +1,137 @@
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DIRECTIONS = ("out", "in", "both")
+
+# (source id, relationship id, target id, depth, direction)
+Edge = Tuple[int, int, int, int, str]
+
+
+class KnowledgeGraph:
+    """The knowledge base compiled into an indexed, read-only graph
+
+    Entity and relationship names are interned to integer ids; every node
+    has forward and reverse adjacency lists grouped by relationship id.
+    Edges come from an entity's ``relationships`` mapping and from any
+    other attribute whose value (or list of values) names another entity,
+    e.g. ``quality_standards``. Traversals are memoized per query shape.
+    """
+
+    def __init__(self, knowledge_base: Dict[str, Any], cache_size: int = 4096):
+        self.entities: Dict[str, Dict[str, Any]] = knowledge_base.get("entities", {})
+        self.node_names: List[str] = list(self.entities)
+        self.node_ids: Dict[str, int] = {name: i for i, name in enumerate(self.node_names)}
+        self.rel_names: List[str] = []
+        self.rel_ids: Dict[str, int] = {}
+        self.out_edges: List[Dict[int, List[int]]] = [{} for _ in self.node_names]
+        self.in_edges: List[Dict[int, List[int]]] = [{} for _ in self.node_names]
+        self.aliases: Dict[str, int] = {}
+        self.edge_count = 0
+
+        for name, data in self.entities.items():
+            source = self.node_ids[name]
+            for alias in (name, data.get("name"), data.get("scientific_name")):
+                if isinstance(alias, str):
+                    self.aliases.setdefault(alias.lower(), source)
+            for relationship, targets in self._edge_fields(data):
+                for target in targets:
+                    self._add_edge(source, relationship, target)
+
+        self._traverse = lru_cache(maxsize=cache_size)(self._traverse_uncached)
+
+    def _edge_fields(self, data: Dict[str, Any]) -> Iterable[Tuple[str, List[str]]]:
+        fields = list(data.get("relationships", {}).items())
+        fields += [(key, value) for key, value in data.items() if key != "relationships"]
+        for relationship, value in fields:
+            values = value if isinstance(value, list) else [value]
+            targets = [v for v in values if isinstance(v, str) and v in self.node_ids]
+            if targets:
+                yield relationship, targets
+
+    def _intern_relationship(self, relationship: str) -> int:
+        rel_id = self.rel_ids.get(relationship)
+        if rel_id is None:
+            rel_id = self.rel_ids[relationship] = len(self.rel_names)
+            self.rel_names.append(relationship)
+        return rel_id
+
+    def _add_edge(self, source: int, relationship: str, target_name: str):
+        rel_id = self._intern_relationship(relationship)
+        target = self.node_ids[target_name]
+        self.out_edges[source].setdefault(rel_id, []).append(target)
+        self.in_edges[target].setdefault(rel_id, []).append(source)
+        self.edge_count += 1
+
+    def resolve(self, entity: str) -> Optional[int]:
+        """Node id for an entity key, Thai name or scientific name"""
+        node = self.node_ids.get(entity)
+        return node if node is not None else self.aliases.get(entity.lower())
+
+    def _traverse_uncached(self, start: int, rel_filter: Optional[frozenset], max_depth: int,
+                           direction: str, limit: int) -> Tuple[Edge, ...]:
+        edges: List[Edge] = []
+        visited = {start}
+        frontier = deque([(start, 0)])
+        adjacency = []
+        if direction in ("out", "both"):
+            adjacency.append(("out", self.out_edges))
+        if direction in ("in", "both"):
+            adjacency.append(("in", self.in_edges))
+
+        while frontier and len(edges) < limit:
+            node, depth = frontier.popleft()
+            if depth >= max_depth:
+                continue
+            for edge_direction, lists in adjacency:
+                for rel_id, neighbours in lists[node].items():
+                    if rel_filter is not None and rel_id not in rel_filter:
+                        continue
+                    for neighbour in neighbours:
+                        if len(edges) >= limit:
+                            break
+                        if edge_direction == "out":
+                            edges.append((node, rel_id, neighbour, depth + 1, "out"))
+                        else:
+                            edges.append((neighbour, rel_id, node, depth + 1, "in"))
+                        if neighbour not in visited:
+                            visited.add(neighbour)
+                            frontier.append((neighbour, depth + 1))
+        return tuple(edges)
+
+    def traverse(self, entity: str, relationships: Sequence[str] = (), max_depth: int = 1,
+                 direction: str = "out", limit: int = 100) -> Optional[List[Dict[str, Any]]]:
+        """Edges reachable from ``entity`` within ``max_depth`` hops, or None if it is unknown
+
+        An empty ``relationships`` follows every relationship type.
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+        start = self.resolve(entity)
+        if start is None:
+            return None
+        rel_filter = None
+        if relationships:
+            rel_filter = frozenset(self.rel_ids[r] for r in relationships if r in self.rel_ids)
+        edges = self._traverse(start, rel_filter, max_depth, direction, limit)
+        return [
+            {
+                "source": self.node_names[source],
+                "relationship": self.rel_names[rel_id],
+                "target": self.node_names[target],
+                "depth": depth,
+                "direction": edge_direction,
+            }
+            for source, rel_id, target, depth, edge_direction in edges
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        cache = self._traverse.cache_info()
+        return {
+            "nodes": len(self.node_names),
+            "edges": self.edge_count,
+            "relationships": len(self.rel_names),
+            "cache_hits": cache.hits,
+            "cache_misses": cache.misses,
+            "cache_size": cache.currsize,
+        }
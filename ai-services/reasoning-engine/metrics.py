@@ -0,0 +1,132 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+from fastapi import FastAPI, Request, Response
+from starlette.routing import Match
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    PlatformCollector,
+    ProcessCollector,
+    generate_latest,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Dedicated registry so only this service's metrics are scraped
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+PlatformCollector(registry=registry)
+
+REQUEST_LATENCY = Histogram(
+    "gacp_reasoning_http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ["method", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+STAGE_LATENCY = Histogram(
+    "gacp_reasoning_stage_duration_seconds",
+    "Latency of one processing stage (decode, classify, pdf, predict, knowledge, rules)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+IN_FLIGHT = Gauge(
+    "gacp_reasoning_requests_in_flight",
+    "Requests currently being handled",
+    registry=registry,
+)
+EXECUTOR_PENDING = Gauge(
+    "gacp_reasoning_executor_pending",
+    "Model calls admitted to the inference executor (running plus queued)",
+    registry=registry,
+)
+EXECUTOR_QUEUE_WAIT = Histogram(
+    "gacp_reasoning_executor_queue_wait_seconds",
+    "Time a model call waited for an inference worker",
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+REJECTED_REQUESTS = Counter(
+    "gacp_reasoning_rejected_requests_total",
+    "Requests rejected with 503 because the inference executor was full",
+    registry=registry,
+)
+DOCUMENT_BATCH_SIZE = Histogram(
+    "gacp_reasoning_document_batch_size",
+    "Image documents per document classifier forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+    registry=registry,
+)
+EVENT_LOOP_LAG = Histogram(
+    "gacp_reasoning_event_loop_lag_seconds",
+    "How late the event loop woke a sleeping task",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    registry=registry,
+)
+EVENT_LOOP_LAG_LAST = Gauge(
+    "gacp_reasoning_event_loop_lag_last_seconds",
+    "Most recent event loop lag sample",
+    registry=registry,
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as processing stage ``name``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(name).observe(time.perf_counter() - started)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Sample event loop lag forever: anything blocking the loop delays this wake-up"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+
+def _endpoint(request: Request) -> str:
+    # Route template, not the raw path, to keep label cardinality bounded
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    for candidate in request.app.router.routes:
+        match, _ = candidate.matches(request.scope)
+        if match == Match.FULL:
+            return candidate.path
+    return "unmatched"
+
+
+def instrument(app: FastAPI):
+    """Add the latency middleware and the /metrics scrape endpoint to ``app``"""
+
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        started = time.perf_counter()
+        status = 500
+        IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            IN_FLIGHT.dec()
+            REQUEST_LATENCY.labels(request.method, _endpoint(request), str(status)).observe(
+                time.perf_counter() - started
+            )
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
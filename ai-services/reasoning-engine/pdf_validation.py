@@ -0,0 +1,242 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pypdf import PdfReader
+from pypdf.errors import PdfReadError
+
+try:
+    import pytesseract
+    from pdf2image import convert_from_bytes
+except ImportError:  # OCR is optional; text-layer PDFs still validate
+    pytesseract = None
+    convert_from_bytes = None
+
+logger = logging.getLogger("gacp-ai-reasoning.pdf")
+
+# Required fields per PDF document type: (field, pattern, issue reported when missing).
+# Patterns run on lower-cased text with Thai digits mapped to Arabic ones.
+REQUIRED_FIELDS: Dict[str, List[Tuple[str, "re.Pattern", str]]] = {
+    "commercial_registration": [
+        ("company_name",
+         re.compile(r"ชื่อ(ผู้ประกอบ|บริษัท|ห้าง)|บริษัท|ห้างหุ้นส่วน|company\s*name|co\.,?\s*ltd"),
+         "ไม่พบชื่อผู้ประกอบการ"),
+        ("registration_number",
+         re.compile(r"(เลขทะเบียน|ทะเบียนเลขที่|เลขที่ทะเบียน|registration\s*(no\.?|number))\D{0,20}\d[\d\s-]{5,}"),
+         "ไม่พบเลขทะเบียนพาณิชย์"),
+    ],
+    "land_document": [
+        ("title_number",
+         re.compile(r"(โฉนด(ที่ดิน)?|น\.ส\.\s*[34]|title\s*(deed|number|no\.?))\D{0,20}\d+"),
+         "ไม่พบเลขที่โฉนดที่ดิน"),
+        ("land_area",
+         re.compile(r"เนื้อที่|\d+\s*(ไร่|งาน|ตารางวา)|\d+\s*(rai|ngan)|land\s*area"),
+         "ไม่พบข้อมูลเนื้อที่ดิน"),
+    ],
+}
+
+_THAI_DIGITS = str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.translate(_THAI_DIGITS).lower().split())
+
+
+def ocr_page(content: bytes, page_number: int, dpi: int, lang: str) -> str:
+    """Rasterize one page (1-based) and OCR it; runs in the OCR process pool"""
+    images = convert_from_bytes(content, dpi=dpi, first_page=page_number, last_page=page_number)
+    return pytesseract.image_to_string(images[0], lang=lang) if images else ""
+
+
+class PdfValidator:
+    """Field-level PDF validation that reads as few pages as possible
+
+    Pages are parsed lazily. A page's embedded text layer is used when it
+    has one; only pages without usable text are rasterized and OCR'd, in a
+    bounded process pool. Validation stops as soon as every required field
+    has been found. OCR text is cached by document content hash and page.
+    """
+
+    def __init__(self,
+                 ocr_workers: int = 2,
+                 max_pages: int = 20,
+                 ocr_dpi: int = 200,
+                 ocr_lang: str = "tha+eng",
+                 min_text_chars: int = 20,
+                 cache_size: int = 256,
+                 ocr_fn: Callable[[bytes, int, int, str], str] = ocr_page):
+        self.ocr_workers = ocr_workers
+        self.max_pages = max_pages
+        self.ocr_dpi = ocr_dpi
+        self.ocr_lang = ocr_lang
+        self.min_text_chars = min_text_chars
+        self.cache_size = cache_size
+        self.ocr_fn = ocr_fn
+        self._cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stats = {
+            "documents": 0, "text_pages": 0, "ocr_pages": 0,
+            "ocr_cache_hits": 0, "early_exits": 0, "pages_skipped": 0,
+        }
+
+    @property
+    def ocr_available(self) -> bool:
+        return self.ocr_fn is not ocr_page or (pytesseract is not None and convert_from_bytes is not None)
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._stats[name] += value
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned, not forked: forking a process that runs torch threads can deadlock
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.ocr_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _cached_ocr(self, key: Tuple[str, int]) -> Optional[str]:
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                self._stats["ocr_cache_hits"] += 1
+            return text
+
+    def _store_ocr(self, key: Tuple[str, int], text: str):
+        with self._lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _submit_ocr(self, content: bytes, page_number: int) -> Future:
+        if self.ocr_workers > 0:
+            args = (self.ocr_fn, content, page_number, self.ocr_dpi, self.ocr_lang)
+            try:
+                return self._get_pool().submit(*args)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory on a huge page); start a fresh pool
+                self.shutdown()
+                return self._get_pool().submit(*args)
+        # No pool configured: OCR inline on the calling thread
+        future: Future = Future()
+        try:
+            future.set_result(self.ocr_fn(content, page_number, self.ocr_dpi, self.ocr_lang))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _page_texts(self, content: bytes, reader: PdfReader, digest: str) -> Iterator[Tuple[int, str, bool]]:
+        """Yield (page index, text, from OCR) lazily, keeping at most ``ocr_workers`` OCR pages in flight"""
+        in_flight: Dict[Future, int] = {}
+        window = max(1, self.ocr_workers)
+
+        def finished(futures) -> Iterator[Tuple[int, str, bool]]:
+            for future in futures:
+                index = in_flight.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    logger.warning(f"OCR failed for page {index + 1}: {str(e)}")
+                    continue
+                self._store_ocr((digest, index), text)
+                yield index, text, True
+
+        try:
+            for index in range(min(len(reader.pages), self.max_pages)):
+                text = reader.pages[index].extract_text() or ""
+                if len(text.strip()) >= self.min_text_chars or not self.ocr_available:
+                    self._count("text_pages")
+                    yield index, text, False
+                    continue
+
+                cached = self._cached_ocr((digest, index))
+                if cached is not None:
+                    yield index, cached, True
+                    continue
+
+                self._count("ocr_pages")
+                in_flight[self._submit_ocr(content, index + 1)] = index
+                if len(in_flight) >= window:
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    yield from finished(done)
+
+            while in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                yield from finished(done)
+        finally:
+            # Early exit: drop OCR work that has not started yet
+            for future in in_flight:
+                future.cancel()
+
+    def validate(self, content: bytes, doc_type: str) -> Tuple[bool, float, List[str]]:
+        """Return (is_valid, confidence, issues) for a PDF of ``doc_type``"""
+        if content[:4] != b"%PDF":
+            return False, 0.0, ["รูปแบบไฟล์ไม่ถูกต้อง ควรเป็น PDF"]
+
+        self._count("documents")
+        try:
+            reader = PdfReader(io.BytesIO(content))
+            if reader.is_encrypted:
+                return False, 0.0, ["ไฟล์ PDF ถูกเข้ารหัส ไม่สามารถอ่านได้"]
+            total_pages = len(reader.pages)
+        except PdfReadError as e:
+            return False, 0.0, [f"ไฟล์ PDF เสียหายหรืออ่านไม่ได้: {str(e)}"]
+
+        fields = REQUIRED_FIELDS.get(doc_type, [])
+        missing = {name: (pattern, issue) for name, pattern, issue in fields}
+        digest = hashlib.sha256(content).hexdigest()
+        pages_read = 0
+        used_ocr = False
+        has_text = False
+
+        pages = self._page_texts(content, reader, digest)
+        try:
+            for _, text, from_ocr in pages:
+                pages_read += 1
+                used_ocr = used_ocr or from_ocr
+                normalized = _normalize(text)
+                has_text = has_text or bool(normalized)
+                for name in [name for name, (pattern, _) in missing.items() if pattern.search(normalized)]:
+                    del missing[name]
+                if not missing:
+                    break
+        finally:
+            pages.close()
+
+        if pages_read < total_pages:
+            self._count("early_exits")
+            self._count("pages_skipped", total_pages - pages_read)
+
+        issues = [issue for _, issue in missing.values()]
+        if not has_text:
+            issues.insert(0, "ไม่สามารถอ่านข้อความจากเอกสารได้" if self.ocr_available
+                          else "ไม่พบข้อความในเอกสาร และไม่ได้ติดตั้ง OCR")
+
+        is_valid = not issues
+        if is_valid:
+            confidence = 0.85 if used_ocr else 0.95
+        else:
+            found = len(fields) - len(missing)
+            confidence = 0.45 * found / len(fields) if fields else 0.0
+        return is_valid, confidence, issues
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, ocr_cache_entries=len(self._cache))
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
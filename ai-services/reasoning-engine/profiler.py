@@ -0,0 +1,175 @@
+# Thai Herbal GACP Platform v3.0 - Runtime Sampling Profiler
+# ===================================================================
+# On-demand profiling for live workers. A session samples the Python
+# stacks of every thread at a fixed interval and aggregates them into
+# folded stacks ("frame;frame;frame count"), the input format of
+# flamegraph.pl, speedscope and inferno. While a session is running,
+# model calls wrapped in ``model_call`` are also run under
+# torch.profiler to break their time down by operator. With no session
+# active nothing is sampled and ``model_call`` is a shared no-op.
+# ===================================================================
+
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_NO_PROFILE = nullcontext()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profiling session is already running"""
+
+
+def _frame_label(code) -> str:
+    # ';' separates frames and ' ' precedes the count in the folded format
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':').replace(' ', '_')
+
+
+class ProfileSession:
+    """Samples and torch operator totals collected during one profiling run"""
+
+    def __init__(self, duration: float, interval: float, include_torch: bool):
+        self.duration = duration
+        self.interval = interval
+        self.include_torch = include_torch
+        self.started_at = datetime.now().isoformat()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.torch_ops: Dict[str, Dict[str, float]] = {}
+        self.torch_calls = 0
+        self.torch_skipped_calls = 0
+        self._torch_lock = threading.Lock()
+        self._labels: Dict[Any, str] = {}
+
+    def sample(self, ignore_thread_ids: set):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id in ignore_thread_ids:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    label = self._labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}").replace(';', ':').replace(' ', '_'))
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def record_torch(self, model_name: str, key_averages):
+        for event in key_averages:
+            key = f"{model_name};{event.key}".replace(' ', '_')
+            totals = self.torch_ops.setdefault(key, {'calls': 0, 'self_cpu_us': 0.0, 'cpu_us': 0.0})
+            totals['calls'] += event.count
+            totals['self_cpu_us'] += event.self_cpu_time_total
+            totals['cpu_us'] += event.cpu_time_total
+        self.torch_calls += 1
+
+    def folded(self) -> str:
+        """Python stacks in folded format, weighted by sample count"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def torch_folded(self) -> str:
+        """Model operators in folded format (model;op), weighted by self CPU microseconds"""
+        return '\n'.join(
+            f"{key} {int(totals['self_cpu_us'])}"
+            for key, totals in sorted(self.torch_ops.items(), key=lambda item: -item[1]['self_cpu_us'])
+            if totals['self_cpu_us'] >= 1
+        )
+
+    def to_dict(self, top_ops: int = 50) -> Dict[str, Any]:
+        ops = sorted(self.torch_ops.items(), key=lambda item: -item[1]['self_cpu_us'])[:top_ops]
+        return {
+            'started_at': self.started_at,
+            'duration': self.duration,
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'stacks': self.folded(),
+            'torch': {
+                'enabled': self.include_torch,
+                'profiled_calls': self.torch_calls,
+                'skipped_calls': self.torch_skipped_calls,
+                'ops': [{'op': key, **totals} for key, totals in ops],
+                'folded': self.torch_folded()
+            }
+        }
+
+
+class RuntimeProfiler:
+    """Admin-triggered profiler; costs nothing while no session is running"""
+
+    def __init__(self, max_duration: float = 60.0, min_interval: float = 0.001):
+        self.max_duration = max_duration
+        self.min_interval = min_interval
+        self._session: Optional[ProfileSession] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._session is not None
+
+    def profile(self, duration: float, interval: float = 0.005, include_torch: bool = True) -> ProfileSession:
+        """Sample all threads for ``duration`` seconds on the calling thread and return the session"""
+        if not (math.isfinite(duration) and math.isfinite(interval)):
+            # NaN would survive the clamping below and never reach the deadline
+            raise ValueError("duration and interval must be finite numbers")
+        duration = min(max(duration, 0.1), self.max_duration)
+        interval = max(interval, self.min_interval)
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profiling session is already running")
+        try:
+            session = ProfileSession(duration, interval, include_torch)
+            self._session = session
+            logger.info(f"Profiling started for {duration:.1f}s at {interval * 1000:.1f}ms intervals")
+            ignore = {threading.get_ident()}
+            deadline = time.monotonic() + duration
+            next_sample = time.monotonic()
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                if now < next_sample:
+                    time.sleep(min(next_sample, deadline) - now)
+                    continue
+                session.sample(ignore)
+                next_sample += interval
+            logger.info(f"Profiling finished: {session.samples} samples, {session.torch_calls} model calls traced")
+            return session
+        finally:
+            self._session = None
+            self._lock.release()
+
+    def model_call(self, model_name: str):
+        """Context manager for one model invocation; traced by torch.profiler during a session"""
+        session = self._session
+        if session is None or not session.include_torch:
+            return _NO_PROFILE
+        return self._torch_trace(session, model_name)
+
+    @contextmanager
+    def _torch_trace(self, session: ProfileSession, model_name: str):
+        # torch.profiler only sees the thread that starts it and does not
+        # support concurrent sessions, so calls are traced one at a time.
+        if not session._torch_lock.acquire(blocking=False):
+            session.torch_skipped_calls += 1
+            yield
+            return
+        try:
+            from torch.profiler import ProfilerActivity, profile
+            with profile(activities=[ProfilerActivity.CPU]) as prof:
+                yield
+            session.record_torch(model_name, prof.key_averages())
+        finally:
+            session._torch_lock.release()
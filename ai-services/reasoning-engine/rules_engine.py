@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# Below this many readings a plain loop over the compiled rules beats NumPy's per-call overhead
+SCALAR_BATCH_LIMIT = 8
+
+logger = logging.getLogger("gacp-ai-reasoning.rules")
+
+
+class CompiledRules:
+    """Numeric range rules compiled into arrays and evaluated on whole batches
+
+    Every ``rules.<group>.<name>`` entry with a ``min`` and/or ``max``
+    becomes one column of the bound arrays. A batch of readings is one
+    ``(rows, features)`` matrix; all rules are checked with two vectorized
+    comparisons, so the cost per call barely depends on the rule count.
+
+    Optional rule keys: ``feature`` (reading key, default the rule name),
+    ``default`` (value assumed when a reading omits the feature, otherwise
+    the rule is skipped for that reading), and ``below`` / ``above``
+    (recommendation text).
+    """
+
+    def __init__(self, knowledge_base: Dict[str, Any], version: str = ""):
+        self.version = version
+        self.rule_names: List[str] = []
+        self.features: List[str] = []
+        feature_index: Dict[str, int] = {}
+        columns, minimums, maximums = [], [], []
+        self.below_messages: List[str] = []
+        self.above_messages: List[str] = []
+        defaults: Dict[str, float] = {}
+
+        for group, rules in knowledge_base.get("rules", {}).items():
+            for name, spec in rules.items():
+                if not isinstance(spec, dict) or not ({"min", "max"} & spec.keys()):
+                    continue
+                feature = spec.get("feature", name)
+                if feature not in feature_index:
+                    feature_index[feature] = len(self.features)
+                    self.features.append(feature)
+                if "default" in spec:
+                    defaults[feature] = float(spec["default"])
+                self.rule_names.append(f"{group}.{name}")
+                columns.append(feature_index[feature])
+                minimums.append(float(spec.get("min", -np.inf)))
+                maximums.append(float(spec.get("max", np.inf)))
+                self.below_messages.append(spec.get("below", f"{name} ต่ำกว่าเกณฑ์ ({spec.get('min')})"))
+                self.above_messages.append(spec.get("above", f"{name} สูงกว่าเกณฑ์ ({spec.get('max')})"))
+
+        self.feature_index = feature_index
+        self.columns = np.array(columns, dtype=np.intp)
+        self.minimums = np.array(minimums, dtype=np.float64)
+        self.maximums = np.array(maximums, dtype=np.float64)
+        self.defaults = np.array([defaults.get(f, np.nan) for f in self.features], dtype=np.float64)
+        self._scalar_rules = [
+            (self.features[column], float(self.defaults[column]), low, high, below, above)
+            for column, low, high, below, above in zip(
+                columns, minimums, maximums, self.below_messages, self.above_messages
+            )
+        ]
+        self.herb_recommendations: Dict[str, List[str]] = {
+            herb: list(data.get("recommendations", [])) for herb, data in knowledge_base.get("herbs", {}).items()
+        }
+
+    def build_matrix(self, readings: Sequence[Mapping[str, float]]) -> np.ndarray:
+        """Readings in rule feature order; absent features take their default (or NaN)"""
+        count = len(readings)
+        matrix = np.empty((count, len(self.features)), dtype=np.float64)
+        for column, feature in enumerate(self.features):
+            default = self.defaults[column]
+            matrix[:, column] = np.fromiter(
+                (reading.get(feature, default) for reading in readings), dtype=np.float64, count=count
+            )
+        return matrix
+
+    def evaluate(self, matrix: np.ndarray) -> (np.ndarray, np.ndarray):
+        """(below, above) boolean masks of shape (rows, rules); NaN readings never violate"""
+        values = matrix[:, self.columns]
+        return values < self.minimums, values > self.maximums
+
+    def violations(self, readings: Sequence[Mapping[str, float]]) -> List[List[Dict[str, Any]]]:
+        """Per reading, every rule it breaks with the offending value and bound"""
+        matrix = self.build_matrix(readings)
+        below, above = self.evaluate(matrix)
+        results: List[List[Dict[str, Any]]] = [[] for _ in readings]
+        for mask, bounds, messages, kind in (
+            (below, self.minimums, self.below_messages, "below_min"),
+            (above, self.maximums, self.above_messages, "above_max"),
+        ):
+            rows, rules = np.nonzero(mask)
+            values = matrix[rows, self.columns[rules]].tolist()
+            for row, rule, value in zip(rows.tolist(), rules.tolist(), values):
+                results[row].append({
+                    "rule": self.rule_names[rule],
+                    "feature": self.features[self.columns[rule]],
+                    "value": value,
+                    "bound": float(bounds[rule]),
+                    "violation": kind,
+                    "message": messages[rule],
+                })
+        return results
+
+    def recommendations(self, readings: Sequence[Mapping[str, float]],
+                        herbs: Sequence[Sequence[str]], limit: int = 5) -> List[List[str]]:
+        """Rule messages in rule order followed by herb-specific advice, per reading"""
+        if len(readings) < SCALAR_BATCH_LIMIT:
+            return [self._scalar_recommendations(reading, herb_names, limit)
+                    for reading, herb_names in zip(readings, herbs)]
+        below, above = self.evaluate(self.build_matrix(readings))
+        results: List[List[str]] = [[] for _ in readings]
+        # Only violating (row, rule) pairs reach Python; nonzero yields them row by row, in rule order
+        rows, rules = np.nonzero(below | above)
+        for row, rule, is_below in zip(rows.tolist(), rules.tolist(), below[rows, rules].tolist()):
+            results[row].append(self.below_messages[rule] if is_below else self.above_messages[rule])
+        for recs, herb_names in zip(results, herbs):
+            for herb in herb_names:
+                recs.extend(self.herb_recommendations.get(herb, ()))
+            del recs[limit:]
+        return results
+
+    def _scalar_recommendations(self, reading: Mapping[str, float], herbs: Sequence[str],
+                                limit: int) -> List[str]:
+        recs = []
+        for feature, default, low, high, below, above in self._scalar_rules:
+            value = reading.get(feature, default)
+            if value < low:
+                recs.append(below)
+            elif value > high:
+                recs.append(above)
+        for herb in herbs:
+            recs.extend(self.herb_recommendations.get(herb, ()))
+        return recs[:limit]
+
+    def info(self) -> Dict[str, Any]:
+        return {"version": self.version, "rules": self.rule_names, "features": self.features}
+
+
+class RulesEngine:
+    """Compiled rules for a JSON file, recompiled when the file changes
+
+    ``current`` stats the file at most every ``check_interval`` seconds and
+    swaps in a new ``CompiledRules`` only after the whole file has parsed
+    and compiled, so readers always see a complete rule set. A file that
+    fails to load (e.g. caught mid-write) leaves the previous rules active.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0,
+                 on_reload: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.path = path
+        self.check_interval = check_interval
+        self.on_reload = on_reload
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.knowledge_base, self._signature, version = self._read()
+        self._rules = CompiledRules(self.knowledge_base, version)
+
+    def _read(self):
+        stat = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        knowledge_base = json.loads(raw.decode("utf-8"))
+        return knowledge_base, (stat.st_mtime_ns, stat.st_size), hashlib.sha256(raw).hexdigest()[:12]
+
+    @property
+    def current(self) -> CompiledRules:
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.reload()
+        return self._rules
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile if the file changed (``force`` skips the stat check); True when new rules were installed"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+                if not force and (stat.st_mtime_ns, stat.st_size) == self._signature:
+                    return False
+                knowledge_base, signature, version = self._read()
+                self._signature = signature
+                if version == self._rules.version:
+                    return False
+                rules = CompiledRules(knowledge_base, version)
+                if self.on_reload is not None:
+                    self.on_reload(knowledge_base)
+            except Exception as e:
+                self.failed_reloads += 1
+                logger.error(f"Keeping rules {self._rules.version}: failed to reload {self.path}: {str(e)}")
+                return False
+            previous, self._rules = self._rules, rules
+            self.knowledge_base = knowledge_base
+            self.reloads += 1
+            logger.info(f"Rules reloaded: {previous.version} -> {rules.version}")
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self._rules.version,
+            "rules": len(self._rules.rule_names),
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+        }
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import metrics
+from executor import InferenceExecutor, OverloadedError
+
+
+def test_work_runs_off_the_event_loop_thread():
+    executor = InferenceExecutor(max_workers=2, max_queue=0)
+
+    async def main():
+        return await executor.run(lambda: threading.current_thread().name)
+
+    assert asyncio.run(main()).startswith("inference")
+    assert executor.pending == 0
+
+
+def test_rejects_calls_beyond_capacity_and_frees_slots():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        second = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        assert executor.pending == 2 and executor.queued == 1
+        with pytest.raises(OverloadedError):
+            await executor.run(time.sleep, 0)
+        release.set()
+        await asyncio.gather(first, second)
+        return await executor.run(lambda: "admitted again")
+
+    assert asyncio.run(main()) == "admitted again"
+    assert executor.pending == 0
+
+
+def test_event_loop_lag_is_observed_when_the_loop_blocks():
+    async def main():
+        monitor = asyncio.create_task(metrics.monitor_event_loop_lag(0.01))
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # blocking call on the loop
+        await asyncio.sleep(0.02)
+        monitor.cancel()
+
+    asyncio.run(main())
+    assert metrics.EVENT_LOOP_LAG.collect()[0].samples
+    lag_sum = [s.value for s in metrics.EVENT_LOOP_LAG.collect()[0].samples if s.name.endswith("_sum")][0]
+    assert lag_sum >= 0.05
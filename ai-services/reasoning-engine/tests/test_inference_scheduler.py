@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+
+from inference_scheduler import InferenceScheduler, QueueFullError
+
+
+def test_documents_from_concurrent_requests_share_a_batch():
+    # Mirrors /validate-documents: each request fans out over its files with a
+    # bounded semaphore and awaits the classifier through the scheduler
+    batch_sizes = []
+
+    def classify(tensors):
+        batch_sizes.append(len(tensors))
+        return [(tensor, 0.9) for tensor in tensors]
+
+    scheduler = InferenceScheduler(max_batch_size=16, max_wait_ms=100, max_queue=64)
+    scheduler.register("document_classifier", classify)
+
+    async def request(files, concurrency):
+        fan_out = asyncio.Semaphore(concurrency)
+
+        async def validate(file):
+            async with fan_out:
+                return await asyncio.wrap_future(scheduler.submit("document_classifier", file))
+
+        return await asyncio.gather(*(validate(file) for file in files))
+
+    async def main():
+        return await asyncio.gather(request([1, 2, 3], 2), request([4, 5], 2), request([6], 2))
+
+    results = asyncio.run(main())
+    scheduler.shutdown()
+
+    assert [[label for label, _ in result] for result in results] == [[1, 2, 3], [4, 5], [6]]
+    assert sum(batch_sizes) == 6
+    # The first batch collects the first file of every request
+    assert batch_sizes[0] >= 3
+
+
+def test_full_queue_rejects_instead_of_growing():
+    started, release = threading.Event(), threading.Event()
+
+    def blocked(batch):
+        started.set()
+        release.wait(5)
+        return batch
+
+    scheduler = InferenceScheduler(max_batch_size=1, max_wait_ms=0, max_queue=2)
+    scheduler.register("document_classifier", blocked)
+
+    running = scheduler.submit("document_classifier", 0)
+    assert started.wait(5)
+    queued = [scheduler.submit("document_classifier", i) for i in (1, 2)]
+    with pytest.raises(QueueFullError):
+        scheduler.submit("document_classifier", 3)
+
+    release.set()
+    assert [future.result(5) for future in [running] + queued] == [0, 1, 2]
+    assert scheduler.get_metrics()["document_classifier"]["max_queue"] == 2
+    scheduler.shutdown()
@@ -0,0 +1,51 @@
+import json
+import os
+
+from knowledge_graph import KnowledgeGraph
+
+KNOWLEDGE_BASE = os.path.join(os.path.dirname(__file__), "..", "knowledge", "gacp_rules.json")
+
+
+def load_graph(**kwargs):
+    with open(KNOWLEDGE_BASE, encoding="utf-8") as f:
+        return KnowledgeGraph(json.load(f), **kwargs)
+
+
+def test_two_hops_reach_required_documents_through_quality_standards():
+    graph = load_graph()
+
+    edges = graph.traverse("andrographis", ["quality_standards", "requires_document"], max_depth=2)
+
+    assert {(e["source"], e["target"]) for e in edges if e["depth"] == 1} == {
+        ("andrographis", "THP 1/2023"), ("andrographis", "GACP-TH 2023")
+    }
+    documents = {e["target"] for e in edges if e["relationship"] == "requires_document"}
+    assert documents == {"commercial_registration", "land_document", "farm_map", "soil_test_report"}
+    assert all(e["depth"] == 2 for e in edges if e["relationship"] == "requires_document")
+
+
+def test_reverse_edges_and_aliases():
+    graph = load_graph()
+
+    herbs = graph.traverse("โรคเหง้าเน่า", ["susceptible_to"], direction="in")
+    assert {e["source"] for e in herbs} == {"curcuma", "ginger", "turmeric"}
+    assert graph.traverse("Zingiber officinale")[0]["source"] == "ginger"
+    assert graph.traverse("unknown herb") is None
+
+
+def test_depth_and_limit_bound_the_traversal():
+    graph = load_graph()
+
+    assert all(e["depth"] == 1 for e in graph.traverse("ginger", max_depth=1))
+    assert len(graph.traverse("ginger", max_depth=3, limit=4)) == 4
+
+
+def test_repeated_query_shapes_are_memoized():
+    graph = load_graph(cache_size=16)
+
+    graph.traverse("turmeric", ["quality_standards"], max_depth=2)
+    graph.traverse("turmeric", ["quality_standards"], max_depth=2)
+    graph.traverse("ขมิ้น", ["quality_standards"], max_depth=2)
+
+    assert graph.stats()["cache_misses"] == 1
+    assert graph.stats()["cache_hits"] == 2
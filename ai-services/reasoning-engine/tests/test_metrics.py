@@ -0,0 +1,24 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import metrics
+
+
+def test_latency_is_labelled_by_route_template():
+    app = FastAPI()
+    metrics.instrument(app)
+
+    @app.get("/entities/{name}")
+    def entity(name: str):
+        with metrics.stage("knowledge"):
+            return {"name": name}
+
+    client = TestClient(app)
+    client.get("/entities/ginger")
+    client.get("/entities/turmeric")
+    client.get("/missing")
+    text = client.get("/metrics").text
+
+    assert 'endpoint="/entities/{name}",method="GET",status="200"} 2.0' in text
+    assert 'endpoint="unmatched",method="GET",status="404"} 1.0' in text
+    assert 'gacp_reasoning_stage_duration_seconds_count{stage="knowledge"} 2.0' in text
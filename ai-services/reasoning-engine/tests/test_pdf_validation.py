@@ -0,0 +1,92 @@
+import io
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+from pdf_validation import PdfValidator
+
+
+def make_pdf(page_texts):
+    """Minimal PDF; a None entry is a page without a text layer (a scan)"""
+    count = len(page_texts)
+    font_id = 3 + 2 * count
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(count))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {count} >>".encode())
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 11 Tf 72 720 Td ({text}) Tj ET".encode("latin-1") if text else b""
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    out.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+class FakeOcr:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def __call__(self, content, page_number, dpi, lang):
+        self.calls.append(page_number)
+        return self.pages.get(page_number, "")
+
+
+def test_text_layer_validates_and_stops_at_first_complete_page():
+    ocr = FakeOcr({})
+    validator = PdfValidator(ocr_workers=0, ocr_fn=ocr)
+    pdf = make_pdf([
+        "Land title deed. Title number 12345. Land area 5 rai 2 ngan.",
+        None,
+        "Appendix with survey notes and signatures.",
+    ])
+
+    is_valid, confidence, issues = validator.validate(pdf, "land_document")
+
+    assert (is_valid, confidence, issues) == (True, 0.95, [])
+    assert ocr.calls == []
+    assert validator.stats()["early_exits"] == 1
+    assert validator.stats()["pages_skipped"] == 2
+
+
+def test_scanned_pages_are_ocrd_and_cached_by_content():
+    ocr = FakeOcr({2: "Company name: Thai Herbal Farm Co., Ltd.  Registration No. 0105561234567"})
+    validator = PdfValidator(ocr_workers=0, ocr_fn=ocr)
+    pdf = make_pdf([None, None])
+
+    assert validator.validate(pdf, "commercial_registration") == (True, 0.85, [])
+    assert validator.validate(pdf, "commercial_registration") == (True, 0.85, [])
+
+    assert ocr.calls == [1, 2]
+    assert validator.stats()["ocr_cache_hits"] == 2
+
+
+def test_missing_fields_are_reported_individually():
+    validator = PdfValidator(ocr_workers=0, ocr_fn=FakeOcr({}))
+    pdf = make_pdf(["Commercial registration certificate for Thai Herbal Farm Co., Ltd."])
+
+    is_valid, confidence, issues = validator.validate(pdf, "commercial_registration")
+
+    assert not is_valid
+    assert issues == ["ไม่พบเลขทะเบียนพาณิชย์"]
+    assert 0 < confidence < 0.45
+
+
+def test_rejects_non_pdf_and_corrupt_files():
+    validator = PdfValidator(ocr_workers=0, ocr_fn=FakeOcr({}))
+    assert validator.validate(b"GIF89a", "land_document")[0] is False
+    assert validator.validate(b"%PDF-1.4 truncated", "land_document")[0] is False
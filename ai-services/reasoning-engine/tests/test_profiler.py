@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+from profiler import ProfilerBusyError, RuntimeProfiler
+
+
+def test_session_samples_other_threads():
+    profiler = RuntimeProfiler()
+    stop = threading.Event()
+    worker = threading.Thread(target=lambda: [sum(range(1000)) for _ in iter(stop.is_set, True)], name="inference")
+    worker.start()
+    try:
+        session = profiler.profile(0.2, interval=0.002, include_torch=False)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert session.samples > 10
+    assert any(line.startswith("inference;") for line in session.folded().splitlines())
+    assert not profiler.active
+
+
+@pytest.mark.parametrize("duration, interval", [(float("nan"), 0.005), (float("inf"), 0.005), (0.1, float("nan"))])
+def test_non_finite_durations_are_rejected_without_holding_the_lock(duration, interval):
+    profiler = RuntimeProfiler(max_duration=1)
+
+    with pytest.raises(ValueError):
+        profiler.profile(duration, interval, include_torch=False)
+
+    assert profiler.profile(0.1, include_torch=False).samples > 0
+
+
+def test_only_one_session_at_a_time():
+    profiler = RuntimeProfiler()
+    started = threading.Event()
+    thread = threading.Thread(target=lambda: (started.set(), profiler.profile(0.3, include_torch=False)))
+    thread.start()
+    started.wait()
+    time.sleep(0.05)
+    with pytest.raises(ProfilerBusyError):
+        profiler.profile(0.1)
+    thread.join()
@@ -0,0 +1,79 @@
+import json
+import os
+
+from rules_engine import SCALAR_BATCH_LIMIT, CompiledRules, RulesEngine
+
+KNOWLEDGE_BASE = {
+    "herbs": {"ginger": {"recommendations": ["ใช้หัวพันธุ์ที่ปลอดโรค"]}},
+    "rules": {
+        "cultivation": {
+            "soil_moisture": {"min": 0.3, "max": 0.7, "below": "too dry", "above": "too wet"},
+            "temperature": {"min": 20, "below": "too cold"},
+        },
+        "soil_test": {
+            "pH": {"min": 5.5, "max": 7.0, "feature": "soil_ph"},
+        },
+    },
+}
+
+
+def write_rules(path, knowledge_base):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(knowledge_base, f)
+    os.replace(tmp, path)
+
+
+def test_batch_and_small_call_paths_agree():
+    rules = CompiledRules(KNOWLEDGE_BASE)
+    readings = [
+        {"soil_moisture": 0.2, "temperature": 18},
+        {"soil_moisture": 0.9, "soil_ph": 8.0},
+        {"soil_moisture": 0.5},
+        {},
+    ] * SCALAR_BATCH_LIMIT
+    herbs = [["ginger"], [], ["unknown"], ["ginger"]] * SCALAR_BATCH_LIMIT
+
+    batch = rules.recommendations(readings, herbs)
+    single = [rules.recommendations([r], [h])[0] for r, h in zip(readings, herbs)]
+
+    assert batch == single
+    assert batch[:4] == [
+        ["too dry", "too cold", "ใช้หัวพันธุ์ที่ปลอดโรค"],
+        ["too wet", "pH สูงกว่าเกณฑ์ (7.0)"],
+        [],
+        ["ใช้หัวพันธุ์ที่ปลอดโรค"],
+    ]
+
+
+def test_violations_report_value_and_bound():
+    rules = CompiledRules(KNOWLEDGE_BASE)
+
+    found = rules.violations([{"soil_ph": 5.0, "temperature": 25}, {"soil_ph": 6.0}])
+
+    assert found[1] == []
+    assert found[0] == [{
+        "rule": "soil_test.pH", "feature": "soil_ph", "value": 5.0, "bound": 5.5,
+        "violation": "below_min", "message": "pH ต่ำกว่าเกณฑ์ (5.5)",
+    }]
+
+
+def test_file_changes_are_picked_up_and_broken_files_ignored(tmp_path):
+    path = str(tmp_path / "gacp_rules.json")
+    write_rules(path, KNOWLEDGE_BASE)
+    reloaded = []
+    engine = RulesEngine(path, check_interval=0, on_reload=reloaded.append)
+    first = engine.current.version
+
+    stricter = json.loads(json.dumps(KNOWLEDGE_BASE))
+    stricter["rules"]["cultivation"]["temperature"]["min"] = 26
+    write_rules(path, stricter)
+    assert engine.current.recommendations([{"temperature": 25}], [[]]) == [["too cold"]]
+    assert engine.current.version != first
+    assert reloaded == [stricter]
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"rules": ')
+    assert engine.current.recommendations([{"temperature": 25}], [[]]) == [["too cold"]]
+    assert engine.stats()["failed_reloads"] == 1
+    assert engine.stats()["reloads"] == 1
@@ -0,0 +1,95 @@
+import warnings
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+ensemble = pytest.importorskip("sklearn.ensemble")
+linear_model = pytest.importorskip("sklearn.linear_model")
+
+from yield_model import DEFAULT_FEATURES, YieldFeatureSchema, YieldPredictor
+
+COLUMNS = ["soil_moisture", "temperature", "herb_ginger", "herb_turmeric"]
+
+
+def training_frame():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "soil_moisture": rng.uniform(0.1, 0.9, 200),
+        "temperature": rng.uniform(18, 35, 200),
+        "herb_ginger": rng.integers(0, 2, 200),
+        "herb_turmeric": rng.integers(0, 2, 200),
+    })
+    target = frame["soil_moisture"] * 10 + frame["herb_ginger"] * 3 + rng.normal(0, 0.1, 200)
+    return frame, target
+
+
+def test_rows_follow_the_fitted_column_order():
+    frame, target = training_frame()
+    model = ensemble.RandomForestRegressor(n_estimators=20, random_state=0).fit(frame, target)
+    predictor = YieldPredictor(model, YieldFeatureSchema.from_model(model, herbs=[]))
+
+    rows = [
+        ({"temperature": 30.0, "soil_moisture": 0.6}, ["ginger"]),
+        ({"soil_moisture": 0.2, "temperature": 22.0, "wind": 3.0}, ["lemongrass"]),
+    ]
+    predictions, confidences, reports = predictor.predict(rows)
+
+    expected = model.predict(pd.DataFrame(
+        [[0.6, 30.0, 1, 0], [0.2, 22.0, 0, 0]], columns=COLUMNS
+    ))
+    np.testing.assert_allclose(predictions, expected)
+    assert predictor.confidence_source == "ensemble_agreement"
+    assert np.all((confidences > 0) & (confidences <= 1))
+    assert reports[0].unknown_features == [] and reports[0].missing_features == []
+    assert reports[1].unknown_features == ["wind", "herb_lemongrass"]
+
+
+def test_missing_features_are_filled_and_reported():
+    frame, target = training_frame()
+    model = linear_model.LinearRegression().fit(frame, target)
+    predictor = YieldPredictor(model, YieldFeatureSchema.from_model(model, herbs=[]), default_confidence=0.8)
+
+    predictions, confidences, reports = predictor.predict([({"temperature": 25.0}, ["turmeric"])])
+
+    assert reports[0].missing_features == ["soil_moisture"]
+    assert confidences.tolist() == [0.8]
+    assert predictions.shape == (1,)
+
+
+def test_unnamed_models_use_the_default_schema():
+    class Plain:
+        def predict(self, matrix):
+            return matrix.sum(axis=1)
+
+    schema = YieldFeatureSchema.from_model(Plain(), herbs=["ginger"])
+    assert schema.feature_names == DEFAULT_FEATURES + ["herb_ginger"]
+    matrix, _ = schema.build_matrix([({"rainfall": 2.0}, ["ginger"])])
+    assert matrix.tolist() == [[0, 0, 2.0, 0, 0, 0, 1.0]]
+
+
+@pytest.mark.parametrize("make_model", [
+    lambda: ensemble.RandomForestRegressor(n_estimators=5, random_state=0),
+    lambda: linear_model.LinearRegression(),
+])
+def test_named_models_get_their_column_names(make_model):
+    frame, target = training_frame()
+    model = make_model().fit(frame, target)
+    predictor = YieldPredictor(model, YieldFeatureSchema.from_model(model, herbs=[]))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        predictions, _, _ = predictor.predict([({"temperature": 30.0, "soil_moisture": 0.6}, ["ginger"])])
+
+    assert predictions.shape == (1,)
+
+
+def test_empty_batch_predicts_nothing():
+    frame, target = training_frame()
+    model = linear_model.LinearRegression().fit(frame, target)
+    predictor = YieldPredictor(model, YieldFeatureSchema.from_model(model, herbs=[]))
+
+    predictions, confidences, reports = predictor.predict([])
+
+    assert predictions.shape == confidences.shape == (0,)
+    assert reports == []
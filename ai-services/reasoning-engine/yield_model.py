@@ -0,0 +1,130 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+HERB_PREFIX = "herb_"
+
+# Used when the model was not fitted on a DataFrame and so carries no column names
+DEFAULT_FEATURES = ["soil_moisture", "temperature", "rainfall", "humidity", "soil_ph", "sunlight_hours"]
+
+
+@dataclass
+class FeatureReport:
+    """Input keys of one row that did not line up with the model's schema"""
+    missing_features: List[str] = field(default_factory=list)
+    unknown_features: List[str] = field(default_factory=list)
+
+
+class YieldFeatureSchema:
+    """The yield model's fixed column order, with ``herb_<name>`` one-hot columns"""
+
+    def __init__(self, feature_names: Sequence[str], fill_value: float = 0.0):
+        self.feature_names = [str(name) for name in feature_names]
+        self.fill_value = fill_value
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+        self.numeric_features = [name for name in self.feature_names if not name.startswith(HERB_PREFIX)]
+        self.herb_index = {
+            name[len(HERB_PREFIX):]: i for i, name in enumerate(self.feature_names) if name.startswith(HERB_PREFIX)
+        }
+
+    @classmethod
+    def from_model(cls, model: Any, herbs: Sequence[str], fill_value: float = 0.0) -> "YieldFeatureSchema":
+        """Use the columns the model was fitted on, else DEFAULT_FEATURES plus one-hot herbs"""
+        names = getattr(model, "feature_names_in_", None)
+        if names is None:
+            names = DEFAULT_FEATURES + [f"{HERB_PREFIX}{herb}" for herb in herbs]
+        return cls(list(names), fill_value)
+
+    def build_matrix(self, rows: Sequence[Tuple[Mapping[str, float], Sequence[str]]]
+                     ) -> Tuple[np.ndarray, List[FeatureReport]]:
+        """Fill one preallocated matrix from (features, herb names) rows"""
+        matrix = np.full((len(rows), len(self.feature_names)), self.fill_value, dtype=np.float64)
+        reports = []
+        for row, (features, herbs) in enumerate(rows):
+            report = FeatureReport()
+            for name, value in features.items():
+                column = self.index.get(name)
+                if column is None or name.startswith(HERB_PREFIX):
+                    report.unknown_features.append(name)
+                else:
+                    matrix[row, column] = value
+            for herb in herbs:
+                column = self.herb_index.get(herb)
+                if column is None:
+                    report.unknown_features.append(f"{HERB_PREFIX}{herb}")
+                else:
+                    matrix[row, column] = 1.0
+            report.missing_features = [name for name in self.numeric_features if name not in features]
+            reports.append(report)
+        return matrix, reports
+
+
+class YieldPredictor:
+    """Batch yield prediction with per-row confidence derived from the model
+
+    - Classifiers: the winning class probability.
+    - Bagged ensembles (random forest, extra trees, bagging): agreement
+      between member estimators, ``1 / (1 + std / |mean|)``.
+    - Anything else: ``default_confidence``.
+    """
+
+    def __init__(self, model: Any, schema: YieldFeatureSchema, default_confidence: float = 0.85):
+        self.model = model
+        self.schema = schema
+        self.default_confidence = default_confidence
+        self.confidence_source = self._confidence_source()
+        # Fitted on a DataFrame: sklearn checks the column names of every input
+        self.named_features = getattr(model, "feature_names_in_", None) is not None
+
+    def _model_input(self, matrix: np.ndarray) -> Any:
+        """The matrix as the model was fitted on it: a DataFrame with the schema's columns, or the array"""
+        if not self.named_features:
+            return matrix
+        return pd.DataFrame(matrix, columns=self.schema.feature_names, copy=False)
+
+    def _final_estimator(self) -> Tuple[Any, Optional[Any]]:
+        # sklearn Pipeline: the last step predicts, the rest transform
+        if hasattr(self.model, "steps"):
+            return self.model.steps[-1][1], self.model[:-1]
+        return self.model, None
+
+    def _confidence_source(self) -> str:
+        estimator, _ = self._final_estimator()
+        if hasattr(estimator, "predict_proba"):
+            return "probability"
+        if isinstance(getattr(estimator, "estimators_", None), list):
+            return "ensemble_agreement"
+        return "default"
+
+    def confidence(self, matrix: np.ndarray, predictions: np.ndarray) -> np.ndarray:
+        if self.confidence_source == "default":
+            return np.full(len(matrix), self.default_confidence)
+        estimator, transform = self._final_estimator()
+        features = self._model_input(matrix)
+        if transform is not None:
+            features = transform.transform(features)
+        if self.confidence_source == "probability":
+            return estimator.predict_proba(features).max(axis=1)
+        # Ensemble members are fitted on plain arrays, without column names
+        features = np.asarray(features)
+        members = np.stack([member.predict(features) for member in estimator.estimators_])
+        spread = members.std(axis=0) / np.maximum(np.abs(members.mean(axis=0)), 1e-9)
+        return 1.0 / (1.0 + spread)
+
+    def predict(self, rows: Sequence[Tuple[Mapping[str, float], Sequence[str]]]
+                ) -> Tuple[np.ndarray, np.ndarray, List[FeatureReport]]:
+        """One model call for all rows -> (predictions, confidences, per-row feature reports)"""
+        if not rows:
+            return np.empty(0), np.empty(0), []
+        matrix, reports = self.schema.build_matrix(rows)
+        predictions = np.asarray(self.model.predict(self._model_input(matrix)), dtype=np.float64)
+        predictions = predictions.reshape(len(rows), -1)[:, 0]
+        return predictions, self.confidence(matrix, predictions), reports
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "feature_order": self.schema.feature_names,
+            "confidence_source": self.confidence_source,
+        }
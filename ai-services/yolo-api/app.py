@@ -57,8 +57,8 @@ def create_app():
     # Initialize models
     try:
         logger.info("🤖 Loading AI models...")
-        model_manager.load_models()
-        logger.info("✅ AI models loaded successfully")
+        load_models()
+        logger.info("✅ AI models ready")
     except Exception as e:
         logger.error(f"❌ Failed to load models: {str(e)}")
         # Continue with demo mode
@@ -71,6 +71,10 @@ def create_app():
     except Exception as e:
         logger.error(f"❌ Image processor initialization failed: {str(e)}")
     
+    # Start background job workers
+    job_workers.start()
+    logger.info("✅ Analysis job workers started")
+    
     return app
 
 # ===================================================================
@@ -109,24 +113,16 @@ if __name__ == '__main__':
 def validate_image_format(image_data: bytes) -> bool:
     """Validate image format and integrity"""
     try:
-        image = Image.open(io.BytesIO(image_data))
-        image.verify()
+        decode_image(image_data, max_side=IMAGE_MAX_SIDE)
         return True
-    except Exception:
+    except ImageIngestError:
         return False
 
 def get_image_metadata(image_data: bytes) -> Dict[str, Any]:
-    """Extract image metadata"""
+    """Extract image metadata (header only, pixels are not decoded)"""
     try:
-        image = Image.open(io.BytesIO(image_data))
-        return {
-            'format': image.format,
-            'mode': image.mode,
-            'size': image.size,
-            'has_transparency': image.mode in ('RGBA', 'LA'),
-            'dpi': image.info.get('dpi', (72, 72))
-        }
-    except Exception as e:
+        return read_image_metadata(image_data)
+    except ImageIngestError as e:
         logger.error(f"Failed to extract image metadata: {str(e)}")
         return {}
 
@@ -160,14 +156,15 @@ def monitor_performance(func):
     """Decorator to monitor function performance"""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             result = func(*args, **kwargs)
-            execution_time = time.time() - start_time
-            logger.info(f"Function {func.__name__} executed in {execution_time:.3f}s")
+            execution_time = time.perf_counter() - start_time
+            metrics.observe_stage(func.__name__, execution_time)
+            logger.debug(f"Function {func.__name__} executed in {execution_time:.3f}s")
             return result
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             logger.error(f"Function {func.__name__} failed after {execution_time:.3f}s: {str(e)}")
             raise
     return wrapper
@@ -351,26 +348,28 @@ kubectl apply -f k8s/yolo-api-ingress.yaml
 # ===================================================================
 
 import os
-import io
 import json
 import logging
+import hmac
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 
 import cv2
 import numpy as np
+import psutil
 import torch
-from PIL import Image
 import albumentations as A
 from ultralytics import YOLO
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, has_request_context, request, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_restx import Api, Resource, fields
 from werkzeug.utils import secure_filename
-from werkzeug.exceptions import BadRequest, InternalServerError
+from werkzeug.exceptions import BadRequest, Forbidden, InternalServerError, RequestEntityTooLarge
 
 # Custom modules
 from utils.image_processor import ImageProcessor
@@ -379,6 +378,22 @@ from utils.thai_herb_classifier import ThaiHerbClassifier
 from utils.quality_assessor import QualityAssessor
 from utils.digital_signature import DigitalSigner
 from utils.response_formatter import ResponseFormatter
+from utils.inference_scheduler import InferenceScheduler
+from utils.batch_pipeline import BatchPipeline, UploadPayload
+from utils.job_queue import JobStore, JobWorkerPool
+from utils.result_cache import ResultCache
+from utils.image_ingest import ImageIngestError, decode_image, read_image_metadata
+from utils.upload_ingest import SpooledUpload, SpoolingRequest, decode_base64_to_upload
+from utils.inference_backend import BackendRegistry
+from utils.model_pool import DISEASE_KEY_PREFIX, ModelPool, disease_model_key, load_torch_model
+from utils.model_slots import ModelSlot, ModelSlots, batch_by_slot
+from utils.stage_graph import Stage, StageGraph, StageTimeoutError
+from utils.metrics import ServiceMetrics, stats_values
+from utils.profiler import ProfilerBusyError, RuntimeProfiler
+from utils.detection_postprocess import (
+    DETECTION_FORMAT_COLUMNAR, DETECTION_FORMAT_OBJECTS, DETECTION_FORMATS,
+    DetectionColumns, class_name_table, results_to_columns
+)
 from config.settings import Settings
 from models.herb_models import HerbPrediction, QualityAssessment, DetectionResult
 
@@ -390,6 +405,27 @@ from models.herb_models import HerbPrediction, QualityAssessment, DetectionResul
 app = Flask(__name__)
 app.config.from_object(Settings)
 
+# Stream uploads into spool files under a per-request memory budget
+class UploadRequest(SpoolingRequest):
+    spool_threshold = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', 1024 * 1024))
+    memory_budget = int(os.getenv('UPLOAD_MEMORY_BUDGET', 8 * 1024 * 1024))
+    # Below waitress's 50MB max_request_body_size, so it applies to every JSON body
+    json_body_limit = int(os.getenv('UPLOAD_JSON_BODY_LIMIT', memory_budget))
+    spool_dir = os.getenv('UPLOAD_SPOOL_DIR', 'temp/uploads')
+
+app.request_class = UploadRequest
+
+@app.after_request
+def report_upload_buffering(response):
+    """Report how many upload bytes the request held in RAM and on disk"""
+    stats = request.upload_stats()
+    if stats is not None:
+        response.headers['X-Upload-Memory-Bytes'] = str(stats['peak_memory_bytes'])
+        response.headers['X-Upload-Spooled-Bytes'] = str(stats['spooled_bytes'])
+        logger.debug(f"Request {request.path} buffered {stats['peak_memory_bytes']}B in memory, "
+                     f"spooled {stats['spooled_bytes']}B to disk")
+    return response
+
 # Setup CORS
 CORS(app, resources={
     r"/api/*": {
@@ -425,13 +461,290 @@ logger = logging.getLogger(__name__)
 # ===================================================================
 
 # Initialize services
-model_manager = ModelManager()
 image_processor = ImageProcessor()
-herb_classifier = ThaiHerbClassifier()
-quality_assessor = QualityAssessor()
 digital_signer = DigitalSigner()
 response_formatter = ResponseFormatter()
 
+# On-demand stack sampling / torch.profiler sessions (admin only)
+runtime_profiler = RuntimeProfiler(max_duration=float(os.getenv('PROFILER_MAX_SECONDS', 60)))
+
+# Optimized CPU execution backends (eager / TorchScript / ONNX Runtime),
+# one registry per model version
+def create_backend_registry() -> BackendRegistry:
+    return BackendRegistry(
+        backend=os.getenv('INFERENCE_BACKEND', 'eager'),
+        precision=os.getenv('INFERENCE_PRECISION', 'fp32'),
+        export_dir=os.getenv('INFERENCE_EXPORT_DIR', 'models/optimized'),
+        threads=int(os.getenv('INFERENCE_THREADS', 0)) or None,
+        inter_op_threads=int(os.getenv('INFERENCE_INTEROP_THREADS', 0)) or None
+    )
+
+OPTIMIZED_MODELS = [
+    name.strip() for name in os.getenv('INFERENCE_BACKEND_MODELS', 'object_detection').split(',') if name.strip()
+]
+INFERENCE_EXAMPLE_SHAPE = tuple(int(d) for d in os.getenv('INFERENCE_EXAMPLE_SHAPE', '1,3,224,224').split(','))
+
+def load_inference_backend(resources: Dict[str, Any], name: str, model: Any) -> Any:
+    """Export (if needed), load and warm up the configured backend for ``model``"""
+    backends = resources['backends']
+    try:
+        return backends.load(
+            name,
+            model,
+            example_input=np.zeros(INFERENCE_EXAMPLE_SHAPE, dtype=np.float32),
+            version=(resources['manager'].get_model_versions() or {}).get(name)
+        )
+    except Exception as e:
+        logger.error(f"❌ Failed to load {backends.backend} backend for {name}, using eager model: {str(e)}")
+        return model
+
+# Models are loaded at startup unless MODEL_LAZY_LOADING is set; per-herb
+# disease models are always loaded on first use and evicted least-recently-used
+# first when the pool exceeds its memory ceiling. They are read from
+# DISEASE_MODEL_DIR/<herb>.pt by the pool alone, so evicting one frees it.
+MODEL_LAZY_LOADING = os.getenv('MODEL_LAZY_LOADING', 'false').lower() == 'true'
+DISEASE_MODEL_DIR = os.getenv('DISEASE_MODEL_DIR', 'models/disease')
+PRELOAD_MODELS = [
+    name.strip() for name in os.getenv('MODEL_PRELOAD', '').split(',') if name.strip()
+]
+
+def _load_pooled_model(resources: Dict[str, Any], key: str) -> Any:
+    """Load one model for the pool: a disease model by herb, or a core model by name"""
+    manager = resources['manager']
+    if key.startswith(DISEASE_KEY_PREFIX):
+        herb_type = key[len(DISEASE_KEY_PREFIX):]
+        path = os.path.join(DISEASE_MODEL_DIR, f"{herb_type}.pt")
+        # Not through ModelManager: it would keep its own reference past eviction
+        if not os.path.exists(path):
+            logger.warning(f"No disease model for {herb_type} at {path}")
+            return None
+        return load_torch_model(path)
+
+    load_model = getattr(manager, 'load_model', None)
+    model = load_model(key) if load_model is not None else manager.get_model(key)
+    if key in OPTIMIZED_MODELS and model is not None:
+        model = load_inference_backend(resources, key, model)
+    return model
+
+def _create_model_resources() -> Dict[str, Any]:
+    """Everything one model version serves from, built fresh for every version"""
+    return {
+        'manager': ModelManager(),
+        'backends': create_backend_registry(),
+        'herb_classifier': ThaiHerbClassifier(),
+        'quality_assessor': QualityAssessor()
+    }
+
+def _create_model_pool(resources: Dict[str, Any]) -> ModelPool:
+    return ModelPool(
+        loader=lambda key: _load_pooled_model(resources, key),
+        memory_limit_bytes=int(os.getenv('MODEL_POOL_MEMORY_MB', 2048)) * 1024 * 1024,
+        pinned=lambda key: not key.startswith(DISEASE_KEY_PREFIX)
+    )
+
+# Versioned model slots: reloads build the next version in the background
+model_slots = ModelSlots(_create_model_pool, _create_model_resources)
+
+def current_models() -> ModelSlot:
+    """Model slot for this request, pinned on first use so a reload cannot mix versions"""
+    if not has_request_context():
+        return model_slots.current
+    slot = g.get('model_slot')
+    if slot is None:
+        slot = g.model_slot = model_slots.acquire()
+    return slot
+
+@app.teardown_request
+def release_model_slot(exc):
+    """Drop the request's reference so a retired model version can be freed"""
+    slot = g.pop('model_slot', None)
+    if slot is not None:
+        model_slots.release(slot)
+
+def get_inference_model(name: str):
+    """Model for ``name`` on the configured backend, loaded on first use"""
+    return current_models().get(name)
+
+def get_disease_model(herb_type: str):
+    """Disease model for ``herb_type``, loaded on first use and evictable"""
+    return current_models().get(disease_model_key(herb_type))
+
+def _prepare_models(resources: Dict[str, Any]):
+    """Load a version's ModelManager, unless the pool can load its models one at a time"""
+    manager = resources['manager']
+    # The pool can only defer core models when ModelManager loads them one at a time
+    if MODEL_LAZY_LOADING and hasattr(manager, 'load_model'):
+        logger.info("🤖 Lazy model loading enabled, models load on first use")
+        return
+    if MODEL_LAZY_LOADING:
+        logger.warning("⚠️ ModelManager has no load_model(), loading all models up front")
+    manager.load_models()
+
+def load_models():
+    """Load what must be resident before the first request"""
+    slot = model_slots.current
+    _prepare_models(slot.resources)
+    slot.pool.preload(PRELOAD_MODELS if MODEL_LAZY_LOADING else OPTIMIZED_MODELS + PRELOAD_MODELS)
+
+# ===================================================================
+# Inference Scheduling
+# ===================================================================
+
+def _classify_batch(models: ModelSlot, images: List[np.ndarray]) -> List[HerbPrediction]:
+    """Classify a micro-batch of preprocessed images on one model version"""
+    herb_classifier = models['herb_classifier']
+    classify_batch = getattr(herb_classifier, 'classify_batch', None)
+    with runtime_profiler.model_call('classify'):
+        if classify_batch is not None:
+            return classify_batch(images)
+        return [herb_classifier.classify_herb(image) for image in images]
+
+def _quality_batch(models: ModelSlot, items: List[Tuple[np.ndarray, str]]) -> List[QualityAssessment]:
+    """Assess quality for a micro-batch of (image, herb_type) pairs on one model version"""
+    quality_assessor = models['quality_assessor']
+    assess_batch = getattr(quality_assessor, 'assess_quality_batch', None)
+    with runtime_profiler.model_call('quality'):
+        if assess_batch is not None:
+            images, herb_types = zip(*items)
+            return assess_batch(list(images), list(herb_types))
+        return [quality_assessor.assess_quality(image, herb_type) for image, herb_type in items]
+
+def _detect_batch(models: ModelSlot, images: List[np.ndarray]) -> List[Any]:
+    """Run the YOLO detector once over a micro-batch of images on one model version"""
+    model = models.get('object_detection')
+    with runtime_profiler.model_call('detect'):
+        return list(model(images))
+
+inference_scheduler = InferenceScheduler(
+    max_batch_size=int(os.getenv('INFERENCE_MAX_BATCH_SIZE', 8)),
+    max_wait_ms=float(os.getenv('INFERENCE_MAX_WAIT_MS', 10)),
+    timeout=float(os.getenv('INFERENCE_TIMEOUT', 30))
+)
+# Payloads are (model slot, input): each request's inputs run on the version it pinned
+inference_scheduler.register('classify', lambda items: batch_by_slot(items, _classify_batch))
+inference_scheduler.register('quality', lambda items: batch_by_slot(items, _quality_batch))
+inference_scheduler.register('detect', lambda items: batch_by_slot(items, _detect_batch))
+
+# Longest side uploads are decoded to, in requests and in the batch decode workers
+IMAGE_MAX_SIDE = int(os.getenv('IMAGE_MAX_SIDE', 1024))
+
+batch_pipeline = BatchPipeline(
+    processor_factory=ImageProcessor,
+    classify_batch=_classify_batch,
+    quality_batch=_quality_batch,
+    max_workers=int(os.getenv('BATCH_DECODE_WORKERS', 0)) or None,
+    model_batch_size=int(os.getenv('BATCH_MODEL_BATCH_SIZE', 32)),
+    max_images=int(os.getenv('BATCH_MAX_IMAGES', 0)) or None,
+    memory_fraction=float(os.getenv('BATCH_MEMORY_FRACTION', 0.5)),
+    max_side=IMAGE_MAX_SIDE
+)
+
+# Content-addressed cache of /analyze responses
+result_cache = ResultCache(
+    max_entries=int(os.getenv('RESULT_CACHE_SIZE', 512)),
+    disk_dir=os.getenv('RESULT_CACHE_DIR') or None
+)
+
+# Shared executor for the concurrent stages of /analyze
+analysis_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ANALYSIS_STAGE_WORKERS', 16)),
+    thread_name_prefix='analysis-stage'
+)
+ANALYSIS_STAGE_TIMEOUTS = {
+    name: float(os.getenv(f'STAGE_TIMEOUT_{name.upper()}', default))
+    for name, default in {
+        'classify': 30, 'quality': 30, 'detect': 10, 'disease': 10, 'recommendations': 5
+    }.items()
+}
+
+# Detections below this confidence are dropped during post-processing
+DETECTION_CONFIDENCE_THRESHOLD = float(os.getenv('DETECTION_CONFIDENCE_THRESHOLD', 0.25))
+
+# Background analysis jobs (SQLite queue, results polled by clients)
+JOB_MAX_IMAGES = int(os.getenv('JOB_MAX_IMAGES', 1000))
+job_store = JobStore(
+    db_path=os.getenv('JOB_DB_PATH', 'temp/analysis_jobs.sqlite3'),
+    storage_dir=os.getenv('JOB_STORAGE_DIR', 'uploads/jobs')
+)
+def analyze_job_uploads(uploads: List[Tuple[str, UploadPayload]]) -> List[Dict[str, Any]]:
+    """Run one claimed job batch on a single pinned model version"""
+    models = model_slots.acquire()
+    try:
+        return batch_pipeline.analyze(uploads, models)
+    finally:
+        model_slots.release(models)
+
+job_workers = JobWorkerPool(
+    job_store,
+    analyze_job_uploads,
+    workers=int(os.getenv('JOB_WORKERS', 2)),
+    claim_size=int(os.getenv('JOB_CLAIM_SIZE', 16)),
+    # Jobs and their results are kept this long after their last update
+    job_ttl=float(os.getenv('JOB_TTL_SECONDS', 24 * 3600)),
+    sweep_interval=float(os.getenv('JOB_SWEEP_INTERVAL_SECONDS', 300))
+)
+
+# ===================================================================
+# Metrics
+# ===================================================================
+
+metrics = ServiceMetrics('gacp_yolo')
+
+metrics.gauge('inference_queue_depth', 'Requests waiting for a model micro-batch',
+              lambda: stats_values(inference_scheduler.get_metrics(), 'queue_depth'), ['model'])
+metrics.histogram('inference_batch_size', 'Items per model micro-batch',
+                  lambda: {(model,): ({int(size): count for size, count in stats['batch_size_histogram'].items()},
+                                      stats['total_items'])
+                           for model, stats in inference_scheduler.get_metrics().items()},
+                  ['model'])
+metrics.counter('inference_failed_batches', 'Micro-batches whose model call raised',
+                lambda: stats_values(inference_scheduler.get_metrics(), 'failed_batches'), ['model'])
+metrics.gauge('inference_mean_queue_wait_seconds', 'Mean time a request waited for its batch',
+              lambda: {labels: ms / 1000 for labels, ms in
+                       stats_values(inference_scheduler.get_metrics(), 'mean_queue_wait_ms').items()},
+              ['model'])
+metrics.counter('result_cache_lookups', 'Analysis result cache lookups by outcome',
+                lambda: {(outcome,): result_cache.stats()[key] for outcome, key in
+                         (('memory_hit', 'memory_hits'), ('disk_hit', 'disk_hits'), ('miss', 'misses'))},
+                ['outcome'])
+metrics.gauge('result_cache_hit_ratio', 'Fraction of cache lookups served from the cache',
+              lambda: result_cache.stats()['hit_rate'])
+metrics.gauge('result_cache_entries', 'Results held in the in-memory cache tier',
+              lambda: result_cache.stats()['entries'])
+metrics.counter('model_pool_events', 'Model pool hits, loads, load failures and evictions',
+                lambda: {(event,): model_slots.current.pool.stats()[event]
+                         for event in ('hits', 'loads', 'load_failures', 'evictions')},
+                ['event'])
+metrics.gauge('model_pool_resident_bytes', 'Estimated memory held by loaded models',
+              lambda: model_slots.current.pool.resident_bytes)
+metrics.gauge('model_pool_limit_bytes', 'Model pool memory ceiling',
+              lambda: model_slots.current.pool.memory_limit_bytes)
+metrics.gauge('model_version', 'Model slot version currently serving requests',
+              lambda: model_slots.current.version)
+metrics.gauge('system_memory_available_bytes', 'Memory available to new allocations on the host',
+              lambda: psutil.virtual_memory().available)
+metrics.gauge('batch_max_images', 'Largest batch /batch/analyze accepts right now',
+              lambda: batch_pipeline.max_images())
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Observe request latency by route template (bounded label cardinality)"""
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.observe_request(request.method, endpoint, response.status_code, time.perf_counter() - started)
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    body, content_type = metrics.render()
+    return Response(body, headers={'Content-Type': content_type})
+
 # ===================================================================
 # API Models (for documentation)
 # ===================================================================
@@ -470,7 +783,10 @@ detection_result_model = api.model('DetectionResult', {
         'area': fields.Float(description='Object area in pixels')
     }))),
     'total_objects': fields.Integer(description='Total number of detected objects'),
-    'processing_time': fields.Float(description='Processing time in seconds')
+    'processing_time': fields.Float(description='Processing time in seconds'),
+    'format': fields.String(description='Detection payload format', enum=list(DETECTION_FORMATS)),
+    'columns': fields.Raw(description='Columnar detections (format=columnar): classes, class_index, '
+                                      'confidence, flat bbox_xyxy and area lists')
 })
 
 analysis_response_model = api.model('AnalysisResponse', {
@@ -482,9 +798,75 @@ analysis_response_model = api.model('AnalysisResponse', {
     'detection_result': fields.Nested(detection_result_model),
     'recommendations': fields.List(fields.String, description='Quality improvement recommendations'),
     'digital_signature': fields.String(description='Digital signature for integrity'),
+    'cache_hit': fields.Boolean(description='True if the result was served from the analysis cache'),
     'metadata': fields.Raw(description='Additional metadata')
 })
 
+# ===================================================================
+# Request Image Ingestion
+# ===================================================================
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'webp'}
+
+def allowed_file(filename: str) -> bool:
+    """Check if file type is allowed"""
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def read_request_image():
+    """Extract image data from a file upload or base64 JSON body
+
+    Returns a zero-copy buffer: a memoryview for small uploads, or a
+    read-only mmap of the spool file for large ones.
+    """
+    if 'image' in request.files:
+        # File upload
+        file = request.files['image']
+        if file.filename == '':
+            raise BadRequest("No file selected")
+        
+        # Validate file type
+        if not allowed_file(file.filename):
+            raise BadRequest("Invalid file type")
+        
+        if isinstance(file.stream, SpooledUpload):
+            return file.stream.getbuffer()
+        return file.read()
+    
+    if request.is_json:
+        # JSON bodies are parsed in memory, so they are capped before reading
+        request.reserve_body()
+    body = request.get_json(silent=True) or {}
+    if 'image' in body:
+        # Base64 encoded image, decoded in chunks into a spool buffer
+        import binascii
+        try:
+            upload = decode_base64_to_upload(body['image'], request.new_upload())
+        except (binascii.Error, ValueError) as e:
+            raise BadRequest(f"Invalid base64 image: {str(e)}")
+        return upload.getbuffer()
+    
+    raise BadRequest("No valid image provided")
+
+def upload_payload(file) -> Any:
+    """Spool file path (or bytes for small uploads) to hand to worker processes"""
+    if isinstance(file.stream, SpooledUpload):
+        return file.stream.as_payload()
+    return file.read()
+
+def ingest_image(image_data):
+    """Decode an upload once into model-ready RGB pixels plus metadata"""
+    try:
+        with metrics.stage('decode'):
+            return decode_image(image_data, max_side=IMAGE_MAX_SIDE)
+    except ImageIngestError as e:
+        raise BadRequest(str(e))
+
+def preprocess_image(image: np.ndarray) -> np.ndarray:
+    """Run the shared preprocessor on decoded pixels"""
+    with metrics.stage('preprocess'):
+        return image_processor.preprocess_image(image)
+
 # ===================================================================
 # API Endpoints
 # ===================================================================
@@ -495,7 +877,7 @@ class HealthCheck(Resource):
         """Health check endpoint"""
         try:
             # Check model availability
-            model_status = model_manager.check_models()
+            model_status = current_models()['manager'].check_models()
             gpu_available = torch.cuda.is_available()
             
             return {
@@ -503,6 +885,10 @@ class HealthCheck(Resource):
                 'timestamp': datetime.now().isoformat(),
                 'models': model_status,
                 'gpu_available': gpu_available,
+                'inference': inference_scheduler.get_metrics(),
+                'result_cache': result_cache.stats(),
+                'model_pool': model_slots.current.pool.stats(),
+                'model_slots': model_slots.stats(),
                 'version': '3.0.0'
             }
         except Exception as e:
@@ -514,9 +900,11 @@ class ModelInfo(Resource):
     def get(self):
         """Get information about available models"""
         try:
-            models_info = model_manager.get_models_info()
+            models = current_models()
+            models_info = models['manager'].get_models_info()
             return {
                 'available_models': models_info,
+                'inference_backends': models['backends'].describe(),
                 'supported_herbs': [
                     'cannabis', 'turmeric', 'ginger', 
                     'black_galingale', 'plai', 'kratom'
@@ -537,40 +925,65 @@ class HerbAnalysis(Resource):
             analysis_id = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.urandom(4).hex()}"
             logger.info(f"Starting analysis: {analysis_id}")
             
-            # Validate request
-            if 'image' not in request.files and 'image' not in request.json:
-                raise BadRequest("No image provided")
-            
-            # Process image
-            image = self._extract_image_from_request()
-            processed_image = image_processor.preprocess_image(image)
+            # Read image (validates that one was provided)
+            image_data = read_request_image()
+            body = request.get_json(silent=True) or {}
             
             # Get analysis parameters
-            herb_type = request.form.get('herb_type') or request.json.get('herb_type')
+            herb_type = request.form.get('herb_type') or body.get('herb_type')
             assessment_type = request.form.get('assessment_type', 'comprehensive')
+            detection_format = (request.args.get('detection_format') or request.form.get('detection_format')
+                                or body.get('detection_format') or DETECTION_FORMAT_OBJECTS)
+            if detection_format not in DETECTION_FORMATS:
+                raise BadRequest(f"detection_format must be one of {', '.join(DETECTION_FORMATS)}")
             
-            # Perform comprehensive analysis
-            start_time = datetime.now()
+            # Pin this request's model version before the cache lookup and the stages
+            models = current_models()
             
-            # 1. Herb Classification
-            herb_prediction = herb_classifier.classify_herb(processed_image)
-            
-            # 2. Quality Assessment
-            quality_assessment = quality_assessor.assess_quality(
-                processed_image, 
-                herb_prediction.herb_type
+            # Serve repeated uploads of the same photo from the result cache
+            lookup_started = time.perf_counter()
+            cache_generation = result_cache.generation
+            cache_key = result_cache.make_key(
+                image_data,
+                models['manager'].get_model_versions(),
+                {'herb_type': herb_type, 'assessment_type': assessment_type, 'detection_format': detection_format}
             )
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                response_data = dict(cached)
+                response_data['analysis_id'] = analysis_id
+                response_data['timestamp'] = datetime.now().isoformat()
+                # Time spent on this request; the original run's is kept alongside
+                response_data['metadata'] = {
+                    **cached.get('metadata', {}),
+                    'processing_time': time.perf_counter() - lookup_started,
+                    'cached_processing_time': cached.get('metadata', {}).get('processing_time')
+                }
+                response_data['cache_hit'] = True
+                with metrics.stage('sign'):
+                    response_data['digital_signature'] = digital_signer.sign_response(response_data)
+                logger.info(f"Analysis served from cache: {analysis_id}")
+                return response_data
             
-            # 3. Object Detection
-            detection_result = self._detect_objects(processed_image)
+            # Process image (single decode, already reduced to IMAGE_MAX_SIDE)
+            ingested = ingest_image(image_data)
+            processed_image = preprocess_image(ingested.array)
             
-            # 4. Disease/Pest Detection (if applicable)
-            disease_detection = self._detect_diseases(processed_image, herb_prediction.herb_type)
+            # Perform comprehensive analysis
+            start_time = datetime.now()
             
-            # 5. Generate recommendations
-            recommendations = self._generate_recommendations(
-                herb_prediction, quality_assessment, disease_detection
+            stages = StageGraph(self._analysis_stages(models), analysis_executor).run({'image': processed_image})
+            for stage_name, seconds in stages.timings.items():
+                metrics.observe_stage(stage_name, seconds)
+            herb_prediction = stages['classify']
+            quality_assessment = stages['quality']
+            detections = stages['detect']
+            detection_result = DetectionResult(
+                objects=[] if detection_format == DETECTION_FORMAT_COLUMNAR else detections.to_records(),
+                total_objects=len(detections),
+                processing_time=stages.timings['detect']
             )
+            recommendations = stages['recommendations']
             
             processing_time = (datetime.now() - start_time).total_seconds()
             
@@ -581,17 +994,31 @@ class HerbAnalysis(Resource):
                 'timestamp': datetime.now().isoformat(),
                 'herb_prediction': herb_prediction.to_dict(),
                 'quality_assessment': quality_assessment.to_dict(),
-                'detection_result': detection_result.to_dict(),
+                'detection_result': self._format_detections(detection_result, detections, detection_format),
                 'recommendations': recommendations,
                 'metadata': {
                     'processing_time': processing_time,
-                    'model_versions': model_manager.get_model_versions(),
-                    'image_properties': image_processor.get_image_properties(processed_image)
+                    'stage_timings': {name: round(seconds, 4) for name, seconds in stages.timings.items()},
+                    'partial': stages.partial,
+                    'degraded_stages': stages.failures,
+                    'model_versions': models['manager'].get_model_versions(),
+                    'image_properties': image_processor.get_image_properties(processed_image),
+                    'source_image': ingested.metadata
                 }
             }
             
+            # Cache everything except the per-request id, timestamp and signature
+            if not stages.partial:
+                result_cache.put(
+                    cache_key,
+                    {k: v for k, v in response_data.items() if k not in ('analysis_id', 'timestamp')},
+                    generation=cache_generation
+                )
+            response_data['cache_hit'] = False
+            
             # Add digital signature for integrity
-            response_data['digital_signature'] = digital_signer.sign_response(response_data)
+            with metrics.stage('sign'):
+                response_data['digital_signature'] = digital_signer.sign_response(response_data)
             
             # Log successful analysis
             logger.info(f"Analysis completed: {analysis_id} in {processing_time:.2f}s")
@@ -601,89 +1028,73 @@ class HerbAnalysis(Resource):
         except BadRequest as e:
             logger.warning(f"Bad request: {str(e)}")
             return {'success': False, 'error': str(e)}, 400
+        except RequestEntityTooLarge as e:
+            logger.warning(f"Request over memory budget: {str(e)}")
+            return {'success': False, 'error': str(e)}, 413
+        except StageTimeoutError as e:
+            logger.error(f"Analysis timed out: {str(e)}")
+            return {'success': False, 'error': str(e)}, 504
         except Exception as e:
             logger.error(f"Analysis failed: {str(e)}\n{traceback.format_exc()}")
             return {'success': False, 'error': 'Internal analysis error'}, 500
 
-    def _extract_image_from_request(self) -> np.ndarray:
-        """Extract and validate image from request"""
-        if 'image' in request.files:
-            # File upload
-            file = request.files['image']
-            if file.filename == '':
-                raise BadRequest("No file selected")
-            
-            # Validate file type
-            if not self._allowed_file(file.filename):
-                raise BadRequest("Invalid file type")
-            
-            # Read image
-            image_bytes = file.read()
-            image = Image.open(io.BytesIO(image_bytes))
-            return np.array(image)
-            
-        elif request.is_json and 'image' in request.json:
-            # Base64 encoded image
-            import base64
-            image_data = request.json['image']
-            if image_data.startswith('data:image'):
-                # Remove data URL prefix
-                image_data = image_data.split(',')[1]
-            
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
-            return np.array(image)
-        else:
-            raise BadRequest("No valid image provided")
-
-    def _allowed_file(self, filename: str) -> bool:
-        """Check if file type is allowed"""
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'webp'}
-        return '.' in filename and \
-               filename.rsplit('.', 1)[1].lower() in allowed_extensions
-
-    def _detect_objects(self, image: np.ndarray) -> DetectionResult:
-        """Detect objects in the image"""
-        try:
-            # Load YOLO model
-            model = model_manager.get_model('object_detection')
-            
-            # Run detection
-            results = model(image)
-            
-            # Process results
-            objects = []
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        objects.append({
-                            'class_name': model.names[int(box.cls)],
-                            'confidence': float(box.conf),
-                            'bbox': box.xyxy.tolist()[0],
-                            'area': float(box.area) if hasattr(box, 'area') else 0
-                        })
-            
-            return DetectionResult(
-                objects=objects,
-                total_objects=len(objects),
-                processing_time=0  # Will be calculated by caller
-            )
-            
-        except Exception as e:
-            logger.error(f"Object detection failed: {str(e)}")
-            return DetectionResult(objects=[], total_objects=0, processing_time=0)
+    def _analysis_stages(self, models: ModelSlot) -> List[Stage]:
+        """Analysis as a stage graph: detection runs alongside classification,
+        quality and disease detection start once the herb type is known"""
+        timeouts = ANALYSIS_STAGE_TIMEOUTS
+        return [
+            Stage('classify', lambda ctx: inference_scheduler.run('classify', (models, ctx['image'])),
+                  timeout=timeouts['classify']),
+            Stage('detect', lambda ctx: self._detect_objects(models, ctx['image']),
+                  timeout=timeouts['detect'], critical=False,
+                  default=DetectionColumns.empty),
+            Stage('quality',
+                  lambda ctx: inference_scheduler.run('quality', (models, (ctx['image'], ctx['classify'].herb_type))),
+                  depends_on=('classify',), timeout=timeouts['quality']),
+            Stage('disease', lambda ctx: self._detect_diseases(models, ctx['image'], ctx['classify'].herb_type),
+                  depends_on=('classify',), timeout=timeouts['disease'], critical=False, default=list),
+            Stage('recommendations',
+                  lambda ctx: self._generate_recommendations(ctx['classify'], ctx['quality'], ctx['disease']),
+                  depends_on=('classify', 'quality', 'disease'), timeout=timeouts['recommendations'])
+        ]
+
+    def _detect_objects(self, models: ModelSlot, image: np.ndarray) -> DetectionColumns:
+        """Detect objects in the image, returned as columnar arrays"""
+        # Load YOLO model (for class names)
+        model = models.get('object_detection')
+        
+        # Run detection as part of a scheduler micro-batch
+        results = [inference_scheduler.run('detect', (models, image))]
+        
+        # Filter, measure and label every box with array operations
+        return results_to_columns(
+            results,
+            class_name_table(getattr(model, 'names', {})),
+            min_confidence=DETECTION_CONFIDENCE_THRESHOLD
+        )
 
-    def _detect_diseases(self, image: np.ndarray, herb_type: str) -> List[str]:
+    def _format_detections(self,
+                           detection_result: DetectionResult,
+                           detections: DetectionColumns,
+                           detection_format: str) -> Dict[str, Any]:
+        """Serialize detections as a list of objects or, on request, as compact columns"""
+        payload = detection_result.to_dict()
+        payload['format'] = detection_format
+        if detection_format == DETECTION_FORMAT_COLUMNAR:
+            payload['columns'] = detections.to_columnar()
+        return payload
+
+    def _detect_diseases(self, models: ModelSlot, image: np.ndarray, herb_type: str) -> List[str]:
         """Detect diseases and pests"""
         try:
             # Load disease detection model for specific herb
-            model = model_manager.get_disease_model(herb_type)
+            model = models.get(disease_model_key(herb_type))
             if model is None:
                 return []
             
             # Run disease detection
-            results = model.predict(image)
+            with runtime_profiler.model_call('disease'):
+                results = model.predict(image)
             
             # Process results
             diseases = []
@@ -764,11 +1175,12 @@ class HerbClassification(Resource):
     def post(self):
         """Classify herb type only"""
         try:
-            image = self._extract_image_from_request()
-            processed_image = image_processor.preprocess_image(image)
+            ingested = ingest_image(read_request_image())
+            processed_image = preprocess_image(ingested.array)
             
             # Classify herb
-            prediction = herb_classifier.classify_herb(processed_image)
+            with metrics.stage('classify'):
+                prediction = inference_scheduler.run('classify', (current_models(), processed_image))
             
             return {
                 'success': True,
@@ -776,32 +1188,29 @@ class HerbClassification(Resource):
                 'prediction': prediction.to_dict()
             }
             
+        except BadRequest as e:
+            logger.warning(f"Bad request: {str(e)}")
+            return {'success': False, 'error': str(e)}, 400
+        except RequestEntityTooLarge as e:
+            logger.warning(f"Request over memory budget: {str(e)}")
+            return {'success': False, 'error': str(e)}, 413
         except Exception as e:
             logger.error(f"Classification failed: {str(e)}")
             return {'success': False, 'error': str(e)}, 500
 
-    def _extract_image_from_request(self):
-        # Same as in HerbAnalysis class
-        if 'image' in request.files:
-            file = request.files['image']
-            image_bytes = file.read()
-            image = Image.open(io.BytesIO(image_bytes))
-            return np.array(image)
-        else:
-            raise BadRequest("No image provided")
-
 @api.route('/quality')
 class QualityAssessmentEndpoint(Resource):
     def post(self):
         """Assess herb quality only"""
         try:
-            image = self._extract_image_from_request()
+            ingested = ingest_image(read_request_image())
             herb_type = request.form.get('herb_type', 'unknown')
             
-            processed_image = image_processor.preprocess_image(image)
+            processed_image = preprocess_image(ingested.array)
             
             # Assess quality
-            assessment = quality_assessor.assess_quality(processed_image, herb_type)
+            with metrics.stage('quality'):
+                assessment = inference_scheduler.run('quality', (current_models(), (processed_image, herb_type)))
             
             return {
                 'success': True,
@@ -809,20 +1218,16 @@ class QualityAssessmentEndpoint(Resource):
                 'assessment': assessment.to_dict()
             }
             
+        except BadRequest as e:
+            logger.warning(f"Bad request: {str(e)}")
+            return {'success': False, 'error': str(e)}, 400
+        except RequestEntityTooLarge as e:
+            logger.warning(f"Request over memory budget: {str(e)}")
+            return {'success': False, 'error': str(e)}, 413
         except Exception as e:
             logger.error(f"Quality assessment failed: {str(e)}")
             return {'success': False, 'error': str(e)}, 500
 
-    def _extract_image_from_request(self):
-        # Same implementation as above
-        if 'image' in request.files:
-            file = request.files['image']
-            image_bytes = file.read()
-            image = Image.open(io.BytesIO(image_bytes))
-            return np.array(image)
-        else:
-            raise BadRequest("No image provided")
-
 # ===================================================================
 # Batch Processing Endpoints
 # ===================================================================
@@ -836,37 +1241,16 @@ class BatchAnalysis(Resource):
                 raise BadRequest("No images provided")
             
             files = request.files.getlist('images')
-            if len(files) > 10:  # Limit batch size
-                raise BadRequest("Maximum 10 images per batch")
-            
-            results = []
-            for i, file in enumerate(files):
-                try:
-                    image_bytes = file.read()
-                    image = Image.open(io.BytesIO(image_bytes))
-                    processed_image = image_processor.preprocess_image(np.array(image))
-                    
-                    # Quick analysis
-                    herb_prediction = herb_classifier.classify_herb(processed_image)
-                    quality_assessment = quality_assessor.assess_quality(
-                        processed_image, herb_prediction.herb_type
-                    )
-                    
-                    results.append({
-                        'index': i,
-                        'filename': file.filename,
-                        'herb_prediction': herb_prediction.to_dict(),
-                        'quality_assessment': quality_assessment.to_dict(),
-                        'success': True
-                    })
-                    
-                except Exception as e:
-                    results.append({
-                        'index': i,
-                        'filename': file.filename,
-                        'error': str(e),
-                        'success': False
-                    })
+            max_images = batch_pipeline.max_images()
+            if len(files) > max_images:  # Limit batch size by available memory
+                raise BadRequest(f"Maximum {max_images} images per batch")
+            
+            # Decode/preprocess in the process pool, then classify and
+            # assess quality in batched model calls
+            results = batch_pipeline.analyze(
+                [(file.filename, upload_payload(file)) for file in files],
+                current_models()
+            )
             
             return {
                 'success': True,
@@ -876,10 +1260,71 @@ class BatchAnalysis(Resource):
                 'results': results
             }
             
+        except BadRequest as e:
+            logger.warning(f"Bad batch request: {str(e)}")
+            return {'success': False, 'error': str(e)}, 400
+        except RequestEntityTooLarge as e:
+            logger.warning(f"Batch request too large: {str(e)}")
+            return {'success': False, 'error': str(e)}, 413
         except Exception as e:
             logger.error(f"Batch analysis failed: {str(e)}")
             return {'success': False, 'error': str(e)}, 500
 
+@api.route('/jobs/analyze')
+class AnalysisJobSubmit(Resource):
+    def post(self):
+        """Submit a large batch analysis as a background job"""
+        try:
+            if 'images' not in request.files:
+                raise BadRequest("No images provided")
+            
+            files = request.files.getlist('images')
+            if len(files) > JOB_MAX_IMAGES:
+                raise BadRequest(f"Maximum {JOB_MAX_IMAGES} images per job")
+            
+            # Spool uploads to disk and let the worker pool pick them up
+            job_id = job_store.create_job('batch_analyze', [(file.filename, file.stream) for file in files])
+            job_workers.notify()
+            logger.info(f"Queued analysis job {job_id} with {len(files)} images")
+            
+            return {
+                'success': True,
+                'job_id': job_id,
+                'status': 'pending',
+                'total_images': len(files),
+                'status_url': f"{api.prefix}/jobs/{job_id}",
+                'timestamp': datetime.now().isoformat()
+            }, 202
+            
+        except BadRequest as e:
+            logger.warning(f"Bad job request: {str(e)}")
+            return {'success': False, 'error': str(e)}, 400
+        except RequestEntityTooLarge as e:
+            logger.warning(f"Job request too large: {str(e)}")
+            return {'success': False, 'error': str(e)}, 413
+        except Exception as e:
+            logger.error(f"Job submission failed: {str(e)}")
+            return {'success': False, 'error': str(e)}, 500
+
+@api.route('/jobs/<string:job_id>')
+class AnalysisJobStatus(Resource):
+    def get(self, job_id):
+        """Get job progress and a page of per-image results"""
+        try:
+            offset = max(request.args.get('offset', 0, type=int), 0)
+            limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+            
+            job = job_store.get_job(job_id, offset=offset, limit=limit)
+            if job is None:
+                return {'success': False, 'error': 'Job not found'}, 404
+            
+            job['success'] = True
+            return job
+            
+        except Exception as e:
+            logger.error(f"Job status lookup failed: {str(e)}")
+            return {'success': False, 'error': str(e)}, 500
+
 # ===================================================================
 # Model Management Endpoints
 # ===================================================================
@@ -887,18 +1332,87 @@ class BatchAnalysis(Resource):
 @api.route('/models/reload')
 class ModelReload(Resource):
     def post(self):
-        """Reload AI models"""
+        """Start a background model reload and swap it in once warmed up"""
         try:
-            model_manager.reload_models()
+            job = model_slots.reload(
+                prepare=_prepare_models,
+                warm_keys=[] if MODEL_LAZY_LOADING else OPTIMIZED_MODELS,
+                on_swap=lambda slot: result_cache.invalidate()
+            )
             return {
                 'success': True,
-                'message': 'Models reloaded successfully',
+                'message': 'Model reload started',
+                'job': job.to_dict(),
+                'status_url': f"{api.prefix}/models/reload/{job.job_id}",
                 'timestamp': datetime.now().isoformat()
-            }
+            }, 202
         except Exception as e:
             logger.error(f"Model reload failed: {str(e)}")
             return {'success': False, 'error': str(e)}, 500
 
+@api.route('/models/reload/<string:job_id>')
+class ModelReloadStatus(Resource):
+    def get(self, job_id):
+        """Get the status of a model reload"""
+        job = model_slots.get_job(job_id)
+        if job is None:
+            return {'success': False, 'error': 'Reload job not found'}, 404
+        return {
+            'success': True,
+            'job': job.to_dict(),
+            'current_version': model_slots.current.version
+        }
+
+# ===================================================================
+# Admin Endpoints
+# ===================================================================
+
+ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN')
+
+def require_admin():
+    """Abort unless the request carries the configured admin token"""
+    if not ADMIN_API_TOKEN:
+        raise Forbidden("Admin endpoints are disabled (ADMIN_API_TOKEN is not set)")
+    supplied = request.headers.get('X-Admin-Token', '')
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        supplied = auth[len('Bearer '):]
+    if not hmac.compare_digest(supplied.encode('utf-8'), ADMIN_API_TOKEN.encode('utf-8')):
+        raise Forbidden("Invalid admin token")
+
+@api.route('/admin/profile')
+class RuntimeProfile(Resource):
+    def post(self):
+        """Sample all worker threads for N seconds and return a flamegraph-compatible profile"""
+        try:
+            require_admin()
+            body = request.get_json(silent=True) or {}
+            params = {**body, **request.args.to_dict()}
+            seconds = float(params.get('seconds', 10))
+            interval_ms = float(params.get('interval_ms', 5))
+            include_torch = str(params.get('torch', 'true')).lower() != 'false'
+            output = params.get('format', 'folded')
+            if output not in ('folded', 'json'):
+                raise BadRequest("format must be 'folded' or 'json'")
+            
+            session = runtime_profiler.profile(seconds, interval_ms / 1000, include_torch)
+            
+            if output == 'json':
+                return {'success': True, 'profile': session.to_dict()}
+            # Plain folded stacks: pipe straight into flamegraph.pl or load in speedscope
+            return Response(session.folded() + '\n', mimetype='text/plain')
+            
+        except Forbidden as e:
+            logger.warning(f"Rejected profiling request: {str(e)}")
+            return {'success': False, 'error': e.description}, 403
+        except (BadRequest, ValueError) as e:
+            return {'success': False, 'error': str(e)}, 400
+        except ProfilerBusyError as e:
+            return {'success': False, 'error': str(e)}, 409
+        except Exception as e:
+            logger.error(f"Profiling failed: {str(e)}")
+            return {'success': False, 'error': str(e)}, 500
+
 # ===================================================================
 # Static Files
 # ===================================================================
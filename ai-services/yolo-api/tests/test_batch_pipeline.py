@@ -0,0 +1,150 @@
+import io
+import os
+
+from PIL import Image
+
+from utils.batch_pipeline import BatchPipeline
+
+
+class PassthroughProcessor:
+    def preprocess_image(self, image):
+        return image
+
+
+class CrashingProcessor:
+    def preprocess_image(self, image):
+        if image.shape[1] == 13:
+            os._exit(1)
+        return image
+
+
+class Prediction:
+    def __init__(self, shape):
+        self.herb_type = 'turmeric'
+        self.shape = shape
+
+    def to_dict(self):
+        return {'herb_type': self.herb_type, 'shape': list(self.shape)}
+
+
+class Assessment:
+    def __init__(self, herb_type):
+        self.herb_type = herb_type
+
+    def to_dict(self):
+        return {'herb_type': self.herb_type}
+
+
+def _png(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', size).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _pipeline(classify_batches=None, fail_classify=False, **kwargs):
+    def classify(models, images):
+        if classify_batches is not None:
+            classify_batches.append(len(images))
+        if fail_classify:
+            raise RuntimeError("classifier exploded")
+        return [Prediction(image.shape) for image in images]
+
+    def quality(models, items):
+        return [Assessment(herb_type) for _, herb_type in items]
+
+    return BatchPipeline(
+        processor_factory=PassthroughProcessor,
+        classify_batch=classify,
+        quality_batch=quality,
+        max_workers=2,
+        **kwargs
+    )
+
+
+def test_results_keep_upload_order_and_use_the_configured_max_side():
+    pipeline = _pipeline(max_side=64)
+    uploads = [(f"{i}.png", _png((200 + i, 100))) for i in range(6)]
+    try:
+        results = pipeline.analyze(uploads)
+    finally:
+        pipeline.shutdown()
+
+    assert [result['filename'] for result in results] == [name for name, _ in uploads]
+    assert [result['index'] for result in results] == list(range(6))
+    assert all(result['success'] for result in results)
+    # Decoded in the worker processes, reduced to the pipeline's max_side
+    assert all(result['herb_prediction']['shape'][1] == 64 for result in results)
+
+
+def test_undecodable_uploads_fail_alone():
+    pipeline = _pipeline()
+    uploads = [('good.png', _png((32, 32))), ('bad.png', b'not an image'), ('also-good.png', _png((16, 16)))]
+    try:
+        results = pipeline.analyze(uploads)
+    finally:
+        pipeline.shutdown()
+
+    assert [result['success'] for result in results] == [True, False, True]
+    assert results[1]['filename'] == 'bad.png'
+    assert results[1]['error']
+
+
+def test_spooled_paths_are_decoded_in_the_workers(tmp_path):
+    path = tmp_path / 'upload.png'
+    path.write_bytes(_png((40, 20)))
+    pipeline = _pipeline()
+    try:
+        results = pipeline.analyze([('upload.png', str(path))])
+    finally:
+        pipeline.shutdown()
+
+    assert results[0]['success']
+    assert results[0]['herb_prediction']['shape'] == [20, 40, 3]
+
+
+def test_models_run_in_chunks_and_a_failed_chunk_fails_its_images():
+    batches = []
+    pipeline = _pipeline(batches, fail_classify=True, model_batch_size=2)
+    try:
+        results = pipeline.analyze([(f"{i}.png", _png((8, 8))) for i in range(5)])
+    finally:
+        pipeline.shutdown()
+
+    assert batches == [2, 2, 1]
+    assert not any(result['success'] for result in results)
+    assert all(result['error'] == 'classifier exploded' for result in results)
+
+
+def test_every_chunk_runs_on_the_models_passed_to_analyze():
+    seen = []
+
+    def classify(models, images):
+        seen.append(models)
+        return [Prediction(image.shape) for image in images]
+
+    def quality(models, items):
+        seen.append(models)
+        return [Assessment(herb_type) for _, herb_type in items]
+
+    pipeline = BatchPipeline(processor_factory=PassthroughProcessor, classify_batch=classify,
+                             quality_batch=quality, max_workers=1, model_batch_size=2)
+    try:
+        pipeline.analyze([(f"{i}.png", _png((8, 8))) for i in range(3)], models='v7')
+    finally:
+        pipeline.shutdown()
+
+    assert seen == ['v7'] * 4
+
+
+def test_a_crashed_decode_worker_fails_its_batch_only():
+    pipeline = _pipeline()
+    pipeline.processor_factory = CrashingProcessor
+    try:
+        crashed = pipeline.analyze([('crash.png', _png((13, 13)))])
+        results = pipeline.analyze([('ok.png', _png((8, 8)))])
+    finally:
+        pipeline.shutdown()
+
+    assert crashed[0]['success'] is False
+    assert crashed[0]['filename'] == 'crash.png'
+    assert results[0]['success']
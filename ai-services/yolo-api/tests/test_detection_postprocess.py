@@ -0,0 +1,53 @@
+import numpy as np
+
+from utils.detection_postprocess import (
+    DetectionColumns, boxes_to_columns, class_name_table, results_to_columns
+)
+
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.boxes = FakeBoxes(data)
+
+
+NAMES = class_name_table({0: 'leaf', 1: 'root', 2: 'stem'})
+
+
+def test_boxes_are_filtered_measured_and_labelled():
+    columns = boxes_to_columns(FakeBoxes([
+        [0, 0, 10, 20, 0.9, 1],
+        [5, 5, 7, 9, 0.1, 0],
+        [2, 3, 6, 4, 0.5, 7],
+    ]), NAMES, min_confidence=0.25)
+
+    assert len(columns) == 2
+    assert columns.class_names.tolist() == ['root', 'unknown']
+    np.testing.assert_allclose(columns.areas, [200.0, 4.0])
+    assert columns.to_records()[0] == {
+        'class_name': 'root', 'confidence': np.float32(0.9).item(), 'bbox': [0.0, 0.0, 10.0, 20.0], 'area': 200.0
+    }
+
+
+def test_columnar_payload_lists_each_class_once():
+    columns = results_to_columns(
+        [FakeResult([[0, 0, 2, 2, 0.8, 0], [0, 0, 1, 3, 0.7, 2]]), FakeResult([[1, 1, 2, 2, 0.6, 0]])],
+        NAMES
+    )
+    payload = columns.to_columnar()
+
+    assert payload['classes'] == ['leaf', 'stem']
+    assert payload['class_index'] == [0, 1, 0]
+    assert len(payload['bbox_xyxy']) == 12
+    assert payload['area'] == [4.0, 3.0, 1.0]
+
+
+def test_missing_or_empty_boxes_give_empty_columns():
+    assert len(boxes_to_columns(None, NAMES)) == 0
+    assert len(boxes_to_columns(FakeBoxes(np.zeros((0, 6))), NAMES)) == 0
+    assert results_to_columns([], NAMES).to_records() == []
+    assert DetectionColumns.empty().to_columnar()['classes'] == []
@@ -0,0 +1,53 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from utils.image_ingest import ImageIngestError, decode_image, read_image_metadata
+
+
+def _encode(mode, size, fmt):
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def test_large_jpeg_is_decoded_at_reduced_scale():
+    ingested = decode_image(_encode('RGB', (4000, 3000), 'JPEG'), max_side=1024)
+
+    assert ingested.array.shape == (768, 1024, 3)
+    assert ingested.array.dtype == np.uint8
+    assert ingested.metadata['size'] == (4000, 3000)
+    # libjpeg DCT scaling already shrank the image before the final resize
+    assert max(ingested.metadata['decoded_size']) < 4000
+
+
+def test_rgba_and_grayscale_are_converted_to_rgb():
+    rgba = decode_image(_encode('RGBA', (64, 32), 'PNG'))
+    gray = decode_image(_encode('L', (64, 32), 'PNG'))
+
+    assert rgba.array.shape == (32, 64, 3)
+    assert rgba.metadata['has_transparency']
+    assert gray.array.shape == (32, 64, 3)
+
+
+def test_metadata_is_read_from_header_only():
+    metadata = read_image_metadata(_encode('RGB', (320, 240), 'PNG'))
+    assert metadata['format'] == 'PNG'
+    assert metadata['size'] == (320, 240)
+
+
+def test_corrupt_upload_is_rejected():
+    with pytest.raises(ImageIngestError):
+        decode_image(b'not an image')
+    truncated = _encode('RGB', (256, 256), 'JPEG')[:200]
+    with pytest.raises(ImageIngestError):
+        decode_image(truncated)
+
+
+def test_decoded_array_is_writeable():
+    ingested = decode_image(_encode('RGB', (64, 48), 'PNG'))
+
+    assert ingested.array.flags.writeable
+    ingested.array[0, 0] = 255
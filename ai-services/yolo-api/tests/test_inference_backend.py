@@ -0,0 +1,96 @@
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from utils.inference_backend import BackendRegistry  # noqa: E402
+
+
+def _classifier():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(
+        torch.nn.Conv2d(3, 4, 3),
+        torch.nn.ReLU(),
+        torch.nn.AdaptiveAvgPool2d(1),
+        torch.nn.Flatten(),
+        torch.nn.Linear(4, 5)
+    ).eval()
+
+
+@pytest.mark.parametrize('backend', ['torchscript', 'onnx'])
+def test_exported_backend_matches_eager_model(tmp_path, backend):
+    if backend == 'onnx':
+        pytest.importorskip('onnxruntime')
+    model = _classifier()
+    example = torch.randn(1, 3, 32, 32)
+    registry = BackendRegistry(backend=backend, export_dir=str(tmp_path), threads=1)
+
+    optimized = registry.load('herb_classifier', model, example_input=example, version='1.0')
+    inputs = torch.randn(4, 3, 32, 32)
+    with torch.no_grad():
+        expected = model(inputs)
+    actual = torch.as_tensor(optimized(inputs))
+
+    assert actual.shape == expected.shape
+    assert torch.allclose(actual, expected, atol=1e-4)
+    assert registry.describe()['herb_classifier']['artifact'].startswith(str(tmp_path))
+
+
+def test_reload_reuses_cached_artifact(tmp_path):
+    model = _classifier()
+    example = torch.randn(1, 3, 32, 32)
+    registry = BackendRegistry(backend='torchscript', export_dir=str(tmp_path), threads=1)
+
+    first = registry.load('herb_classifier', model, example_input=example, version='1.0')
+    second = registry.load('herb_classifier', model, example_input=example, version='1.0')
+
+    assert first.describe()['artifact'] == second.describe()['artifact']
+    assert registry.names() == ['herb_classifier']
+
+
+class FakeYolo:
+    """Just enough of ultralytics.YOLO for create_backend to treat it as one"""
+
+    model_name = 'object_detection'
+    names = {0: 'leaf'}
+    predictor = None
+    task = 'detect'
+
+    def __init__(self, export_path):
+        self.export_path = export_path
+
+    def export(self, format, **kwargs):
+        from utils.inference_backend import OnnxBackend
+
+        # Reuse the plain-module exporter to produce a real ONNX graph
+        OnnxBackend._export(self, _classifier(), torch.randn(1, 3, 32, 32), self.export_path)
+        return self.export_path
+
+
+def test_backends_must_implement_call():
+    from utils.inference_backend import InferenceBackend
+
+    with pytest.raises(TypeError):
+        InferenceBackend('herb_classifier')
+
+
+@pytest.mark.parametrize('backend', ['eager', 'torchscript'])
+def test_int8_yolo_outside_onnx_is_rejected(tmp_path, backend):
+    from utils.inference_backend import create_backend
+
+    with pytest.raises(ValueError, match='int8'):
+        create_backend('object_detection', FakeYolo(str(tmp_path / 'yolo.onnx')), backend=backend,
+                       precision='int8', export_dir=str(tmp_path), warmup=False)
+
+
+def test_int8_yolo_export_creates_the_export_dir(tmp_path):
+    pytest.importorskip('onnxruntime')
+    from utils.inference_backend import InferenceBackend, UltralyticsBackend
+
+    export_dir = tmp_path / 'models' / 'optimized'
+    backend = UltralyticsBackend.__new__(UltralyticsBackend)
+    InferenceBackend.__init__(backend, 'object_detection', precision='int8')
+
+    target = backend._export(FakeYolo(str(tmp_path / 'yolo.onnx')), 'onnx', str(export_dir), 640)
+
+    assert target == str(export_dir / 'object_detection.int8.onnx')
+    assert (export_dir / 'object_detection.int8.onnx').exists()
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from utils.inference_scheduler import InferenceScheduler
+
+
+def test_concurrent_requests_share_a_batch():
+    seen_batches = []
+
+    def double(batch):
+        seen_batches.append(len(batch))
+        return [x * 2 for x in batch]
+
+    scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=200)
+    scheduler.register('double', double)
+
+    results = scheduler.run_many('double', [1, 2, 3, 4, 5])
+    scheduler.shutdown()
+
+    assert results == [2, 4, 6, 8, 10]
+    assert seen_batches[0] == 4
+    assert sum(seen_batches) == 5
+
+
+def test_batch_errors_propagate_to_every_caller():
+    def broken(batch):
+        raise ValueError("model exploded")
+
+    scheduler = InferenceScheduler(max_batch_size=2, max_wait_ms=50)
+    scheduler.register('broken', broken)
+
+    futures = [scheduler.submit('broken', i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+
+    metrics = scheduler.get_metrics()['broken']
+    scheduler.shutdown()
+    assert metrics['failed_batches'] >= 1
+
+
+def test_metrics_report_batch_sizes_and_queue_wait():
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait_ms=20)
+    scheduler.register('echo', lambda batch: batch)
+
+    threads = [threading.Thread(target=scheduler.run, args=('echo', i)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = scheduler.get_metrics()['echo']
+    scheduler.shutdown()
+    assert metrics['total_items'] == 6
+    assert metrics['mean_batch_size'] >= 1
+    assert metrics['max_queue_wait_ms'] >= 0
+    assert metrics['queue_depth'] == 0
+
+
+def test_unknown_model_is_rejected():
+    scheduler = InferenceScheduler()
+    with pytest.raises(KeyError):
+        scheduler.submit('missing', 1)
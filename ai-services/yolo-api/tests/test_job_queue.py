@@ -0,0 +1,129 @@
+import io
+import os
+import time
+
+import pytest
+
+from utils.job_queue import JobStore, JobWorkerPool
+
+
+def _fake_analyze(uploads):
+    results = []
+    for name, path in uploads:
+        with open(path, 'rb') as f:
+            data = f.read()
+        results.append({'filename': name, 'size': len(data), 'success': data != b'bad'})
+    return results
+
+
+def _wait_for_completion(store, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get_job(job_id)
+        if job['status'] == 'completed':
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not complete in time")
+
+
+def test_job_is_processed_in_background(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'spool'))
+    uploads = [(f'{i}.jpg', io.BytesIO(b'x' * i)) for i in range(1, 6)]
+    uploads.append(('broken.jpg', io.BytesIO(b'bad')))
+    job_id = store.create_job('batch_analyze', uploads)
+
+    assert store.get_job(job_id)['status'] == 'pending'
+
+    workers = JobWorkerPool(store, _fake_analyze, workers=2, claim_size=2, poll_interval=0.01)
+    workers.start()
+    try:
+        job = _wait_for_completion(store, job_id)
+    finally:
+        workers.stop()
+
+    assert job['successful_analyses'] == 5
+    assert job['failed_analyses'] == 1
+    assert not (tmp_path / 'spool' / job_id).exists()
+
+
+def test_results_are_paginated_by_image_index(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'spool'))
+    job_id = store.create_job('batch_analyze', [(f'{i}.jpg', io.BytesIO(b'x')) for i in range(5)])
+
+    items = store.claim_items(2)
+    store.complete_items(job_id, [(item['idx'], {'index': item['idx'], 'success': True}) for item in items])
+
+    first_page = store.get_job(job_id, offset=0, limit=3)
+    assert [r['index'] for r in first_page['results']] == [0, 1, 2]
+    assert first_page['results'][2]['status'] == 'pending'
+    assert first_page['next_offset'] == 3
+
+    last_page = store.get_job(job_id, offset=3, limit=3)
+    assert [r['index'] for r in last_page['results']] == [3, 4]
+    assert last_page['next_offset'] is None
+
+
+def test_unknown_job_returns_none(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'spool'))
+    assert store.get_job('missing') is None
+
+
+def test_expired_jobs_and_results_are_purged(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'spool'))
+    old_job = store.create_job('batch_analyze', [('a.jpg', io.BytesIO(b'x'))])
+    time.sleep(0.05)
+    new_job = store.create_job('batch_analyze', [('b.jpg', io.BytesIO(b'x'))])
+
+    assert store.purge_expired(ttl_seconds=0.03) == 1
+
+    assert store.get_job(old_job) is None
+    assert not (tmp_path / 'spool' / old_job).exists()
+    assert store.get_job(new_job)['total_images'] == 1
+
+
+def test_failed_spooling_leaves_no_job_directory(tmp_path):
+    class BrokenStream(io.RawIOBase):
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            raise OSError("client disconnected")
+
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'spool'))
+    with pytest.raises(OSError):
+        store.create_job('batch_analyze', [('a.jpg', io.BytesIO(b'x')), ('b.jpg', BrokenStream())])
+
+    assert os.listdir(tmp_path / 'spool') == []
+
+
+def test_completing_a_purged_job_is_not_an_error(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'spool'))
+    job_id = store.create_job('batch_analyze', [('a.jpg', io.BytesIO(b'x'))])
+    items = store.claim_items(1)
+    store.purge_expired(ttl_seconds=0)
+
+    assert store.complete_items(job_id, [(items[0]['idx'], {'success': True})]) is False
+
+
+def test_worker_survives_a_failed_claim(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'spool'))
+    job_id = store.create_job('batch_analyze', [('a.jpg', io.BytesIO(b'x'))])
+    claim_items = store.claim_items
+    failures = []
+
+    def flaky_claim(limit):
+        if not failures:
+            failures.append(limit)
+            raise RuntimeError("database is locked")
+        return claim_items(limit)
+
+    store.claim_items = flaky_claim
+    workers = JobWorkerPool(store, _fake_analyze, workers=1, poll_interval=0.01)
+    workers.start()
+    try:
+        job = _wait_for_completion(store, job_id)
+    finally:
+        workers.stop()
+
+    assert failures
+    assert job['successful_analyses'] == 1
@@ -0,0 +1,39 @@
+from utils.metrics import ServiceMetrics, stats_values
+
+
+def _scrape(metrics):
+    body, content_type = metrics.render()
+    assert content_type.startswith('text/plain')
+    return body.decode('utf-8')
+
+
+def test_request_and_stage_latency_histograms():
+    metrics = ServiceMetrics('test')
+    metrics.observe_request('POST', '/api/v1/analyze', 200, 0.2)
+    with metrics.stage('decode'):
+        pass
+
+    text = _scrape(metrics)
+    assert 'test_http_request_duration_seconds_count{endpoint="/api/v1/analyze",method="POST",status="200"} 1.0' in text
+    assert 'test_pipeline_stage_duration_seconds_count{stage="decode"} 1.0' in text
+    assert 'process_resident_memory_bytes' in text
+
+
+def test_callbacks_are_read_at_scrape_time():
+    metrics = ServiceMetrics('test')
+    depth = {'classify': {'queue_depth': 3}, 'detect': {'queue_depth': 0}}
+    metrics.gauge('queue_depth', 'Queue depth', lambda: stats_values(depth, 'queue_depth'), ['model'])
+    metrics.counter('cache_hits', 'Cache hits', lambda: 7)
+    metrics.histogram('batch_size', 'Batch sizes', lambda: {('classify',): ({1: 2, 8: 1}, 10)}, ['model'])
+    metrics.gauge('broken', 'Raises', lambda: 1 / 0)
+
+    depth['classify']['queue_depth'] = 5
+    text = _scrape(metrics)
+
+    assert 'test_queue_depth{model="classify"} 5.0' in text
+    assert 'test_cache_hits_total 7.0' in text
+    assert 'test_batch_size_bucket{le="1.0",model="classify"} 2.0' in text
+    assert 'test_batch_size_bucket{le="4.0",model="classify"} 2.0' in text
+    assert 'test_batch_size_bucket{le="+Inf",model="classify"} 3.0' in text
+    assert 'test_batch_size_sum{model="classify"} 10.0' in text
+    assert 'test_broken' not in text
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from utils.model_pool import DISEASE_KEY_PREFIX, ModelPool, disease_model_key
+
+
+class FakeModel:
+    def __init__(self, key, size):
+        self.key = key
+        self.size = size
+
+
+def _pool(limit, loads=None, delay=0.0):
+    def loader(key):
+        time.sleep(delay)
+        if loads is not None:
+            loads.append(key)
+        return FakeModel(key, 100)
+
+    return ModelPool(
+        loader=loader,
+        memory_limit_bytes=limit,
+        pinned=lambda key: not key.startswith(DISEASE_KEY_PREFIX),
+        size_fn=lambda model: model.size
+    )
+
+
+def test_models_load_on_first_use_and_hit_afterwards():
+    loads = []
+    pool = _pool(1000, loads)
+
+    first = pool.get(disease_model_key('ginger'))
+    assert pool.get(disease_model_key('ginger')) is first
+
+    stats = pool.stats()
+    assert loads == ['disease:ginger']
+    assert stats['loads'] == 1
+    assert stats['hits'] == 1
+
+
+def test_least_recently_used_disease_model_is_evicted():
+    pool = _pool(250)
+    pool.get('object_detection')
+    pool.get(disease_model_key('ginger'))
+    pool.get(disease_model_key('turmeric'))
+
+    stats = pool.stats()
+    assert set(stats['models']) == {'object_detection', 'disease:turmeric'}
+    assert stats['evictions'] == 1
+    assert stats['resident_bytes'] <= 250
+
+
+def test_pinned_models_are_never_evicted():
+    pool = _pool(150)
+    pool.get('object_detection')
+    pool.get('herb_classifier')
+    pool.get(disease_model_key('kratom'))
+
+    assert set(pool.stats()['models']) == {'object_detection', 'herb_classifier', 'disease:kratom'}
+
+
+def test_concurrent_misses_load_once():
+    loads = []
+    pool = _pool(1000, loads, delay=0.05)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(pool.get(disease_model_key('plai'))))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ['disease:plai']
+    assert all(model is results[0] for model in results)
+
+
+def test_missing_models_are_not_reloaded_until_the_ttl_passes():
+    loads = []
+
+    def loader(key):
+        loads.append(key)
+        return None
+
+    pool = ModelPool(loader=loader, memory_limit_bytes=1000, missing_ttl=0.05)
+
+    assert pool.get(disease_model_key('ginger')) is None
+    assert pool.get(disease_model_key('ginger')) is None
+    assert loads == ['disease:ginger']
+    assert pool.stats()['missing'] == ['disease:ginger']
+
+    time.sleep(0.06)
+    assert pool.get(disease_model_key('ginger')) is None
+    assert loads == ['disease:ginger', 'disease:ginger']
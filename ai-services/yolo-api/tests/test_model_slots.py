@@ -0,0 +1,113 @@
+import threading
+
+from utils.model_pool import ModelPool
+from utils.model_slots import RELOAD_COMPLETED, RELOAD_FAILED, ModelSlots, batch_by_slot
+
+
+def _wait(job, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if job.done:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"reload {job.job_id} did not finish")
+
+
+def _slots(versions):
+    def resources():
+        version = len(versions) + 1
+        versions.append(version)
+        return {'version': version, 'classifier': object()}
+
+    def factory(resources):
+        version = resources['version']
+        return ModelPool(loader=lambda key: f"{key}@v{version}", memory_limit_bytes=1 << 30,
+                         size_fn=lambda model: 1)
+    return ModelSlots(factory, resources)
+
+
+def test_reload_swaps_after_warming_models_in_use():
+    slots = _slots([])
+    assert slots.current.get('object_detection') == 'object_detection@v1'
+
+    job = _wait(slots.reload())
+
+    assert job.status == RELOAD_COMPLETED
+    assert job.version == 2
+    assert job.models == ['object_detection']
+    assert slots.current.pool.keys() == ['object_detection']
+    assert slots.current.get('object_detection') == 'object_detection@v2'
+
+
+def test_in_flight_request_keeps_old_version_until_released():
+    slots = _slots([])
+    slot = slots.acquire()
+    slot.get('object_detection')
+
+    _wait(slots.reload())
+
+    assert slot.get('object_detection') == 'object_detection@v1'
+    assert [retired['version'] for retired in slots.stats()['retired']] == [1]
+
+    slots.release(slot)
+    assert slots.stats()['retired'] == []
+    assert slot.pool.keys() == []
+
+
+def test_failed_reload_keeps_serving_current_version():
+    slots = _slots([])
+
+    def prepare(resources):
+        raise RuntimeError('weights missing')
+
+    job = _wait(slots.reload(prepare=prepare))
+
+    assert job.status == RELOAD_FAILED
+    assert job.error == 'weights missing'
+    assert slots.current.version == 1
+
+
+def test_reload_builds_fresh_resources_and_leaves_the_live_ones_alone():
+    slots = _slots([])
+    slot = slots.acquire()
+    classifier = slot['classifier']
+    prepared = []
+
+    _wait(slots.reload(prepare=prepared.append))
+
+    assert slot['classifier'] is classifier
+    assert slots.current['classifier'] is not classifier
+    assert prepared == [slots.current.resources]
+    slots.release(slot)
+
+
+def test_batch_by_slot_runs_each_payload_on_its_pinned_version():
+    slots = _slots([])
+    old = slots.acquire()
+    _wait(slots.reload())
+    new = slots.acquire()
+    calls = []
+
+    def run(slot, payloads):
+        calls.append((slot.version, payloads))
+        return [f"{payload}@v{slot.version}" for payload in payloads]
+
+    results = batch_by_slot([(old, 'a'), (new, 'b'), (old, 'c')], run)
+
+    assert results == ['a@v1', 'b@v2', 'c@v1']
+    assert calls == [(1, ['a', 'c']), (2, ['b'])]
+    slots.release(old)
+    slots.release(new)
+
+
+def test_failing_swap_callback_does_not_fail_the_reload():
+    slots = _slots([])
+
+    def on_swap(slot):
+        raise RuntimeError('cache unavailable')
+
+    job = _wait(slots.reload(on_swap=on_swap))
+
+    assert job.status == RELOAD_COMPLETED
+    assert job.error is None
+    assert job.warning == 'on_swap failed: cache unavailable'
+    assert slots.current.version == 2
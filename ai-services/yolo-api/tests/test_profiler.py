@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from utils.profiler import ProfilerBusyError, RuntimeProfiler
+
+
+def busy_worker_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_session_samples_other_threads_as_folded_stacks():
+    profiler = RuntimeProfiler()
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker_loop, args=(stop,), name='inference worker')
+    worker.start()
+    try:
+        session = profiler.profile(0.2, interval=0.002, include_torch=False)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert session.samples > 10
+    lines = session.folded().splitlines()
+    worker_lines = [line for line in lines if line.startswith('inference_worker;')]
+    assert worker_lines
+    assert any('busy_worker_loop' in line for line in worker_lines)
+    stack, count = worker_lines[0].rsplit(' ', 1)
+    assert int(count) > 0 and ' ' not in stack
+    assert not profiler.active
+
+
+def test_model_call_is_a_no_op_without_a_session():
+    profiler = RuntimeProfiler()
+    assert profiler.model_call('classify') is profiler.model_call('detect')
+    with profiler.model_call('classify'):
+        pass
+
+
+def test_only_one_session_at_a_time():
+    profiler = RuntimeProfiler()
+    started = threading.Event()
+    thread = threading.Thread(target=lambda: (started.set(), profiler.profile(0.3, include_torch=False)))
+    thread.start()
+    started.wait()
+    time.sleep(0.05)
+    with pytest.raises(ProfilerBusyError):
+        profiler.profile(0.1)
+    thread.join()
+
+
+def test_model_calls_are_traced_with_torch_during_a_session():
+    torch = pytest.importorskip('torch')
+    profiler = RuntimeProfiler()
+    model = torch.nn.Linear(32, 32)
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            with profiler.model_call('classify'), torch.no_grad():
+                model(torch.randn(8, 32))
+            time.sleep(0.01)
+
+    worker = threading.Thread(target=serve)
+    worker.start()
+    try:
+        session = profiler.profile(0.3, include_torch=True)
+    finally:
+        stop.set()
+        worker.join()
+
+    report = session.to_dict()
+    assert report['torch']['profiled_calls'] > 0
+    assert any(op['op'].startswith('classify;aten::') for op in report['torch']['ops'])
+
+
+@pytest.mark.parametrize('duration, interval', [(float('nan'), 0.005), (float('inf'), 0.005), (0.1, float('nan'))])
+def test_non_finite_durations_are_rejected_without_holding_the_lock(duration, interval):
+    profiler = RuntimeProfiler(max_duration=1)
+
+    with pytest.raises(ValueError):
+        profiler.profile(duration, interval, include_torch=False)
+
+    assert profiler.profile(0.1, include_torch=False).samples > 0
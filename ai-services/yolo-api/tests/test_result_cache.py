@@ -0,0 +1,61 @@
+from utils.result_cache import ResultCache
+
+
+def test_key_depends_on_content_models_and_params():
+    versions = {'herb_classifier': '1.0'}
+    key = ResultCache.make_key(b'image', versions, {'herb_type': None})
+    assert key == ResultCache.make_key(b'image', dict(versions), {'herb_type': None})
+    assert key != ResultCache.make_key(b'other', versions, {'herb_type': None})
+    assert key != ResultCache.make_key(b'image', {'herb_classifier': '1.1'}, {'herb_type': None})
+    assert key != ResultCache.make_key(b'image', versions, {'herb_type': 'ginger'})
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', {'v': 1})
+    cache.put('b', {'v': 2})
+    assert cache.get('a') == {'v': 1}
+    cache.put('c', {'v': 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'v': 1}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disk_tier_survives_memory_eviction(tmp_path):
+    cache = ResultCache(max_entries=1, disk_dir=str(tmp_path))
+    cache.put('a', {'v': 1})
+    cache.put('b', {'v': 2})
+
+    assert cache.get('a') == {'v': 1}
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_invalidate_drops_entries_and_stale_writes(tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path))
+    generation = cache.generation
+    cache.put('a', {'v': 1})
+    cache.invalidate()
+
+    assert cache.get('a') is None
+    cache.put('b', {'v': 2}, generation=generation)
+    assert cache.get('b') is None
+
+
+def test_invalidate_before_a_disk_write_lands_discards_it(tmp_path):
+    cache = ResultCache(max_entries=1, disk_dir=str(tmp_path))
+    write_disk = cache._write_disk
+
+    def invalidated_first(*args):
+        # A model reload finishes between put() releasing its lock and the disk write
+        cache.invalidate()
+        write_disk(*args)
+
+    cache._write_disk = invalidated_first
+    cache.put('a', {'v': 1})
+    cache._write_disk = write_disk
+    cache.put('b', {'v': 2})
+
+    assert cache.get('a') is None
+    assert cache.get('b') == {'v': 2}
+    assert not list(tmp_path.rglob('*.tmp'))
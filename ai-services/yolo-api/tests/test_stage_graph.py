@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.stage_graph import Stage, StageGraph, StageTimeoutError
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def test_independent_stages_overlap_and_dependencies_see_results(executor):
+    started = {}
+
+    def record(name, value, delay=0.1):
+        def fn(ctx):
+            started[name] = time.monotonic()
+            time.sleep(delay)
+            return value(ctx)
+        return fn
+
+    graph = StageGraph([
+        Stage('classify', record('classify', lambda ctx: ctx['image'] + '-herb')),
+        Stage('detect', record('detect', lambda ctx: 'boxes')),
+        Stage('quality', record('quality', lambda ctx: ctx['classify'] + '-quality', 0.0),
+              depends_on=('classify',)),
+    ], executor)
+
+    begin = time.monotonic()
+    outcome = graph.run({'image': 'img'})
+
+    assert outcome['quality'] == 'img-herb-quality'
+    assert outcome['detect'] == 'boxes'
+    assert abs(started['classify'] - started['detect']) < 0.05
+    assert started['quality'] >= started['classify'] + 0.1
+    assert time.monotonic() - begin < 0.2
+    assert set(outcome.timings) == {'classify', 'detect', 'quality'}
+    assert not outcome.partial
+
+
+def test_non_critical_timeout_yields_default_and_partial_result(executor):
+    release = threading.Event()
+    graph = StageGraph([
+        Stage('classify', lambda ctx: 'ginger'),
+        Stage('disease', lambda ctx: release.wait(5) or ['rot'], depends_on=('classify',),
+              timeout=0.05, critical=False, default=list),
+        Stage('report', lambda ctx: (ctx['classify'], ctx['disease']), depends_on=('classify', 'disease')),
+    ], executor)
+
+    outcome = graph.run()
+    release.set()
+
+    assert outcome['report'] == ('ginger', [])
+    assert outcome.failures == {'disease': 'timeout'}
+    assert outcome.partial
+
+
+def test_non_critical_failure_is_recorded(executor):
+    def broken(ctx):
+        raise RuntimeError('no detector')
+
+    outcome = StageGraph([Stage('detect', broken, critical=False, default=dict)], executor).run()
+
+    assert outcome['detect'] == {}
+    assert outcome.failures['detect'] == 'failed: no detector'
+
+
+def test_critical_failures_propagate(executor):
+    def broken(ctx):
+        raise ValueError('bad image')
+
+    with pytest.raises(ValueError, match='bad image'):
+        StageGraph([Stage('classify', broken)], executor).run()
+
+    release = threading.Event()
+    with pytest.raises(StageTimeoutError):
+        StageGraph([Stage('classify', lambda ctx: release.wait(5), timeout=0.05)], executor).run()
+    release.set()
+
+
+def test_cycles_are_rejected(executor):
+    with pytest.raises(ValueError, match='cycle'):
+        StageGraph([
+            Stage('a', lambda ctx: 1, depends_on=('b',)),
+            Stage('b', lambda ctx: 2, depends_on=('a',)),
+        ], executor)
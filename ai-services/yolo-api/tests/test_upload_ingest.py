@@ -0,0 +1,134 @@
+import base64
+import io
+import os
+
+import pytest
+from flask import Flask, jsonify, request
+from PIL import Image
+
+from utils.image_ingest import decode_image
+from utils.upload_ingest import (
+    SpooledUpload, SpoolingRequest, UploadBudget, decode_base64_to_upload
+)
+
+
+def _png(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (10, 200, 30)).save(buffer, 'PNG', compress_level=0)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def client(tmp_path):
+    class TestRequest(SpoolingRequest):
+        spool_threshold = 64 * 1024
+        memory_budget = 128 * 1024
+        json_body_limit = 1024 * 1024
+        spool_dir = str(tmp_path)
+
+    app = Flask(__name__)
+    app.request_class = TestRequest
+
+    @app.route('/upload', methods=['POST'])
+    def upload():
+        stream = request.files['image'].stream
+        ingested = decode_image(stream.getbuffer())
+        return jsonify({
+            'rolled': stream.rolled,
+            'path_exists': bool(stream.path) and os.path.exists(stream.path),
+            'shape': list(ingested.array.shape),
+            'stats': request.upload_stats()
+        })
+
+    @app.route('/json', methods=['POST'])
+    def json_upload():
+        request.reserve_body()
+        upload = decode_base64_to_upload(request.get_json()['image'], request.new_upload())
+        return jsonify({
+            'rolled': upload.rolled,
+            'shape': list(decode_image(upload.getbuffer()).array.shape),
+            'stats': request.upload_stats()
+        })
+
+    return app.test_client()
+
+
+def test_small_upload_stays_in_memory(client):
+    data = _png((16, 16))
+    response = client.post('/upload', data={'image': (io.BytesIO(data), 'a.png')})
+
+    body = response.get_json()
+    assert body['rolled'] is False
+    assert body['stats']['peak_memory_bytes'] == len(data)
+    assert body['stats']['spooled_bytes'] == 0
+
+
+def test_large_upload_is_spooled_and_memory_mapped(client, tmp_path):
+    data = _png((300, 300))
+    assert len(data) > 64 * 1024
+    response = client.post('/upload', data={'image': (io.BytesIO(data), 'big.png')})
+
+    body = response.get_json()
+    assert body['rolled'] is True
+    assert body['path_exists'] is True
+    assert body['shape'] == [300, 300, 3]
+    assert body['stats']['spooled_bytes'] == len(data)
+    assert body['stats']['peak_memory_bytes'] <= 64 * 1024
+    # The spool file is removed when the request closes its files
+    assert os.listdir(tmp_path) == []
+
+
+def test_budget_forces_rollover_before_threshold(tmp_path):
+    budget = UploadBudget(memory_limit=10)
+    upload = SpooledUpload(threshold=1024, spool_dir=str(tmp_path), budget=budget)
+    upload.write(b'12345')
+    assert not upload.rolled
+    upload.write(b'678901')
+    assert upload.rolled
+    assert budget.memory_bytes == 0
+    assert budget.spooled_bytes == 11
+    upload.close()
+
+
+def test_base64_is_decoded_incrementally(tmp_path, monkeypatch):
+    import utils.upload_ingest as upload_ingest
+    monkeypatch.setattr(upload_ingest, 'BASE64_CHUNK_CHARS', 8)
+
+    payload = os.urandom(101)
+    encoded = base64.b64encode(payload).decode('ascii')
+    text = 'data:image/png;base64,' + '\n'.join(encoded[i:i + 7] for i in range(0, len(encoded), 7))
+
+    upload = SpooledUpload(threshold=1024, spool_dir=str(tmp_path), budget=UploadBudget(4096))
+    decode_base64_to_upload(text, upload)
+    assert upload.read() == payload
+    upload.close()
+
+
+def test_json_bodies_over_the_memory_budget_are_accepted_and_spooled(client):
+    data = _png((300, 300))
+    encoded = base64.b64encode(data).decode('ascii')
+    assert 128 * 1024 < len(encoded) < 1024 * 1024
+
+    response = client.post('/json', json={'image': encoded})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['rolled'] is True
+    assert body['shape'] == [300, 300, 3]
+    assert body['stats']['spooled_bytes'] == len(data)
+
+
+def test_json_bodies_over_their_limit_are_rejected(client):
+    response = client.post('/json', json={'image': 'A' * (1024 * 1024)})
+
+    assert response.status_code == 413
+
+
+def test_chunked_json_bodies_are_capped_on_the_bytes_read(client):
+    # No Content-Length to check up front, as with Transfer-Encoding: chunked
+    body = b'{"image": "' + b'A' * (1024 * 1024) + b'"}'
+    response = client.post('/json', input_stream=io.BytesIO(body), content_type='application/json',
+                           headers={'Transfer-Encoding': 'chunked'},
+                           environ_overrides={'wsgi.input_terminated': True})
+
+    assert response.status_code == 413
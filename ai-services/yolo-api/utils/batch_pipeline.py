@@ -0,0 +1,181 @@
+# Thai Herbal GACP Platform v3.0 - Batch Analysis Pipeline
+# ===================================================================
+# Decodes and preprocesses uploads in a process pool while the main
+# thread runs classification and quality scoring on stacked batches.
+# ===================================================================
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import psutil
+
+from utils.image_ingest import DEFAULT_MAX_SIDE, decode_image, decode_image_file
+
+logger = logging.getLogger(__name__)
+
+# An upload is either its bytes or the path of a spooled file on local disk
+UploadPayload = Union[bytes, str]
+
+# Rough working-set cost of one image while it moves through the pipeline:
+# the upload itself, the decoded RGB array and the preprocessed copy.
+DEFAULT_PER_IMAGE_BYTES = 48 * 1024 * 1024
+
+# Per-process preprocessor and decode size, set once by the pool initializer
+_worker_processor = None
+_worker_max_side: Optional[int] = DEFAULT_MAX_SIDE
+
+
+def _init_worker(processor_factory: Callable[[], Any], max_side: Optional[int] = DEFAULT_MAX_SIDE):
+    global _worker_processor, _worker_max_side
+    _worker_processor = processor_factory()
+    _worker_max_side = max_side
+    initialize = getattr(_worker_processor, 'initialize', None)
+    if initialize is not None:
+        initialize()
+
+
+def _decode_and_preprocess(payload: UploadPayload) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    """Decode one upload and run the preprocessor (executed in a worker process)"""
+    try:
+        if isinstance(payload, str):
+            # Spooled upload: map the file here instead of piping its bytes
+            ingested = decode_image_file(payload, max_side=_worker_max_side)
+        else:
+            ingested = decode_image(payload, max_side=_worker_max_side)
+        return _worker_processor.preprocess_image(ingested.array), None
+    except Exception as e:
+        return None, str(e)
+
+
+class BatchPipeline:
+    """Parallel decode/preprocess stage feeding batched model calls
+
+    The model callbacks receive the ``models`` passed to analyze() first,
+    so every chunk of one batch runs on the same model version.
+    """
+
+    def __init__(self,
+                 processor_factory: Callable[[], Any],
+                 classify_batch: Callable[[Any, List[np.ndarray]], Sequence[Any]],
+                 quality_batch: Callable[[Any, List[Tuple[np.ndarray, str]]], Sequence[Any]],
+                 max_workers: Optional[int] = None,
+                 model_batch_size: int = 32,
+                 max_images: Optional[int] = None,
+                 memory_fraction: float = 0.5,
+                 per_image_bytes: int = DEFAULT_PER_IMAGE_BYTES,
+                 hard_limit: int = 500,
+                 max_side: Optional[int] = DEFAULT_MAX_SIDE):
+        self.processor_factory = processor_factory
+        self.classify_batch = classify_batch
+        self.quality_batch = quality_batch
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.model_batch_size = model_batch_size
+        self.configured_max_images = max_images
+        self.memory_fraction = memory_fraction
+        self.per_image_bytes = per_image_bytes
+        self.hard_limit = hard_limit
+        self.max_side = max_side
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def max_images(self) -> int:
+        """Largest batch accepted right now, sized by configuration or free memory"""
+        if self.configured_max_images:
+            return self.configured_max_images
+        available = psutil.virtual_memory().available * self.memory_fraction
+        return max(1, min(self.hard_limit, int(available // self.per_image_bytes)))
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # Spawned, not forked: forking a process that runs torch threads can deadlock
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.processor_factory, self.max_side)
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drop a broken pool so the next batch starts a fresh one"""
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def analyze(self, uploads: List[Tuple[str, UploadPayload]], models: Any = None) -> List[Dict[str, Any]]:
+        """Run classification and quality assessment for (filename, bytes-or-path) uploads"""
+        executor = self._get_executor()
+        chunksize = max(1, len(uploads) // (self.max_workers * 4))
+        decoded = executor.map(_decode_and_preprocess, [data for _, data in uploads], chunksize=chunksize)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(uploads)
+        pending: List[Tuple[int, np.ndarray]] = []
+
+        # Model chunks run as soon as enough images are decoded, so inference
+        # overlaps with the pool still working through the rest of the batch.
+        index = 0
+        try:
+            for index, (image, error) in enumerate(decoded):
+                filename = uploads[index][0]
+                if error is not None:
+                    results[index] = {'index': index, 'filename': filename, 'error': error, 'success': False}
+                    continue
+                pending.append((index, image))
+                if len(pending) >= self.model_batch_size:
+                    self._run_models(models, pending, uploads, results)
+                    pending = []
+        except BrokenProcessPool as e:
+            # A decode worker died (e.g. out of memory on a huge image); the
+            # images not decoded yet fail and the next batch gets a fresh pool
+            logger.error(f"Decode pool broke after {index} images: {str(e)}")
+            self._discard_executor(executor)
+            decoded_indices = {i for i, _ in pending}
+            for i, (filename, _) in enumerate(uploads):
+                if results[i] is None and i not in decoded_indices:
+                    results[i] = {'index': i, 'filename': filename,
+                                  'error': 'Image decoding worker crashed', 'success': False}
+        if pending:
+            self._run_models(models, pending, uploads, results)
+
+        return results
+
+    def _run_models(self,
+                    models: Any,
+                    chunk: List[Tuple[int, np.ndarray]],
+                    uploads: List[Tuple[str, UploadPayload]],
+                    results: List[Optional[Dict[str, Any]]]):
+        images = [image for _, image in chunk]
+        try:
+            predictions = list(self.classify_batch(models, images))
+            assessments = list(self.quality_batch(
+                models,
+                [(image, prediction.herb_type) for image, prediction in zip(images, predictions)]
+            ))
+        except Exception as e:
+            logger.error(f"Batch model call failed for {len(chunk)} images: {str(e)}")
+            for index, _ in chunk:
+                results[index] = {'index': index, 'filename': uploads[index][0], 'error': str(e), 'success': False}
+            return
+
+        for (index, _), prediction, assessment in zip(chunk, predictions, assessments):
+            results[index] = {
+                'index': index,
+                'filename': uploads[index][0],
+                'herb_prediction': prediction.to_dict(),
+                'quality_assessment': assessment.to_dict(),
+                'success': True
+            }
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
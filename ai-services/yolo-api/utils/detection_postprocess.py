@@ -0,0 +1,138 @@
+# Thai Herbal GACP Platform v3.0 - Detection Post-processing
+# ===================================================================
+# Converts YOLO results to columnar NumPy arrays in one transfer per
+# image (boxes.data holds xyxy, confidence and class for every box), so
+# confidence filtering, areas and class-name lookup are array operations
+# instead of per-box tensor calls. Results can be emitted either as the
+# classic list of objects or as a compact columnar payload.
+# ===================================================================
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Sequence, Union
+
+import numpy as np
+
+DETECTION_FORMAT_OBJECTS = 'objects'
+DETECTION_FORMAT_COLUMNAR = 'columnar'
+DETECTION_FORMATS = (DETECTION_FORMAT_OBJECTS, DETECTION_FORMAT_COLUMNAR)
+
+
+def _to_numpy(value: Any) -> np.ndarray:
+    # torch tensors (possibly on GPU) expose .cpu(); NumPy arrays pass through
+    if hasattr(value, 'cpu'):
+        value = value.cpu()
+    if hasattr(value, 'numpy'):
+        value = value.numpy()
+    return np.asarray(value)
+
+
+def class_name_table(names: Union[Mapping[int, str], Sequence[str]]) -> np.ndarray:
+    """Object array indexed by class id, built from a YOLO ``names`` dict or list"""
+    if isinstance(names, Mapping):
+        table = np.empty(max(names, default=-1) + 1, dtype=object)
+        table[:] = 'unknown'
+        for class_id, name in names.items():
+            table[int(class_id)] = name
+        return table
+    return np.asarray(list(names), dtype=object)
+
+
+@dataclass
+class DetectionColumns:
+    """Detections of one image as parallel arrays"""
+    class_ids: np.ndarray
+    confidences: np.ndarray
+    boxes: np.ndarray
+    areas: np.ndarray
+    class_names: np.ndarray
+
+    @classmethod
+    def empty(cls) -> 'DetectionColumns':
+        return cls(
+            class_ids=np.zeros(0, dtype=np.int32),
+            confidences=np.zeros(0, dtype=np.float32),
+            boxes=np.zeros((0, 4), dtype=np.float32),
+            areas=np.zeros(0, dtype=np.float32),
+            class_names=np.zeros(0, dtype=object)
+        )
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Per-object dicts in the original response layout"""
+        # tolist() converts each column in C; the zip only assembles dicts
+        return [
+            {'class_name': name, 'confidence': confidence, 'bbox': box, 'area': area}
+            for name, confidence, box, area in zip(
+                self.class_names.tolist(), self.confidences.tolist(),
+                self.boxes.tolist(), self.areas.tolist()
+            )
+        ]
+
+    def to_columnar(self, decimals: int = 2) -> Dict[str, Any]:
+        """Compact payload: class names once, then one flat list per column"""
+        classes, class_index = np.unique(self.class_names.astype(str), return_inverse=True)
+        return {
+            'classes': classes.tolist(),
+            'class_index': class_index.astype(np.int32).tolist(),
+            'confidence': np.round(self.confidences, 4).tolist(),
+            'bbox_xyxy': np.round(self.boxes, decimals).reshape(-1).tolist(),
+            'area': np.round(self.areas, decimals).tolist()
+        }
+
+
+def boxes_to_columns(boxes: Any,
+                     class_names: np.ndarray,
+                     min_confidence: float = 0.0) -> DetectionColumns:
+    """Convert an ultralytics ``Boxes`` object (or an (N, 6) array) to columns"""
+    if boxes is None:
+        return DetectionColumns.empty()
+
+    # Columns are xyxy, [track id,] confidence, class
+    data = _to_numpy(getattr(boxes, 'data', boxes)).astype(np.float32, copy=False)
+    if data.ndim != 2 or data.shape[0] == 0:
+        return DetectionColumns.empty()
+
+    xyxy = data[:, :4]
+    confidences = data[:, -2]
+    class_ids = data[:, -1].astype(np.int32)
+
+    keep = confidences >= min_confidence
+    if not keep.all():
+        xyxy, confidences, class_ids = xyxy[keep], confidences[keep], class_ids[keep]
+
+    widths = np.clip(xyxy[:, 2] - xyxy[:, 0], 0, None)
+    heights = np.clip(xyxy[:, 3] - xyxy[:, 1], 0, None)
+
+    known = (class_ids >= 0) & (class_ids < len(class_names))
+    names = np.full(len(class_ids), 'unknown', dtype=object)
+    names[known] = class_names[class_ids[known]]
+
+    return DetectionColumns(
+        class_ids=class_ids,
+        confidences=confidences,
+        boxes=xyxy,
+        areas=widths * heights,
+        class_names=names
+    )
+
+
+def results_to_columns(results: Sequence[Any],
+                       class_names: np.ndarray,
+                       min_confidence: float = 0.0) -> DetectionColumns:
+    """Merge the boxes of several YOLO results into one set of columns"""
+    columns = [boxes_to_columns(getattr(result, 'boxes', None), class_names, min_confidence)
+               for result in results]
+    columns = [c for c in columns if len(c)]
+    if not columns:
+        return DetectionColumns.empty()
+    if len(columns) == 1:
+        return columns[0]
+    return DetectionColumns(
+        class_ids=np.concatenate([c.class_ids for c in columns]),
+        confidences=np.concatenate([c.confidences for c in columns]),
+        boxes=np.concatenate([c.boxes for c in columns]),
+        areas=np.concatenate([c.areas for c in columns]),
+        class_names=np.concatenate([c.class_names for c in columns])
+    )
@@ -0,0 +1,355 @@
+# Thai Herbal GACP Platform v3.0 - CPU Inference Backends
+# ===================================================================
+# Pluggable execution backends for models served by ModelManager.
+# A model can run eagerly, as a frozen TorchScript graph or through
+# ONNX Runtime, optionally with int8 dynamic quantization. Exported
+# artifacts are cached on disk and every backend is warmed up once at
+# load time so the first request does not pay for graph optimisation.
+# ===================================================================
+
+import inspect
+import logging
+from abc import ABC, abstractmethod
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+BACKEND_EAGER = 'eager'
+BACKEND_TORCHSCRIPT = 'torchscript'
+BACKEND_ONNX = 'onnx'
+BACKENDS = (BACKEND_EAGER, BACKEND_TORCHSCRIPT, BACKEND_ONNX)
+
+PRECISION_FP32 = 'fp32'
+PRECISION_INT8 = 'int8'
+PRECISIONS = (PRECISION_FP32, PRECISION_INT8)
+
+_threads_configured = False
+
+
+def configure_threads(intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None):
+    """Set PyTorch CPU thread pools (inter-op can only be set once per process)"""
+    global _threads_configured
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads and not _threads_configured:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            logger.warning(f"Could not set inter-op threads: {str(e)}")
+    _threads_configured = True
+
+
+def _is_ultralytics(model: Any) -> bool:
+    return hasattr(model, 'export') and hasattr(model, 'predictor') and hasattr(model, 'names')
+
+
+class InferenceBackend(ABC):
+    """A loaded, warmed-up model behind a uniform callable interface"""
+
+    name = BACKEND_EAGER
+
+    def __init__(self, model_name: str, precision: str = PRECISION_FP32, threads: Optional[int] = None,
+                 artifact_name: Optional[str] = None):
+        self.model_name = model_name
+        self.artifact_name = artifact_name or model_name
+        self.precision = precision
+        self.threads = threads
+        self.artifact: Optional[str] = None
+        self.load_time = 0.0
+        self.warmup_time = 0.0
+
+    @abstractmethod
+    def __call__(self, inputs: Any) -> Any:
+        """Run the model on one batch of inputs"""
+
+    def warmup(self, example_input: Any, runs: int = 2):
+        started = time.perf_counter()
+        for _ in range(runs):
+            self(example_input)
+        self.warmup_time = time.perf_counter() - started
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'precision': self.precision,
+            'threads': self.threads or torch.get_num_threads(),
+            'artifact': self.artifact,
+            'load_time_s': round(self.load_time, 4),
+            'warmup_time_s': round(self.warmup_time, 4)
+        }
+
+
+# -------------------------------------------------------------------
+# Plain torch.nn.Module models
+# -------------------------------------------------------------------
+
+def _quantize_dynamic(module: torch.nn.Module) -> torch.nn.Module:
+    # Dynamic int8 covers Linear/LSTM/GRU weights; convolutions stay fp32
+    return torch.ao.quantization.quantize_dynamic(
+        module, {torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU}, dtype=torch.qint8
+    )
+
+
+class EagerTorchBackend(InferenceBackend):
+    name = BACKEND_EAGER
+
+    def __init__(self, model_name: str, module: torch.nn.Module, precision: str = PRECISION_FP32,
+                 threads: Optional[int] = None):
+        super().__init__(model_name, precision, threads)
+        started = time.perf_counter()
+        module = module.eval()
+        self.module = _quantize_dynamic(module) if precision == PRECISION_INT8 else module
+        self.load_time = time.perf_counter() - started
+
+    def __call__(self, inputs):
+        with torch.inference_mode():
+            return self.module(torch.as_tensor(inputs))
+
+
+class TorchScriptBackend(InferenceBackend):
+    name = BACKEND_TORCHSCRIPT
+
+    def __init__(self, model_name: str, module: Optional[torch.nn.Module], example_input: Any,
+                 export_dir: str, precision: str = PRECISION_FP32, threads: Optional[int] = None,
+                 artifact_name: Optional[str] = None):
+        super().__init__(model_name, precision, threads, artifact_name)
+        started = time.perf_counter()
+        self.artifact = os.path.join(export_dir, f"{self.artifact_name}.{precision}.torchscript.pt")
+        if not os.path.exists(self.artifact):
+            if module is None:
+                raise FileNotFoundError(f"No TorchScript artifact at {self.artifact} and no module to export")
+            self._export(module, example_input)
+        self.graph = torch.jit.load(self.artifact, map_location='cpu')
+        self.graph = torch.jit.optimize_for_inference(torch.jit.freeze(self.graph.eval())) \
+            if precision == PRECISION_FP32 else self.graph.eval()
+        self.load_time = time.perf_counter() - started
+
+    def _export(self, module: torch.nn.Module, example_input: Any):
+        module = module.eval()
+        if self.precision == PRECISION_INT8:
+            module = _quantize_dynamic(module)
+        with torch.no_grad():
+            traced = torch.jit.trace(module, torch.as_tensor(example_input))
+        os.makedirs(os.path.dirname(self.artifact), exist_ok=True)
+        tmp_path = f"{self.artifact}.tmp"
+        torch.jit.save(traced, tmp_path)
+        os.replace(tmp_path, self.artifact)
+        logger.info(f"Exported {self.model_name} to TorchScript ({self.precision}): {self.artifact}")
+
+    def __call__(self, inputs):
+        with torch.inference_mode():
+            return self.graph(torch.as_tensor(inputs))
+
+
+class OnnxBackend(InferenceBackend):
+    name = BACKEND_ONNX
+
+    def __init__(self, model_name: str, module: Optional[torch.nn.Module], example_input: Any,
+                 export_dir: str, precision: str = PRECISION_FP32, threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None, artifact_name: Optional[str] = None):
+        super().__init__(model_name, precision, threads, artifact_name)
+        import onnxruntime as ort
+
+        started = time.perf_counter()
+        fp32_path = os.path.join(export_dir, f"{self.artifact_name}.fp32.onnx")
+        self.artifact = fp32_path
+        if not os.path.exists(fp32_path):
+            if module is None:
+                raise FileNotFoundError(f"No ONNX artifact at {fp32_path} and no module to export")
+            self._export(module, example_input, fp32_path)
+        if precision == PRECISION_INT8:
+            self.artifact = os.path.join(export_dir, f"{self.artifact_name}.int8.onnx")
+            if not os.path.exists(self.artifact):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(fp32_path, self.artifact, weight_type=QuantType.QInt8)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(self.artifact, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.load_time = time.perf_counter() - started
+
+    def _export(self, module: torch.nn.Module, example_input: Any, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        options = {}
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+            # Newer torch defaults to the dynamo exporter; keep the TorchScript one
+            options['dynamo'] = False
+        torch.onnx.export(
+            module.eval(),
+            torch.as_tensor(example_input),
+            tmp_path,
+            input_names=['input'],
+            output_names=['output'],
+            dynamic_axes={'input': {0: 'batch'}, 'output': {0: 'batch'}},
+            opset_version=17,
+            **options
+        )
+        os.replace(tmp_path, path)
+        logger.info(f"Exported {self.model_name} to ONNX: {path}")
+
+    def __call__(self, inputs):
+        if isinstance(inputs, torch.Tensor):
+            inputs = inputs.detach().cpu().numpy()
+        outputs = self.session.run(None, {self.input_name: np.ascontiguousarray(inputs, dtype=np.float32)})
+        return torch.from_numpy(outputs[0])
+
+
+# -------------------------------------------------------------------
+# Ultralytics YOLO models (export handled by ultralytics itself)
+# -------------------------------------------------------------------
+
+class UltralyticsBackend(InferenceBackend):
+    """YOLO detector re-loaded from an ultralytics TorchScript/ONNX export
+
+    ultralytics keeps pre/post-processing (letterboxing, NMS, class names)
+    identical across formats, so the wrapped model is a drop-in
+    replacement for the eager one.
+    """
+
+    def __init__(self, model_name: str, model: Any, backend: str, export_dir: str,
+                 precision: str = PRECISION_FP32, threads: Optional[int] = None, imgsz: int = 640,
+                 artifact_name: Optional[str] = None):
+        super().__init__(model_name, precision, threads, artifact_name)
+        self.name = backend
+        started = time.perf_counter()
+        if backend == BACKEND_EAGER:
+            self.model = model
+        else:
+            self.artifact = self._export(model, backend, export_dir, imgsz)
+            from ultralytics import YOLO
+            self.model = YOLO(self.artifact, task=getattr(model, 'task', 'detect'))
+        self.names = getattr(self.model, 'names', getattr(model, 'names', {}))
+        self.load_time = time.perf_counter() - started
+
+    def _export(self, model: Any, backend: str, export_dir: str, imgsz: int) -> str:
+        suffix = 'torchscript' if backend == BACKEND_TORCHSCRIPT else 'onnx'
+        target = os.path.join(export_dir, f"{self.artifact_name}.{self.precision}.{suffix}")
+        if os.path.exists(target):
+            return target
+
+        exported = model.export(format=suffix, imgsz=imgsz, dynamic=True, optimize=False)
+        os.makedirs(export_dir, exist_ok=True)
+        if backend == BACKEND_ONNX and self.precision == PRECISION_INT8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(exported, target, weight_type=QuantType.QInt8)
+        else:
+            os.replace(exported, target)
+        logger.info(f"Exported {self.model_name} via ultralytics ({backend}, {self.precision}): {target}")
+        return target
+
+    def __call__(self, inputs, **kwargs):
+        return self.model(inputs, verbose=False, **kwargs)
+
+
+def create_backend(model_name: str,
+                   model: Any,
+                   backend: str = BACKEND_EAGER,
+                   precision: str = PRECISION_FP32,
+                   example_input: Any = None,
+                   export_dir: str = 'models/optimized',
+                   threads: Optional[int] = None,
+                   inter_op_threads: Optional[int] = None,
+                   warmup: bool = True,
+                   artifact_name: Optional[str] = None) -> InferenceBackend:
+    """Build (exporting if needed) and warm up the backend for one model
+
+    Exported graphs are cached in ``export_dir`` under ``artifact_name``
+    (defaults to the model name); include the model version in it so new
+    weights are re-exported.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+    configure_threads(threads, inter_op_threads)
+
+    if _is_ultralytics(model):
+        # ultralytics quantizes nothing itself; int8 comes from ONNX Runtime
+        if precision == PRECISION_INT8 and backend != BACKEND_ONNX:
+            raise ValueError("int8 YOLO models are only supported through the ONNX backend")
+        instance = UltralyticsBackend(model_name, model, backend, export_dir, precision, threads,
+                                      artifact_name=artifact_name)
+        if warmup:
+            instance.warmup(np.zeros((640, 640, 3), dtype=np.uint8))
+        return instance
+
+    if not isinstance(model, torch.nn.Module):
+        raise TypeError(f"Model '{model_name}' is not a torch module or ultralytics model")
+    if backend != BACKEND_EAGER and example_input is None:
+        raise ValueError(f"An example input is required to export '{model_name}' to {backend}")
+
+    if backend == BACKEND_EAGER:
+        instance = EagerTorchBackend(model_name, model, precision, threads)
+    elif backend == BACKEND_TORCHSCRIPT:
+        instance = TorchScriptBackend(model_name, model, example_input, export_dir, precision, threads,
+                                      artifact_name=artifact_name)
+    else:
+        instance = OnnxBackend(model_name, model, example_input, export_dir, precision, threads,
+                               inter_op_threads, artifact_name=artifact_name)
+
+    if warmup and example_input is not None:
+        instance.warmup(example_input)
+    return instance
+
+
+class BackendRegistry:
+    """Optimized backends per model name, consulted before the eager ModelManager model"""
+
+    def __init__(self, backend: str = BACKEND_EAGER, precision: str = PRECISION_FP32,
+                 export_dir: str = 'models/optimized', threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None):
+        self.backend = backend
+        self.precision = precision
+        self.export_dir = export_dir
+        self.threads = threads
+        self.inter_op_threads = inter_op_threads
+        self._backends: Dict[str, InferenceBackend] = {}
+        self._lock = threading.Lock()
+
+    def load(self, model_name: str, model: Any, example_input: Any = None,
+             version: Optional[str] = None) -> InferenceBackend:
+        artifact_name = model_name
+        if version:
+            safe_version = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(version))
+            artifact_name = f"{model_name}-{safe_version}"
+        instance = create_backend(
+            model_name, model,
+            backend=self.backend,
+            precision=self.precision,
+            example_input=example_input,
+            export_dir=self.export_dir,
+            threads=self.threads,
+            inter_op_threads=self.inter_op_threads,
+            artifact_name=artifact_name
+        )
+        with self._lock:
+            self._backends[model_name] = instance
+        logger.info(f"Model {model_name} served by {instance.name} ({instance.precision}), "
+                    f"loaded in {instance.load_time:.2f}s, warm-up {instance.warmup_time:.2f}s")
+        return instance
+
+    def get(self, model_name: str) -> Optional[InferenceBackend]:
+        return self._backends.get(model_name)
+
+    def clear(self):
+        with self._lock:
+            self._backends.clear()
+
+    def names(self) -> List[str]:
+        return list(self._backends)
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        return {name: instance.describe() for name, instance in self._backends.items()}
@@ -0,0 +1,334 @@
+# Thai Herbal GACP Platform v3.0 - Analysis Job Queue
+# ===================================================================
+# SQLite-backed job store and background worker pool for large batch
+# analyses. Uploads are spooled to disk, workers claim images in chunks
+# and results are stored per image so clients can page through them
+# while the job is still running.
+# ===================================================================
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+
+ITEM_PENDING = 'pending'
+ITEM_RUNNING = 'running'
+ITEM_DONE = 'done'
+ITEM_FAILED = 'failed'
+
+# Receives (filename, path of the spooled image) pairs
+ProcessFunction = Callable[[List[Tuple[str, str]]], List[Dict[str, Any]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    filename TEXT,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_job_items_status ON job_items (status, job_id, idx);
+"""
+
+
+class JobStore:
+    """Durable job and per-image result storage on a local SQLite file"""
+
+    def __init__(self, db_path: str, storage_dir: str):
+        self.db_path = db_path
+        self.storage_dir = storage_dir
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        os.makedirs(storage_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create_job(self, kind: str, uploads: List[Tuple[str, Any]]) -> str:
+        """Spool (filename, file-like) uploads to disk and enqueue them as one job"""
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.storage_dir, job_id)
+        os.makedirs(job_dir)
+
+        try:
+            rows = []
+            for idx, (filename, stream) in enumerate(uploads):
+                path = os.path.join(job_dir, str(idx))
+                with open(path, 'wb') as out:
+                    shutil.copyfileobj(stream, out, 1024 * 1024)
+                rows.append((job_id, idx, filename, path, ITEM_PENDING))
+
+            now = datetime.now().isoformat()
+            with self._connect() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    conn.execute(
+                        'INSERT INTO jobs (id, kind, status, total, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                        (job_id, kind, JOB_PENDING, len(rows), now, now)
+                    )
+                    conn.executemany(
+                        'INSERT INTO job_items (job_id, idx, filename, path, status) VALUES (?, ?, ?, ?, ?)',
+                        rows
+                    )
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+        except BaseException:
+            # Nothing references the spooled files unless the job was committed
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return job_id
+
+    def claim_items(self, limit: int) -> List[sqlite3.Row]:
+        """Atomically claim up to ``limit`` pending images of the oldest job"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            first = conn.execute(
+                'SELECT i.job_id FROM job_items i JOIN jobs j ON j.id = i.job_id '
+                'WHERE i.status = ? ORDER BY j.created_at, i.idx LIMIT 1',
+                (ITEM_PENDING,)
+            ).fetchone()
+            if first is None:
+                conn.execute('COMMIT')
+                return []
+
+            items = conn.execute(
+                'SELECT job_id, idx, filename, path FROM job_items '
+                'WHERE job_id = ? AND status = ? ORDER BY idx LIMIT ?',
+                (first['job_id'], ITEM_PENDING, limit)
+            ).fetchall()
+            conn.executemany(
+                'UPDATE job_items SET status = ? WHERE job_id = ? AND idx = ?',
+                [(ITEM_RUNNING, item['job_id'], item['idx']) for item in items]
+            )
+            conn.execute(
+                'UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?',
+                (JOB_RUNNING, datetime.now().isoformat(), first['job_id'], JOB_PENDING)
+            )
+            conn.execute('COMMIT')
+            return items
+
+    def complete_items(self, job_id: str, results: List[Tuple[int, Dict[str, Any]]]) -> bool:
+        """Store per-image results and roll the job counters forward; True once the job is done
+
+        False as well when the job was purged while the chunk was running.
+        """
+        succeeded = sum(1 for _, result in results if result.get('success'))
+        failed = len(results) - succeeded
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'UPDATE job_items SET status = ?, result = ? WHERE job_id = ? AND idx = ?',
+                [
+                    (ITEM_DONE if result.get('success') else ITEM_FAILED, json.dumps(result), job_id, idx)
+                    for idx, result in results
+                ]
+            )
+            conn.execute(
+                'UPDATE jobs SET completed = completed + ?, failed = failed + ?, updated_at = ?, '
+                'status = CASE WHEN completed + failed + ? + ? >= total THEN ? ELSE status END '
+                'WHERE id = ?',
+                (succeeded, failed, datetime.now().isoformat(), succeeded, failed, JOB_COMPLETED, job_id)
+            )
+            row = conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            conn.execute('COMMIT')
+        return row is not None and row['status'] == JOB_COMPLETED
+
+    def requeue_running(self) -> int:
+        """Return images left running by a crashed worker to the queue"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE job_items SET status = ? WHERE status = ?', (ITEM_PENDING, ITEM_RUNNING)
+            )
+            return cursor.rowcount
+
+    def purge_expired(self, ttl_seconds: float) -> int:
+        """Delete jobs not updated for ``ttl_seconds``, with their results and spooled images
+
+        Running jobs update their row with every finished chunk, so only
+        finished jobs and ones abandoned that long are removed.
+        """
+        cutoff = (datetime.now() - timedelta(seconds=ttl_seconds)).isoformat()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            expired = [row['id'] for row in conn.execute('SELECT id FROM jobs WHERE updated_at < ?', (cutoff,))]
+            conn.executemany('DELETE FROM job_items WHERE job_id = ?', [(job_id,) for job_id in expired])
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id in expired])
+            conn.execute('COMMIT')
+        for job_id in expired:
+            shutil.rmtree(os.path.join(self.storage_dir, job_id), ignore_errors=True)
+        return len(expired)
+
+    def get_job(self, job_id: str, offset: int = 0, limit: int = 50) -> Optional[Dict[str, Any]]:
+        """Job status plus one page of per-image entries ordered by image index
+
+        Pages are addressed by image index, so a page stays stable while the
+        job runs; images that are not finished yet appear with their status
+        only and can be fetched again later.
+        """
+        with self._connect() as conn:
+            job = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = conn.execute(
+                'SELECT idx, filename, status, result FROM job_items '
+                'WHERE job_id = ? AND idx >= ? ORDER BY idx LIMIT ?',
+                (job_id, offset, limit)
+            ).fetchall()
+
+        results = []
+        for row in rows:
+            if row['result'] is not None:
+                results.append(json.loads(row['result']))
+            else:
+                results.append({'index': row['idx'], 'filename': row['filename'], 'status': row['status']})
+
+        finished = job['completed'] + job['failed']
+        next_offset = offset + limit
+        return {
+            'job_id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'total_images': job['total'],
+            'processed_images': finished,
+            'successful_analyses': job['completed'],
+            'failed_analyses': job['failed'],
+            'progress': finished / job['total'] if job['total'] else 1.0,
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at'],
+            'offset': offset,
+            'limit': limit,
+            'next_offset': next_offset if next_offset < job['total'] else None,
+            'results': results
+        }
+
+
+class JobWorkerPool:
+    """Background threads that drain the job store through a batch function
+
+    With ``job_ttl`` set, a sweeper thread purges jobs (and their results)
+    that have not been updated for that many seconds, every
+    ``sweep_interval`` seconds.
+    """
+
+    def __init__(self, store: JobStore, process_fn: ProcessFunction, workers: int = 2, claim_size: int = 16,
+                 poll_interval: float = 0.5, job_ttl: Optional[float] = None, sweep_interval: float = 300.0):
+        self.store = store
+        self.process_fn = process_fn
+        self.workers = workers
+        self.claim_size = claim_size
+        self.poll_interval = poll_interval
+        self.job_ttl = job_ttl
+        self.sweep_interval = sweep_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        requeued = self.store.requeue_running()
+        if requeued:
+            logger.info(f"Requeued {requeued} unfinished job images")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.job_ttl:
+            thread = threading.Thread(target=self._sweep, name="job-sweeper", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """Wake idle workers after a new job was submitted"""
+        self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                items = self.store.claim_items(self.claim_size)
+                if not items:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+                self._process(items)
+            except Exception as e:
+                # e.g. a busy timeout on the job database; keep the worker alive
+                logger.error(f"Job worker iteration failed: {str(e)}")
+                self._stopping.wait(self.poll_interval)
+
+    def _sweep(self):
+        while True:
+            try:
+                purged = self.store.purge_expired(self.job_ttl)
+                if purged:
+                    logger.info(f"Purged {purged} expired analysis jobs")
+            except Exception as e:
+                logger.error(f"Job sweep failed: {str(e)}")
+            if self._stopping.wait(self.sweep_interval):
+                return
+
+    def _process(self, items: List[sqlite3.Row]):
+        job_id = items[0]['job_id']
+        # Hand over paths so decoding workers map the spooled files directly
+        uploads = [(item['filename'], item['path']) for item in items]
+
+        try:
+            outputs = self.process_fn(uploads)
+        except Exception as e:
+            logger.error(f"Job {job_id} chunk failed: {str(e)}")
+            outputs = [{'filename': item['filename'], 'error': str(e), 'success': False} for item in items]
+
+        results = []
+        for item, output in zip(items, outputs):
+            output['index'] = item['idx']
+            results.append((item['idx'], output))
+        if self.store.complete_items(job_id, results):
+            shutil.rmtree(os.path.join(self.store.storage_dir, job_id), ignore_errors=True)
+            return
+
+        for item in items:
+            try:
+                os.remove(item['path'])
+            except OSError:
+                pass
@@ -0,0 +1,135 @@
+# Thai Herbal GACP Platform v3.0 - Service Metrics
+# ===================================================================
+# Prometheus metrics for the AI service. Request and pipeline stage
+# latencies are histograms updated on the hot path (one lock-free
+# observe per event). Everything that already has its own counters -
+# scheduler queues, caches, the model pool, memory - is read only when
+# /metrics is scraped, through callbacks registered here.
+# ===================================================================
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Sequence, Tuple, Union
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import PlatformCollector, ProcessCollector
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+# A callback returns one value, or a mapping of label values to values
+SampleValues = Union[float, Dict[Tuple[str, ...], float]]
+# Histogram callbacks map label values to ({observed value: count}, sum of observations)
+HistogramValues = Dict[Tuple[str, ...], Tuple[Dict[float, int], float]]
+
+
+def _samples(values: SampleValues) -> Iterator[Tuple[Tuple[str, ...], float]]:
+    if isinstance(values, dict):
+        for labels, value in values.items():
+            yield tuple(str(label) for label in labels), float(value)
+    elif values is not None:
+        yield (), float(values)
+
+
+class _CallbackCollector:
+    """Builds metric families from registered callbacks at scrape time"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def collect(self):
+        for kind, name, documentation, labelnames, callback, extra in self.callbacks:
+            try:
+                values = callback()
+            except Exception as e:
+                logger.warning(f"Metric callback {name} failed: {str(e)}")
+                continue
+            if kind == 'histogram':
+                yield self._histogram(name, documentation, labelnames, values, extra)
+                continue
+            family_type = GaugeMetricFamily if kind == 'gauge' else CounterMetricFamily
+            family = family_type(name, documentation, labels=labelnames)
+            for labels, value in _samples(values):
+                family.add_metric(labels, value)
+            yield family
+
+    @staticmethod
+    def _histogram(name: str, documentation: str, labelnames: Sequence[str],
+                   values: HistogramValues, bounds: Sequence[float]) -> HistogramMetricFamily:
+        family = HistogramMetricFamily(name, documentation, labels=labelnames)
+        for labels, (counts, total) in values.items():
+            buckets = []
+            for bound in bounds:
+                buckets.append((str(float(bound)), sum(c for v, c in counts.items() if float(v) <= bound)))
+            buckets.append(('+Inf', sum(counts.values())))
+            family.add_metric([str(label) for label in labels], buckets, total)
+        return family
+
+
+class ServiceMetrics:
+    """Metrics registry for one service, rendered in the Prometheus text format"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.registry = CollectorRegistry(auto_describe=True)
+        self.request_latency = Histogram(
+            'http_request_duration_seconds', 'HTTP request latency by endpoint',
+            ['method', 'endpoint', 'status'], namespace=namespace,
+            buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.stage_latency = Histogram(
+            'pipeline_stage_duration_seconds', 'Latency of one analysis pipeline stage',
+            ['stage'], namespace=namespace, buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        ProcessCollector(registry=self.registry)
+        PlatformCollector(registry=self.registry)
+        self._callbacks = _CallbackCollector()
+        self.registry.register(self._callbacks)
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}"
+
+    def observe_request(self, method: str, endpoint: str, status: int, seconds: float):
+        self.request_latency.labels(method, endpoint, str(status)).observe(seconds)
+
+    def observe_stage(self, stage: str, seconds: float):
+        self.stage_latency.labels(stage).observe(seconds)
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Time the enclosed block as pipeline stage ``stage``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_latency.labels(stage).observe(time.perf_counter() - started)
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], SampleValues],
+              labelnames: Sequence[str] = ()):
+        """Report the callback's current value(s) as a gauge on every scrape"""
+        self._callbacks.callbacks.append(('gauge', self._name(name), documentation, list(labelnames), callback, None))
+
+    def counter(self, name: str, documentation: str, callback: Callable[[], SampleValues],
+                labelnames: Sequence[str] = ()):
+        """Expose an existing monotonic count (e.g. cache hits) as a counter"""
+        self._callbacks.callbacks.append(('counter', self._name(name), documentation, list(labelnames), callback, None))
+
+    def histogram(self, name: str, documentation: str, callback: Callable[[], HistogramValues],
+                  labelnames: Sequence[str] = (), buckets: Sequence[float] = BATCH_SIZE_BUCKETS):
+        """Expose an existing value->count tally (e.g. batch sizes) as a histogram"""
+        self._callbacks.callbacks.append(
+            ('histogram', self._name(name), documentation, list(labelnames), callback, tuple(buckets))
+        )
+
+    def render(self) -> Tuple[bytes, str]:
+        """Scrape body and its content type"""
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+
+def stats_values(stats: Dict[str, Dict[str, Any]], key: str) -> Dict[Tuple[str, ...], float]:
+    """Pick ``key`` from a {label: stats-dict} mapping, e.g. scheduler metrics per model"""
+    return {(label,): values[key] for label, values in stats.items() if key in values}
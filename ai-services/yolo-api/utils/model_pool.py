@@ -0,0 +1,220 @@
+# Thai Herbal GACP Platform v3.0 - Lazy Model Pool
+# ===================================================================
+# Models are loaded on first use instead of at startup. Pinned models
+# (the shared classifier/detector) stay resident; everything else, such
+# as the per-herb disease models, is evicted least-recently-used first
+# once the pool's estimated footprint exceeds its memory ceiling.
+# Weight files are memory-mapped so worker processes that load the same
+# file share its pages through the OS page cache.
+# ===================================================================
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DISEASE_KEY_PREFIX = 'disease:'
+
+
+def disease_model_key(herb_type: str) -> str:
+    return f"{DISEASE_KEY_PREFIX}{herb_type}"
+
+
+def load_torch_model(path: str, map_location: str = 'cpu') -> Any:
+    """Load a pickled torch model with its tensor storages memory-mapped from ``path``"""
+    import torch
+
+    # mmap needs torch >= 2.1 (pinned in requirements.txt)
+    try:
+        return torch.load(path, map_location=map_location, mmap=True, weights_only=False)
+    except RuntimeError as e:
+        # Legacy (non-zipfile) checkpoints cannot be mapped
+        logger.warning(f"Cannot memory-map {path}, loading into RAM: {str(e)}")
+        return torch.load(path, map_location=map_location)
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """Approximate resident size of a model from its tensors or exported artifact"""
+    parameters = getattr(model, 'parameters', None)
+    if callable(parameters):
+        try:
+            size = sum(p.numel() * p.element_size() for p in model.parameters())
+            size += sum(b.numel() * b.element_size() for b in model.buffers())
+            return size
+        except Exception:
+            pass
+
+    artifact = getattr(model, 'artifact', None)
+    if isinstance(artifact, str) and os.path.exists(artifact):
+        return os.path.getsize(artifact)
+
+    # Wrappers (ultralytics YOLO, inference backends) keep the network in .model/.module
+    for attr in ('model', 'module'):
+        inner = getattr(model, attr, None)
+        if inner is not None and inner is not model:
+            return estimate_model_bytes(inner)
+    return 0
+
+
+class _PoolEntry:
+    __slots__ = ('model', 'size', 'loaded_at', 'last_used', 'uses')
+
+    def __init__(self, model: Any, size: int):
+        self.model = model
+        self.size = size
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+
+
+class ModelPool:
+    """On-demand model cache with LRU eviction under a memory ceiling
+
+    A loader returning None (no such model) is remembered for
+    ``missing_ttl`` seconds, so requests for a model that does not exist
+    do not hit the loader every time.
+    """
+
+    def __init__(self,
+                 loader: Callable[[str], Any],
+                 memory_limit_bytes: int,
+                 pinned: Optional[Callable[[str], bool]] = None,
+                 size_fn: Callable[[Any], int] = estimate_model_bytes,
+                 missing_ttl: float = 60.0):
+        self.loader = loader
+        self.memory_limit_bytes = memory_limit_bytes
+        self.pinned = pinned or (lambda key: False)
+        self.size_fn = size_fn
+        self.missing_ttl = missing_ttl
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._missing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.evictions = 0
+        self.load_time = 0.0
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    def get(self, key: str) -> Any:
+        """Return the model for ``key``, loading it (once, even under concurrency) on a miss"""
+        model = self._lookup(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another thread may have finished loading while we waited
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            if self._known_missing(key):
+                return None
+
+            start = time.time()
+            try:
+                model = self.loader(key)
+            except Exception:
+                with self._lock:
+                    self.load_failures += 1
+                raise
+            if model is None:
+                with self._lock:
+                    self._missing[key] = time.time()
+                return None
+            size = self.size_fn(model)
+
+            with self._lock:
+                self.loads += 1
+                self.load_time += time.time() - start
+                self._entries[key] = _PoolEntry(model, size)
+                self._evict(keep=key)
+            logger.info(f"Loaded model {key} ({size / 1024 / 1024:.1f} MB) in {time.time() - start:.2f}s")
+            return model
+
+    def _lookup(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry.last_used = time.time()
+            entry.uses += 1
+            self.hits += 1
+            return entry.model
+
+    def _known_missing(self, key: str) -> bool:
+        with self._lock:
+            missing_since = self._missing.get(key)
+            if missing_since is None:
+                return False
+            if time.time() - missing_since < self.missing_ttl:
+                return True
+            del self._missing[key]
+            return False
+
+    def _evict(self, keep: str):
+        # Models still referenced by an in-flight request are freed once it finishes
+        for key in list(self._entries):
+            if self.resident_bytes <= self.memory_limit_bytes:
+                break
+            if key == keep or self.pinned(key):
+                continue
+            entry = self._entries.pop(key)
+            self.evictions += 1
+            logger.info(f"Evicted model {key} ({entry.size / 1024 / 1024:.1f} MB, {entry.uses} uses)")
+
+    def preload(self, keys: Iterable[str]):
+        """Load ``keys`` now, logging instead of raising on failure"""
+        for key in keys:
+            try:
+                self.get(key)
+            except Exception as e:
+                logger.error(f"❌ Failed to preload model {key}: {str(e)}")
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def evict(self, key: str) -> bool:
+        with self._lock:
+            self._missing.pop(key, None)
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._missing.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'loaded': len(self._entries),
+                'resident_bytes': self.resident_bytes,
+                'memory_limit_bytes': self.memory_limit_bytes,
+                'hits': self.hits,
+                'loads': self.loads,
+                'load_failures': self.load_failures,
+                'missing': sorted(self._missing),
+                'evictions': self.evictions,
+                'total_load_time': round(self.load_time, 3),
+                'models': {
+                    key: {
+                        'size_bytes': entry.size,
+                        'uses': entry.uses,
+                        'pinned': self.pinned(key),
+                        'idle_seconds': round(time.time() - entry.last_used, 1)
+                    }
+                    for key, entry in self._entries.items()
+                }
+            }
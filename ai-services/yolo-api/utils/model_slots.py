@@ -0,0 +1,242 @@
+# Thai Herbal GACP Platform v3.0 - Versioned Model Slots
+# ===================================================================
+# Each model version lives in its own slot: a ModelPool plus the
+# objects that serve it (model manager, backends, classifiers), built
+# fresh for every version. Requests acquire the current slot once and
+# keep using it until they finish, so a reload never hands a request
+# half-loaded or mixed models. A reload builds and warms the next slot
+# on a background thread, swaps it in atomically, and frees the
+# previous slot once its last request has released it.
+# ===================================================================
+
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.model_pool import ModelPool
+
+logger = logging.getLogger(__name__)
+
+RELOAD_PENDING = 'pending'
+RELOAD_LOADING = 'loading'
+RELOAD_WARMING = 'warming'
+RELOAD_COMPLETED = 'completed'
+RELOAD_FAILED = 'failed'
+
+
+class ModelSlot:
+    """One model version: its pool, its resources and the number of requests still using it"""
+
+    def __init__(self, version: int, pool: ModelPool, resources: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.pool = pool
+        self.resources = resources or {}
+        self.created_at = datetime.now().isoformat()
+        self.references = 0
+        self.retired = False
+
+    def get(self, key: str) -> Any:
+        return self.pool.get(key)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.resources[name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'created_at': self.created_at,
+            'references': self.references,
+            'retired': self.retired,
+            'models': sorted(self.pool.keys())
+        }
+
+
+class ReloadJob:
+    """Status of one background reload"""
+
+    def __init__(self, models: List[str]):
+        self.job_id = uuid.uuid4().hex
+        self.status = RELOAD_PENDING
+        self.models = models
+        self.version: Optional[int] = None
+        self.error: Optional[str] = None
+        self.warning: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.finished_at: Optional[str] = None
+        self.duration = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.status in (RELOAD_COMPLETED, RELOAD_FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'models': self.models,
+            'version': self.version,
+            'error': self.error,
+            'warning': self.warning,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'duration': round(self.duration, 3)
+        }
+
+
+class ModelSlots:
+    """Current model slot plus background, zero-downtime reloads
+
+    ``resource_factory`` builds the per-version objects and
+    ``pool_factory`` the version's pool from them; both are called once
+    per version, so a reload never mutates what the live slot uses.
+    """
+
+    def __init__(self,
+                 pool_factory: Callable[[Dict[str, Any]], ModelPool],
+                 resource_factory: Optional[Callable[[], Dict[str, Any]]] = None,
+                 max_jobs: int = 20):
+        self.pool_factory = pool_factory
+        self.resource_factory = resource_factory
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        resources = self._create_resources()
+        self._current = ModelSlot(1, pool_factory(resources), resources)
+        self._retired: List[ModelSlot] = []
+        self._jobs: Dict[str, ReloadJob] = {}
+        self._active_job: Optional[ReloadJob] = None
+
+    @property
+    def current(self) -> ModelSlot:
+        return self._current
+
+    def _create_resources(self) -> Dict[str, Any]:
+        return self.resource_factory() if self.resource_factory is not None else {}
+
+    def acquire(self) -> ModelSlot:
+        """Reference the current slot for the duration of a request"""
+        with self._lock:
+            slot = self._current
+            slot.references += 1
+            return slot
+
+    def release(self, slot: ModelSlot):
+        with self._lock:
+            slot.references -= 1
+            if slot.retired and slot.references <= 0:
+                self._free(slot)
+
+    def _free(self, slot: ModelSlot):
+        slot.pool.clear()
+        if slot in self._retired:
+            self._retired.remove(slot)
+        logger.info(f"Freed model version {slot.version}")
+
+    def reload(self,
+               prepare: Optional[Callable[[Dict[str, Any]], None]] = None,
+               warm_keys: Iterable[str] = (),
+               on_swap: Optional[Callable[[ModelSlot], None]] = None) -> ReloadJob:
+        """Start a background reload, or return the one already running
+
+        ``prepare`` gets the new version's resources before its pool is built.
+        """
+        with self._lock:
+            if self._active_job is not None and not self._active_job.done:
+                return self._active_job
+            keys = list(dict.fromkeys(list(self._current.pool.keys()) + list(warm_keys)))
+            job = ReloadJob(keys)
+            self._active_job = job
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.pop(next(iter(self._jobs)))
+
+        threading.Thread(
+            target=self._run_reload, args=(job, prepare, on_swap),
+            name=f"model-reload-{job.job_id[:8]}", daemon=True
+        ).start()
+        return job
+
+    def _run_reload(self,
+                    job: ReloadJob,
+                    prepare: Optional[Callable[[Dict[str, Any]], None]],
+                    on_swap: Optional[Callable[[ModelSlot], None]]):
+        started = time.time()
+        try:
+            job.status = RELOAD_LOADING
+            resources = self._create_resources()
+            if prepare is not None:
+                prepare(resources)
+            pool = self.pool_factory(resources)
+
+            # Load and warm every model the live slot serves before switching,
+            # so the first requests on the new version do not pay for it
+            job.status = RELOAD_WARMING
+            for key in job.models:
+                pool.get(key)
+
+            with self._lock:
+                previous = self._current
+                slot = ModelSlot(previous.version + 1, pool, resources)
+                self._current = slot
+                previous.retired = True
+                if previous.references <= 0:
+                    self._free(previous)
+                else:
+                    self._retired.append(previous)
+            job.version = slot.version
+            self._notify_swap(job, slot, on_swap)
+            job.status = RELOAD_COMPLETED
+            logger.info(f"✅ Model version {slot.version} serving; version {previous.version} retired")
+        except Exception as e:
+            job.status = RELOAD_FAILED
+            job.error = str(e)
+            logger.error(f"❌ Model reload {job.job_id} failed, keeping version {self._current.version}: {str(e)}")
+        finally:
+            job.duration = time.time() - started
+            job.finished_at = datetime.now().isoformat()
+
+    def _notify_swap(self, job: ReloadJob, slot: ModelSlot, on_swap: Optional[Callable[[ModelSlot], None]]):
+        # The new version is already serving; a failing callback does not undo that
+        if on_swap is None:
+            return
+        try:
+            on_swap(slot)
+        except Exception as e:
+            job.warning = f"on_swap failed: {str(e)}"
+            logger.warning(f"⚠️ Model version {slot.version} is serving, but its swap callback failed: {str(e)}")
+
+    def get_job(self, job_id: str) -> Optional[ReloadJob]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'current_version': self._current.version,
+                'current': self._current.to_dict(),
+                'retired': [slot.to_dict() for slot in self._retired],
+                'reload': self._active_job.to_dict() if self._active_job is not None else None
+            }
+
+
+def batch_by_slot(items: Sequence[Tuple[ModelSlot, Any]],
+                  run: Callable[[ModelSlot, List[Any]], Sequence[Any]]) -> List[Any]:
+    """Run a micro-batch of (slot, payload) items once per slot, results in item order
+
+    Scheduler batches mix requests pinned to different versions while a
+    reload is swapping; each payload must run on the models its request
+    pinned, not on whatever slot is current when the batch runs.
+    """
+    groups: Dict[int, Tuple[ModelSlot, List[int]]] = {}
+    for index, (slot, _) in enumerate(items):
+        groups.setdefault(id(slot), (slot, []))[1].append(index)
+
+    results: List[Any] = [None] * len(items)
+    for slot, indices in groups.values():
+        outputs = list(run(slot, [items[index][1] for index in indices]))
+        if len(outputs) != len(indices):
+            raise RuntimeError(f"Model version {slot.version} returned {len(outputs)} results for {len(indices)} items")
+        for index, output in zip(indices, outputs):
+            results[index] = output
+    return results
@@ -0,0 +1,151 @@
+# Thai Herbal GACP Platform v3.0 - Analysis Result Cache
+# ===================================================================
+# Content-addressed cache for analysis responses. Keys combine the
+# SHA-256 of the uploaded bytes, the loaded model versions and the
+# request parameters, so a re-uploaded photo is served without running
+# the pipeline again. A bounded in-memory LRU sits in front of an
+# optional JSON-on-disk tier.
+# ===================================================================
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """Two-tier (memory LRU + optional disk) cache for analysis results"""
+
+    def __init__(self, max_entries: int = 512, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_bytes: bytes, model_versions: Dict[str, Any], params: Dict[str, Any]) -> str:
+        """Build a cache key from image content, model versions and request parameters"""
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        context = json.dumps({'models': model_versions, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha256(f"{digest}:{context}".encode('utf-8')).hexdigest()
+
+    @property
+    def generation(self) -> int:
+        """Incremented on every invalidation; pass it back to ``put``"""
+        return self._generation
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+
+        value = self._read_disk(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._store_memory(key, value)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any], generation: Optional[int] = None):
+        """Store a result unless the cache was invalidated since ``generation`` was read"""
+        with self._lock:
+            if generation is None:
+                generation = self._generation
+            elif generation != self._generation:
+                return
+            self._store_memory(key, value)
+        self._write_disk(key, value, generation)
+
+    def invalidate(self):
+        """Drop every cached result (called after models are reloaded)"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        if self.disk_dir:
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+            os.makedirs(self.disk_dir, exist_ok=True)
+        logger.info("Analysis result cache invalidated")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'disk_enabled': bool(self.disk_dir),
+                'generation': self._generation
+            }
+
+    def _store_memory(self, key: str, value: Dict[str, Any]):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, value: Dict[str, Any], generation: int):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False, default=str)
+            # Publish under the lock, so an invalidate() that ran while the
+            # file was written can never be undone by it
+            with self._lock:
+                if generation == self._generation:
+                    os.replace(tmp_path, path)
+                    tmp_path = None
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {str(e)}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
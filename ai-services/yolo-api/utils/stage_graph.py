@@ -0,0 +1,157 @@
+# Thai Herbal GACP Platform v3.0 - Analysis Stage Graph
+# ===================================================================
+# Runs the stages of one analysis as a small dependency graph on a
+# shared executor: a stage starts as soon as the stages it depends on
+# have finished, so independent stages overlap. Each stage has its own
+# timeout; a non-critical stage that fails or times out is replaced by
+# its default value and the analysis is marked partial, while a
+# critical failure aborts the whole run.
+# ===================================================================
+
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StageError(RuntimeError):
+    """A critical stage could not produce a result"""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Stage '{stage}' {message}")
+        self.stage = stage
+
+
+class StageTimeoutError(StageError):
+    """A critical stage exceeded its timeout"""
+
+
+@dataclass
+class Stage:
+    """One unit of work; ``fn`` receives the run context plus its dependencies' results"""
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    critical: bool = True
+    default: Callable[[], Any] = lambda: None
+
+
+@dataclass
+class StageGraphResult:
+    """Stage results, wall-clock seconds per stage, and why any stage was degraded"""
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failures)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+
+def _run_timed(stage: Stage, inputs: Dict[str, Any]) -> Tuple[Any, float, Optional[BaseException]]:
+    started = time.perf_counter()
+    try:
+        return stage.fn(inputs), time.perf_counter() - started, None
+    except Exception as e:
+        return None, time.perf_counter() - started, e
+
+
+class StageGraph:
+    """Dependency-ordered, concurrent execution of analysis stages"""
+
+    def __init__(self, stages: Sequence[Stage], executor: Executor):
+        self.stages = {stage.name: stage for stage in stages}
+        self.executor = executor
+        self._order = self._topological_order(stages)
+
+    @staticmethod
+    def _topological_order(stages: Sequence[Stage]) -> List[Stage]:
+        names = {stage.name for stage in stages}
+        order: List[Stage] = []
+        placed = set()
+        remaining = list(stages)
+        while remaining:
+            ready = [stage for stage in remaining if all(dep in placed for dep in stage.depends_on)]
+            if not ready:
+                unknown = {dep for stage in remaining for dep in stage.depends_on} - names
+                if unknown:
+                    raise ValueError(f"Unknown stage dependencies: {sorted(unknown)}")
+                raise ValueError(f"Stage dependency cycle among: {[stage.name for stage in remaining]}")
+            for stage in ready:
+                order.append(stage)
+                placed.add(stage.name)
+                remaining.remove(stage)
+        return order
+
+    def run(self, context: Optional[Dict[str, Any]] = None) -> StageGraphResult:
+        """Execute every stage and return their results (raises on critical failure)"""
+        context = context or {}
+        outcome = StageGraphResult()
+        waiting = list(self._order)
+        running: Dict[Future, Tuple[Stage, Optional[float]]] = {}
+
+        try:
+            while waiting or running:
+                for stage in [s for s in waiting if self._settled(s, outcome)]:
+                    waiting.remove(stage)
+                    # Degraded dependencies contribute their default value
+                    inputs = dict(context)
+                    inputs.update({dep: outcome.results[dep] for dep in stage.depends_on})
+                    # Each stage runs in a copy of the caller's context (Flask request/g)
+                    future = self.executor.submit(contextvars.copy_context().run, _run_timed, stage, inputs)
+                    deadline = time.monotonic() + stage.timeout if stage.timeout else None
+                    running[future] = (stage, deadline)
+
+                if not running:
+                    continue
+
+                deadlines = [deadline for _, deadline in running.values() if deadline is not None]
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage, _ = running.pop(future)
+                    value, elapsed, error = future.result()
+                    if error is not None:
+                        if stage.critical:
+                            outcome.timings[stage.name] = elapsed
+                            raise error
+                        logger.warning(f"Stage {stage.name} failed, continuing without it: {str(error)}")
+                        self._degrade(stage, outcome, f"failed: {str(error)}", elapsed)
+                    else:
+                        outcome.results[stage.name] = value
+                        outcome.timings[stage.name] = elapsed
+
+                now = time.monotonic()
+                for future, (stage, deadline) in list(running.items()):
+                    if deadline is not None and now >= deadline and not future.done():
+                        running.pop(future)
+                        # A started stage cannot be interrupted; its result is discarded
+                        future.cancel()
+                        if stage.critical:
+                            raise StageTimeoutError(stage.name, f"timed out after {stage.timeout}s")
+                        logger.warning(f"Stage {stage.name} timed out after {stage.timeout}s")
+                        self._degrade(stage, outcome, 'timeout', stage.timeout)
+        finally:
+            for future in running:
+                future.cancel()
+
+        return outcome
+
+    @staticmethod
+    def _settled(stage: Stage, outcome: StageGraphResult) -> bool:
+        return all(dep in outcome.results for dep in stage.depends_on)
+
+    @staticmethod
+    def _degrade(stage: Stage, outcome: StageGraphResult, reason: str, elapsed: float):
+        outcome.failures[stage.name] = reason
+        outcome.results[stage.name] = stage.default()
+        outcome.timings[stage.name] = elapsed
@@ -0,0 +1,271 @@
+# Thai Herbal GACP Platform v3.0 - Streaming Upload Ingestion
+# ===================================================================
+# Multipart uploads are streamed into SpooledUpload buffers that stay
+# in memory only while they are small and the request is within its
+# memory budget, then roll over to a named file in the spool directory.
+# Spooled files are handed to the decoder as read-only memory maps, and
+# base64 JSON payloads are decoded chunk by chunk into the same kind of
+# buffer instead of materialising a second full copy.
+# ===================================================================
+
+import binascii
+import io
+import logging
+import mmap
+import os
+import tempfile
+from typing import Any, Dict, Optional, Union
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_THRESHOLD = 1024 * 1024
+DEFAULT_MEMORY_BUDGET = 8 * 1024 * 1024
+# JSON bodies have to be parsed in memory whole, so by default they may be
+# no larger than what one request may hold in memory
+DEFAULT_JSON_BODY_LIMIT = DEFAULT_MEMORY_BUDGET
+# Bytes read from the request stream per step while enforcing that cap
+BODY_READ_CHUNK = 64 * 1024
+
+# Base64 characters decoded per step (a multiple of 4)
+BASE64_CHUNK_CHARS = 256 * 1024
+
+
+class UploadBudget:
+    """Tracks how many upload bytes one request holds in RAM and on disk"""
+
+    def __init__(self, memory_limit: int):
+        self.memory_limit = memory_limit
+        self.memory_bytes = 0
+        self.peak_memory_bytes = 0
+        self.spooled_bytes = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.memory_limit - self.memory_bytes)
+
+    def reserve(self, size: int) -> bool:
+        """Account ``size`` bytes of RAM, or return False if that exceeds the budget"""
+        if self.memory_bytes + size > self.memory_limit:
+            return False
+        self.memory_bytes += size
+        self.peak_memory_bytes = max(self.peak_memory_bytes, self.memory_bytes)
+        return True
+
+    def release(self, size: int):
+        self.memory_bytes = max(0, self.memory_bytes - size)
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            'memory_limit': self.memory_limit,
+            'peak_memory_bytes': self.peak_memory_bytes,
+            'spooled_bytes': self.spooled_bytes
+        }
+
+
+class SpooledUpload(io.RawIOBase):
+    """Write-once upload buffer that rolls over to a named temp file
+
+    Unlike ``tempfile.SpooledTemporaryFile`` the on-disk file has a path,
+    so worker processes can open it themselves instead of receiving the
+    bytes through a pipe.
+    """
+
+    def __init__(self, threshold: int, spool_dir: str, budget: UploadBudget):
+        super().__init__()
+        self.threshold = threshold
+        self.spool_dir = spool_dir
+        self.budget = budget
+        self.path: Optional[str] = None
+        self._memory: Optional[io.BytesIO] = io.BytesIO()
+        self._memory_size = 0
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+
+    @property
+    def rolled(self) -> bool:
+        return self._file is not None
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self._file is None:
+            size = len(data)
+            if self._memory_size + size <= self.threshold and self.budget.reserve(size):
+                self._memory_size += size
+                return self._memory.write(data)
+            self._rollover()
+        written = self._file.write(data)
+        self.budget.spooled_bytes += written
+        return written
+
+    def _rollover(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix='upload-', dir=self.spool_dir)
+        self._file = os.fdopen(fd, 'w+b')
+        buffered = self._memory.getbuffer()
+        self._file.write(buffered)
+        del buffered
+        self.budget.spooled_bytes += self._memory_size
+        self.budget.release(self._memory_size)
+        self._memory_size = 0
+        self._memory = None
+
+    def read(self, size: int = -1) -> bytes:
+        return (self._file or self._memory).read(size)
+
+    def readinto(self, buffer) -> int:
+        return (self._file or self._memory).readinto(buffer)
+
+    def readline(self, size: int = -1) -> bytes:
+        return (self._file or self._memory).readline(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return (self._file or self._memory).seek(offset, whence)
+
+    def tell(self) -> int:
+        return (self._file or self._memory).tell()
+
+    def size(self) -> int:
+        if self._file is not None:
+            self._file.flush()
+            return os.fstat(self._file.fileno()).st_size
+        return self._memory_size
+
+    def getbuffer(self) -> Union[memoryview, mmap.mmap]:
+        """Zero-copy view of the contents: a memoryview, or a read-only mmap once spooled"""
+        if self._file is None:
+            return self._memory.getbuffer()
+        if self._mmap is None:
+            self._file.flush()
+            if self.size() == 0:
+                return memoryview(b'')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def as_payload(self) -> Union[bytes, str]:
+        """File path if spooled (for worker processes), else the in-memory bytes"""
+        if self._file is not None:
+            self._file.flush()
+            return self.path
+        return self._memory.getvalue()
+
+    def close(self):
+        if self.closed:
+            return
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A decoder still holds a view; the mapping goes away with it
+                pass
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        elif self._memory is not None:
+            self.budget.release(self._memory_size)
+            self._memory = None
+        super().close()
+
+
+def decode_base64_to_upload(text: str, upload: SpooledUpload) -> SpooledUpload:
+    """Decode a (data URL or plain) base64 string into ``upload`` in fixed-size chunks"""
+    start = 0
+    if text.startswith('data:'):
+        start = text.index(',', 0, 256) + 1
+
+    carry = ''
+    for offset in range(start, len(text), BASE64_CHUNK_CHARS):
+        piece = carry + ''.join(text[offset:offset + BASE64_CHUNK_CHARS].split())
+        usable = len(piece) - len(piece) % 4
+        if usable:
+            upload.write(binascii.a2b_base64(piece[:usable]))
+        carry = piece[usable:]
+    if carry:
+        raise binascii.Error("Incorrect base64 padding")
+
+    upload.seek(0)
+    return upload
+
+
+class SpoolingRequest(Request):
+    """Flask request that spools file uploads under a per-request memory budget"""
+
+    spool_threshold = DEFAULT_SPOOL_THRESHOLD
+    memory_budget = DEFAULT_MEMORY_BUDGET
+    json_body_limit = DEFAULT_JSON_BODY_LIMIT
+    spool_dir = tempfile.gettempdir()
+
+    @property
+    def upload_budget(self) -> UploadBudget:
+        budget = self.__dict__.get('_upload_budget')
+        if budget is None:
+            budget = self.__dict__['_upload_budget'] = UploadBudget(self.memory_budget)
+        return budget
+
+    def new_upload(self) -> SpooledUpload:
+        """Empty spool buffer charged to this request's budget"""
+        upload = SpooledUpload(self.spool_threshold, self.spool_dir, self.upload_budget)
+        self.__dict__.setdefault('_extra_uploads', []).append(upload)
+        return upload
+
+    def reserve_body(self):
+        """Read a non-file body (e.g. JSON) under ``json_body_limit`` before it is parsed
+
+        The body is budgeted apart from file uploads: it must be parsed in
+        memory whatever its size, while the image decoded from it is
+        spooled under the upload budget like any other upload. The limit
+        is checked against the declared length and against the bytes
+        actually read, so chunked bodies without a length are capped too.
+        """
+        length = self.content_length
+        if length is not None and length > self.json_body_limit:
+            self._body_too_large(length)
+
+        chunks = []
+        read = 0
+        while True:
+            chunk = self.stream.read(BODY_READ_CHUNK)
+            if not chunk:
+                break
+            read += len(chunk)
+            if read > self.json_body_limit:
+                self._body_too_large(read)
+            chunks.append(chunk)
+        # get_data()/get_json() read the checked body from here
+        self.__dict__['stream'] = io.BytesIO(b''.join(chunks))
+
+    def _body_too_large(self, size: int):
+        raise RequestEntityTooLarge(
+            f"Request body of {size}+ bytes exceeds the {self.json_body_limit} byte limit for JSON bodies; "
+            "use a multipart file upload instead"
+        )
+
+    def upload_stats(self) -> Optional[Dict[str, int]]:
+        """Bytes this request buffered in RAM and spooled to disk, if it had a body"""
+        budget = self.__dict__.get('_upload_budget')
+        return budget.to_dict() if budget is not None else None
+
+    def _get_file_stream(self,
+                         total_content_length: Optional[int],
+                         content_type: Optional[str],
+                         filename: Optional[str] = None,
+                         content_length: Optional[int] = None) -> Any:
+        return SpooledUpload(self.spool_threshold, self.spool_dir, self.upload_budget)
+
+    def close(self):
+        for upload in self.__dict__.pop('_extra_uploads', []):
+            upload.close()
+        super().close()
@@ -0,0 +1,229 @@
+"""Aggregate rehydration from gacp_events.snapshots plus the newer events"""
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, DateTime, Integer, Table, Text, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from event_store import EventRecord, EventStore, JsonColumn, event_metadata
+from partitions import prune_bound
+
+SNAPSHOT_EVERY = int(os.getenv("SNAPSHOT_EVERY", "100"))
+SNAPSHOT_MAX_REPLAY_BYTES = int(os.getenv("SNAPSHOT_MAX_REPLAY_BYTES", str(256 * 1024)))
+AGGREGATE_CACHE_SIZE = int(os.getenv("AGGREGATE_CACHE_SIZE", "1024"))
+
+# Mirrors database/postgresql/migrations/001_init_event_store.sql and 005_partition_events.sql
+snapshots_table = Table(
+    "snapshots",
+    event_metadata,
+    Column("aggregate_id", Text, primary_key=True),
+    Column("state", JsonColumn, nullable=False),
+    Column("last_event_version", Integer, nullable=False),
+    Column("last_event_timestamp", DateTime(timezone=True)),
+    Column("timestamp", DateTime(timezone=True), nullable=False, server_default=func.current_timestamp()),
+)
+
+
+# ==========================================
+# Aggregate types
+# ==========================================
+class AggregateType(ABC):
+    """How an aggregate's JSON state is folded from its events
+
+    ``apply`` must return a new dict rather than mutate ``state``: loaded
+    states are shared with the cache.
+    """
+
+    def initial_state(self) -> Dict[str, Any]:
+        return {}
+
+    @abstractmethod
+    def apply(self, state: Dict[str, Any], event: EventRecord) -> Dict[str, Any]:
+        """State after applying ``event``"""
+
+
+class CertificateAggregate(AggregateType):
+    def initial_state(self):
+        return {"status": "pending", "certificateNumber": None, "companyName": None,
+                "issuedAt": None, "expiresAt": None, "renewals": 0}
+
+    def apply(self, state, event):
+        state = dict(state)
+        data = event.event_data or {}
+        for key in ("certificateNumber", "companyName"):
+            if key in data:
+                state[key] = data[key]
+        if event.event_type in ("CertificateIssued", "CertificateRenewed"):
+            state["status"] = "active"
+            state["issuedAt"] = event.timestamp.isoformat()
+            state["expiresAt"] = data.get("expiryDate", state["expiresAt"])
+            if event.event_type == "CertificateRenewed":
+                state["renewals"] += 1
+        elif event.event_type == "CertificateExpired":
+            state["status"] = "expired"
+        elif event.event_type == "CertificateSuspended":
+            state["status"] = "suspended"
+        elif event.event_type == "CertificateReinstated":
+            state["status"] = "active"
+        elif event.event_type == "CertificateRevoked":
+            state["status"] = "revoked"
+        return state
+
+
+# ==========================================
+# Loader
+# ==========================================
+@dataclass
+class LoadedAggregate:
+    aggregate_id: str
+    state: Dict[str, Any]
+    version: int
+    replayed: int = 0
+    last_timestamp: Optional[datetime] = None
+
+
+class SnapshotPolicy:
+    """Snapshot after ``every`` replayed events or ``max_replay_bytes`` of replayed payload"""
+
+    def __init__(self, every: int = SNAPSHOT_EVERY, max_replay_bytes: int = SNAPSHOT_MAX_REPLAY_BYTES):
+        self.every = every
+        self.max_replay_bytes = max_replay_bytes
+
+    def should_snapshot(self, replayed: int, replayed_bytes: int) -> bool:
+        if replayed == 0:
+            return False
+        return (0 < self.every <= replayed) or (0 < self.max_replay_bytes <= replayed_bytes)
+
+
+class AggregateLoader:
+    """Load aggregates from the newest snapshot and the events after it
+
+    Recently loaded aggregates stay in an in-process LRU; a cache hit
+    still reads events past the cached version, so writes from other
+    processes are never missed. A load that had to replay enough events
+    (per ``policy``) writes a fresh snapshot, so the next cold load of
+    that aggregate starts from there.
+    """
+
+    def __init__(self,
+                 store: EventStore,
+                 aggregate_type: AggregateType,
+                 policy: Optional[SnapshotPolicy] = None,
+                 cache_size: int = AGGREGATE_CACHE_SIZE):
+        self.store = store
+        self.engine = store.engine
+        self.aggregate_type = aggregate_type
+        self.policy = policy or SnapshotPolicy()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, LoadedAggregate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._insert = postgresql.insert if store.is_postgres else sqlite.insert
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.snapshots_written = 0
+
+    def load(self, aggregate_id: str) -> LoadedAggregate:
+        """Current state and version; version 0 means the aggregate has no events"""
+        with self._lock:
+            cached = self._cache.get(aggregate_id)
+            if cached is not None:
+                self._cache.move_to_end(aggregate_id)
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+        if cached is not None:
+            state, version, last_timestamp = cached.state, cached.version, cached.last_timestamp
+        else:
+            state, version, last_timestamp = self._read_snapshot(aggregate_id)
+
+        loaded, replayed_bytes = self._fold(aggregate_id, state, version, last_timestamp)
+        if self.policy.should_snapshot(loaded.replayed, replayed_bytes):
+            self.save_snapshot(loaded)
+        if loaded.version:
+            self._remember(loaded)
+        return loaded
+
+    def replay(self, aggregate_id: str) -> LoadedAggregate:
+        """Fold the whole stream from version 1, ignoring snapshots and the cache"""
+        return self._fold(aggregate_id, self.aggregate_type.initial_state(), 0, None)[0]
+
+    def _fold(self, aggregate_id: str, state: Dict[str, Any], version: int, last_timestamp: Optional[datetime]):
+        replayed = replayed_bytes = 0
+        measure_bytes = self.policy.max_replay_bytes > 0
+        # The event store keeps each stream's timestamps from going backwards
+        # (stream_heads, 006_stream_heads.sql), so no later version is older
+        # than the last one folded and the bound cannot skip events
+        events = self.store.read_stream(aggregate_id, from_version=version + 1, since=prune_bound(last_timestamp))
+        for event in events:
+            state = self.aggregate_type.apply(state, event)
+            version = event.version
+            last_timestamp = event.timestamp
+            replayed += 1
+            if measure_bytes:
+                replayed_bytes += len(json.dumps(event.event_data))
+        return LoadedAggregate(aggregate_id, state, version, replayed, last_timestamp), replayed_bytes
+
+    def _read_snapshot(self, aggregate_id: str):
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(snapshots_table.c.state, snapshots_table.c.last_event_version,
+                       snapshots_table.c.last_event_timestamp)
+                .where(snapshots_table.c.aggregate_id == aggregate_id)
+            ).first()
+        if row is None:
+            return self.aggregate_type.initial_state(), 0, None
+        return row.state, row.last_event_version, row.last_event_timestamp
+
+    def save_snapshot(self, loaded: LoadedAggregate):
+        """Store the state unless a snapshot at the same or a later version exists"""
+        upsert = self._insert(snapshots_table).values(
+            aggregate_id=loaded.aggregate_id,
+            state=loaded.state,
+            last_event_version=loaded.version,
+            last_event_timestamp=loaded.last_timestamp,
+        )
+        upsert = upsert.on_conflict_do_update(
+            index_elements=["aggregate_id"],
+            set_={
+                "state": upsert.excluded.state,
+                "last_event_version": upsert.excluded.last_event_version,
+                "last_event_timestamp": upsert.excluded.last_event_timestamp,
+                "timestamp": func.current_timestamp(),
+            },
+            where=snapshots_table.c.last_event_version < upsert.excluded.last_event_version,
+        )
+        with self.engine.begin() as conn:
+            conn.execute(upsert)
+        self.snapshots_written += 1
+
+    def _remember(self, loaded: LoadedAggregate):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            current = self._cache.get(loaded.aggregate_id)
+            # A concurrent load may already have cached a newer version
+            if current is None or current.version <= loaded.version:
+                self._cache[loaded.aggregate_id] = loaded
+            self._cache.move_to_end(loaded.aggregate_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def evict(self, aggregate_id: str):
+        with self._lock:
+            self._cache.pop(aggregate_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached": len(self._cache),
+            "cache_size": self.cache_size,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "snapshots_written": self.snapshots_written,
+        }
@@ -0,0 +1,142 @@
+"""Keyset-paginated queries over gacp_events.audit_log"""
+import base64
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Index, Table, Text, Uuid, func, select, tuple_
+from sqlalchemy.engine import Engine
+
+from event_store import JsonColumn, event_metadata
+
+AUDIT_PAGE_SIZE = int(os.getenv("AUDIT_PAGE_SIZE", "100"))
+AUDIT_MAX_PAGE_SIZE = int(os.getenv("AUDIT_MAX_PAGE_SIZE", "1000"))
+AUDIT_EXPORT_BATCH_SIZE = int(os.getenv("AUDIT_EXPORT_BATCH_SIZE", "2000"))
+
+# Mirrors 001_init_event_store.sql, 004_audit_log_indexes.sql and 005_partition_events.sql
+audit_log_table = Table(
+    "audit_log",
+    event_metadata,
+    Column("id", Uuid, primary_key=True),
+    # No foreign key since events became partitioned (005_partition_events.sql)
+    Column("event_id", Uuid, nullable=False),
+    Column("user_id", Text),
+    Column("action_type", Text, nullable=False),
+    Column("target_entity", Text),
+    Column("details", JsonColumn),
+    Column("recorded_at", DateTime(timezone=True), nullable=False, server_default=func.current_timestamp()),
+    Index("idx_audit_log_recorded", "recorded_at", "id"),
+    Index("idx_audit_log_user_recorded", "user_id", "recorded_at", "id"),
+    Index("idx_audit_log_target_recorded", "target_entity", "recorded_at", "id"),
+)
+
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that was not produced by ``encode_cursor``"""
+
+
+def encode_cursor(recorded_at: datetime, entry_id: uuid.UUID) -> str:
+    raw = json.dumps([recorded_at.isoformat(), str(entry_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        recorded_at, entry_id = json.loads(raw)
+        return datetime.fromisoformat(recorded_at), uuid.UUID(entry_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+@dataclass
+class AuditFilter:
+    user_id: Optional[str] = None
+    target_entity: Optional[str] = None
+    action_type: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    descending: bool = True
+
+    def query(self, after: Optional[Tuple[datetime, uuid.UUID]], limit: int):
+        """Rows strictly past ``after`` in (recorded_at, id) order
+
+        Equality filters plus the row comparison on (recorded_at, id) map
+        onto the composite indexes, so each page is an index range scan
+        that stops after ``limit`` rows, however deep the page is.
+        """
+        table = audit_log_table
+        key = tuple_(table.c.recorded_at, table.c.id)
+        query = select(table)
+        if self.user_id is not None:
+            query = query.where(table.c.user_id == self.user_id)
+        if self.target_entity is not None:
+            query = query.where(table.c.target_entity == self.target_entity)
+        if self.action_type is not None:
+            query = query.where(table.c.action_type == self.action_type)
+        if self.since is not None:
+            query = query.where(table.c.recorded_at >= self.since)
+        if self.until is not None:
+            query = query.where(table.c.recorded_at < self.until)
+        if self.descending:
+            if after is not None:
+                query = query.where(key < tuple_(*after))
+            query = query.order_by(table.c.recorded_at.desc(), table.c.id.desc())
+        else:
+            if after is not None:
+                query = query.where(key > tuple_(*after))
+            query = query.order_by(table.c.recorded_at, table.c.id)
+        return query.limit(limit)
+
+
+def serialize_entry(row) -> Dict[str, Any]:
+    entry = dict(row._mapping)
+    entry["id"] = str(entry["id"])
+    entry["event_id"] = str(entry["event_id"])
+    entry["recorded_at"] = entry["recorded_at"].isoformat()
+    return entry
+
+
+def fetch_page(engine: Engine,
+               audit_filter: AuditFilter,
+               cursor: Optional[str] = None,
+               limit: int = AUDIT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of entries and the cursor for the next page (None on the last page)"""
+    after = decode_cursor(cursor) if cursor else None
+    with engine.connect() as conn:
+        # One extra row tells whether another page exists without a COUNT
+        rows = conn.execute(audit_filter.query(after, limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].recorded_at, rows[-1].id)
+    return [serialize_entry(row) for row in rows], next_cursor
+
+
+def iter_entries(engine: Engine,
+                 audit_filter: AuditFilter,
+                 batch_size: int = AUDIT_EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Every matching entry, one keyset page at a time
+
+    Each batch is its own short query, so an export of millions of rows
+    holds neither the result in memory nor a transaction open for its
+    whole duration.
+    """
+    after = None
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(audit_filter.query(after, batch_size)).all()
+        for row in rows:
+            yield serialize_entry(row)
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].recorded_at, rows[-1].id)
+
+
+def iter_ndjson(engine: Engine, audit_filter: AuditFilter,
+                batch_size: int = AUDIT_EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    for entry in iter_entries(engine, audit_filter, batch_size):
+        yield (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
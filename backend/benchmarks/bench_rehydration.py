@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# ===================================================================
+# Thai Herbal GACP Platform - Aggregate Rehydration Benchmark
+# ===================================================================
+# Time to load a certificate aggregate against its event-stream length:
+#   full_replay    - every event from version 1 (no snapshot, no cache)
+#   snapshot_cold  - latest snapshot plus the events after it
+#   cache_hit      - in-process LRU entry plus a check for newer events
+#
+# Runs against PostgreSQL when --db-url is given (migrations applied),
+# otherwise against a temporary SQLite file.
+#
+# Usage:
+#   python bench_rehydration.py
+#   python bench_rehydration.py --lengths 10,1000,10000 --db-url postgresql://...
+# ===================================================================
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+from sqlalchemy import create_engine, event
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aggregates import AggregateLoader, CertificateAggregate, SnapshotPolicy  # noqa: E402
+from event_store import EventStore, NewEvent, event_metadata  # noqa: E402
+
+
+def make_engine(db_url: str, workdir: str):
+    if db_url:
+        return create_engine(db_url)
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'events.db')}")
+    schema_path = os.path.join(workdir, 'gacp_events.db')
+
+    @event.listens_for(engine, 'connect')
+    def attach_schema(dbapi_connection, _):
+        dbapi_connection.execute(f"ATTACH DATABASE '{schema_path}' AS gacp_events")
+
+    event_metadata.create_all(engine)
+    return engine
+
+
+def seed(store: EventStore, aggregate_id: str, length: int):
+    events = [NewEvent('CertificateIssued', {'certificateNumber': aggregate_id, 'companyName': 'Bench Farm'})]
+    events += [
+        NewEvent('CertificateRenewed' if i % 10 == 0 else 'InspectionRecorded',
+                 {'inspector': f'inspector-{i % 7}', 'score': i % 100, 'expiryDate': '2030-01-01'})
+        for i in range(1, length)
+    ]
+    for start in range(0, len(events), 1000):
+        store.append(aggregate_id, events[start:start + 1000])
+
+
+def time_call(fn: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {'mean_ms': statistics.fmean(samples), 'p50_ms': samples[len(samples) // 2]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark snapshot-accelerated aggregate loading')
+    parser.add_argument('--lengths', default='10,100,1000,10000')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--snapshot-every', type=int, default=100)
+    parser.add_argument('--db-url', default='')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = EventStore(make_engine(args.db_url, workdir))
+        aggregate = CertificateAggregate()
+        never = SnapshotPolicy(every=0, max_replay_bytes=0)
+        policy = SnapshotPolicy(every=args.snapshot_every, max_replay_bytes=0)
+        run_id = int(time.time())
+        results = []
+
+        for length in [int(n) for n in args.lengths.split(',')]:
+            aggregate_id = f'bench-cert-{run_id}-{length}'
+            seed(store, aggregate_id, length)
+            # Snapshot once, then leave a partial tail so cold loads replay a realistic remainder
+            AggregateLoader(store, aggregate, policy, cache_size=0).load(aggregate_id)
+            seed_tail = max(1, args.snapshot_every // 2) if length > args.snapshot_every else 0
+            if seed_tail:
+                store.append(aggregate_id, [NewEvent('InspectionRecorded', {'score': i}) for i in range(seed_tail)])
+
+            cached = AggregateLoader(store, aggregate, never, cache_size=16)
+            cached.load(aggregate_id)
+            timings = {
+                'full_replay': time_call(
+                    lambda: AggregateLoader(store, aggregate, never, cache_size=0).replay(aggregate_id),
+                    args.iterations),
+                'snapshot_cold': time_call(
+                    lambda: AggregateLoader(store, aggregate, never, cache_size=0).load(aggregate_id),
+                    args.iterations),
+                'cache_hit': time_call(lambda: cached.load(aggregate_id), args.iterations),
+            }
+            for name, timing in timings.items():
+                results.append({'events': length + seed_tail, 'method': name, **timing})
+                print(f"{name:14s} events={length + seed_tail:<6d} "
+                      f"mean={timing['mean_ms']:9.3f}ms p50={timing['p50_ms']:9.3f}ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,17 @@ from sqlalchemy import create_engine, MetaData
 import os
 
 DB_URL = f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('POSTGRES_DB')}"
-engine = create_engine(DB_URL)
+
+# Connection pool sized for the API workers plus event store readers;
+# pre-ping drops connections the server closed while they sat idle
+engine = create_engine(
+    DB_URL,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    pool_pre_ping=True,
+)
 metadata = MetaData()
 
 # สร้างตาราง
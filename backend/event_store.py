@@ -0,0 +1,323 @@
+"""Python access to the gacp_events event store shared with the Dart event ledger"""
+import csv
+import io
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    Uuid,
+    bindparam,
+    func,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from partitions import CREATE_PARTITION, PartitionManager, month_start, months_between
+
+SCHEMA = "gacp_events"
+JsonColumn = JSON().with_variant(JSONB(), "postgresql")
+
+event_metadata = MetaData(schema=SCHEMA)
+
+# Mirrors database/postgresql/migrations/001_init_event_store.sql and 005_partition_events.sql
+events_table = Table(
+    "events",
+    event_metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("aggregate_id", Text, nullable=False),
+    Column("event_type", Text, nullable=False),
+    Column("event_data", JsonColumn, nullable=False),
+    # Part of the key since 005_partition_events.sql: the table is range partitioned on it
+    Column("timestamp", DateTime(timezone=True), primary_key=True, server_default=func.current_timestamp()),
+    Column("version", Integer, nullable=False),
+    Column("metadata", JsonColumn),
+    # Unique per monthly partition in PostgreSQL
+    Index("idx_events_stream_version", "aggregate_id", "version", unique=True),
+)
+
+# Mirrors database/postgresql/migrations/006_stream_heads.sql
+stream_heads_table = Table(
+    "stream_heads",
+    event_metadata,
+    Column("aggregate_id", Text, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("last_timestamp", DateTime(timezone=True)),
+)
+
+COPY_COLUMNS = ("id", "aggregate_id", "event_type", "event_data", "timestamp", "version", "metadata")
+
+
+class ConcurrencyException(Exception):
+    """The aggregate stream moved past the version the caller expected"""
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite hands timestamps back without their zone
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class NewEvent:
+    event_type: str
+    event_data: Dict[str, Any]
+    metadata: Optional[Dict[str, Any]] = None
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+
+
+@dataclass
+class StreamHead:
+    version: int = 0
+    last_timestamp: Optional[datetime] = None
+
+
+@dataclass
+class EventRecord:
+    id: uuid.UUID
+    aggregate_id: str
+    event_type: str
+    event_data: Dict[str, Any]
+    timestamp: datetime
+    version: int
+    metadata: Optional[Dict[str, Any]] = None
+
+    def to_row(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in COPY_COLUMNS}
+
+
+class EventStore:
+    """Append to and read aggregate streams in gacp_events.events
+
+    Versions start at 1 per aggregate. Every write locks the streams'
+    rows in stream_heads and advances them in the same transaction, so
+    concurrent writers to one stream are serialized and version checks
+    read a single row rather than every monthly partition. A stream's
+    timestamps never go backwards, which keeps ``partitions.prune_bound``
+    safe for stream reads. ``append`` writes all of a command's events in
+    one multi-row INSERT after checking the stream is still at
+    ``expected_version``. Partitions for the months being written are
+    created on demand.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None):
+        if engine is None:
+            from db_init import engine
+        self.engine = engine
+        self.is_postgres = engine.dialect.name == "postgresql"
+        self.partitions = PartitionManager(engine) if self.is_postgres else None
+        self._insert = postgresql.insert if self.is_postgres else sqlite.insert
+
+    def _lock_heads(self, conn, aggregate_ids: Iterable[str]) -> Dict[str, StreamHead]:
+        """Lock the head rows of ``aggregate_ids`` until commit, creating missing ones at version 0"""
+        aggregate_ids = sorted(set(aggregate_ids))
+        # Sorted, so two writers locking overlapping streams cannot deadlock
+        conn.execute(
+            self._insert(stream_heads_table).on_conflict_do_nothing(index_elements=["aggregate_id"]),
+            [{"aggregate_id": aggregate_id, "version": 0} for aggregate_id in aggregate_ids],
+        )
+        rows = conn.execute(
+            select(stream_heads_table)
+            .where(stream_heads_table.c.aggregate_id.in_(aggregate_ids))
+            .order_by(stream_heads_table.c.aggregate_id)
+            .with_for_update()
+        ).all()
+        return {row.aggregate_id: StreamHead(row.version, row.last_timestamp) for row in rows}
+
+    def _update_heads(self, conn, heads: Dict[str, StreamHead]):
+        conn.execute(
+            update(stream_heads_table)
+            .where(stream_heads_table.c.aggregate_id == bindparam("head_aggregate_id"))
+            .values(version=bindparam("head_version"), last_timestamp=bindparam("head_last_timestamp")),
+            [
+                {"head_aggregate_id": aggregate_id, "head_version": head.version,
+                 "head_last_timestamp": head.last_timestamp}
+                for aggregate_id, head in heads.items()
+            ],
+        )
+
+    def _current_version(self, conn, aggregate_id: str) -> int:
+        version = conn.execute(
+            select(stream_heads_table.c.version).where(stream_heads_table.c.aggregate_id == aggregate_id)
+        ).scalar_one_or_none()
+        return version or 0
+
+    def current_version(self, aggregate_id: str) -> int:
+        """Latest version of the stream (0 when it has no events)"""
+        with self.engine.connect() as conn:
+            return self._current_version(conn, aggregate_id)
+
+    def append(self,
+               aggregate_id: str,
+               events: Sequence[NewEvent],
+               expected_version: Optional[int] = None) -> List[EventRecord]:
+        """Append events atomically; ``expected_version=None`` skips the concurrency check"""
+        if not events:
+            return []
+        now = datetime.now(timezone.utc)
+        if self.partitions is not None:
+            self.partitions.ensure_range(now, now)
+        try:
+            with self.engine.begin() as conn:
+                head = self._lock_heads(conn, [aggregate_id])[aggregate_id]
+                current = head.version
+                if expected_version is not None and current != expected_version:
+                    raise ConcurrencyException(
+                        f"Aggregate {aggregate_id} version mismatch: "
+                        f"expected {expected_version}, found {current}"
+                    )
+                # Never before the stream's last event, whatever the writers' clocks say
+                timestamp = max(now, _as_utc(head.last_timestamp)) if head.last_timestamp else now
+                if self.is_postgres and timestamp != now:
+                    conn.execute(CREATE_PARTITION, {"month": month_start(timestamp)})
+                records = [
+                    EventRecord(
+                        id=event.id,
+                        aggregate_id=aggregate_id,
+                        event_type=event.event_type,
+                        event_data=event.event_data,
+                        timestamp=timestamp,
+                        version=current + offset,
+                        metadata=event.metadata,
+                    )
+                    for offset, event in enumerate(events, start=1)
+                ]
+                conn.execute(insert(events_table).values([record.to_row() for record in records]))
+                self._update_heads(conn, {aggregate_id: StreamHead(records[-1].version, timestamp)})
+        except IntegrityError as e:
+            # Duplicate (aggregate_id, version) within a partition
+            raise ConcurrencyException(f"Aggregate {aggregate_id} was appended to concurrently") from e
+        return records
+
+    def bulk_import(self,
+                    records: Iterable[EventRecord],
+                    chunk_size: int = 10000,
+                    time_range: Optional[Tuple[datetime, datetime]] = None) -> int:
+        """Load already-versioned events (e.g. a ledger migration) in bulk
+
+        Uses COPY on PostgreSQL and chunked multi-row inserts elsewhere.
+        All chunks share one transaction. Each chunk locks and advances the
+        stream heads it touches: a stream's events must continue from its
+        current version without gaps (else ``ConcurrencyException``) and
+        their timestamps must not go backwards (else ``ValueError``).
+
+        The monthly partitions the import needs are created before its
+        transaction opens, in a short transaction of their own: creating
+        a partition locks the whole events table, which must not be held
+        for the length of the import. Pass ``time_range`` (first and last
+        event timestamp) to stream ``records``; without it they are read
+        into memory to find it. Events outside ``time_range`` raise
+        ``ValueError``.
+        """
+        months: Optional[Set[date]] = None
+        if time_range is None and self.partitions is not None:
+            records = list(records)
+            if not records:
+                return 0
+            timestamps = [record.timestamp for record in records]
+            time_range = (min(timestamps), max(timestamps))
+        if time_range is not None:
+            months = set(months_between(*time_range))
+            if self.partitions is not None:
+                self.partitions.ensure_months(months)
+
+        imported = 0
+        with self.engine.begin() as conn:
+            chunk: List[EventRecord] = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    imported += self._import_chunk(conn, chunk, months)
+                    chunk = []
+            if chunk:
+                imported += self._import_chunk(conn, chunk, months)
+        return imported
+
+    def _import_chunk(self, conn, chunk: List[EventRecord], months: Optional[Set[date]] = None) -> int:
+        if months is not None:
+            outside = {month_start(record.timestamp) for record in chunk} - months
+            if outside:
+                raise ValueError(f"Imported events fall outside the import's time range: {sorted(outside)}")
+
+        heads = self._lock_heads(conn, {record.aggregate_id for record in chunk})
+        for record in sorted(chunk, key=lambda r: (r.aggregate_id, r.version)):
+            head = heads[record.aggregate_id]
+            if record.version != head.version + 1:
+                raise ConcurrencyException(
+                    f"Aggregate {record.aggregate_id} import expected version {head.version + 1}, "
+                    f"got {record.version}"
+                )
+            timestamp = _as_utc(record.timestamp)
+            if head.last_timestamp is not None and timestamp < _as_utc(head.last_timestamp):
+                raise ValueError(
+                    f"Aggregate {record.aggregate_id} version {record.version} is older than the event before it"
+                )
+            heads[record.aggregate_id] = StreamHead(record.version, timestamp)
+        self._update_heads(conn, heads)
+
+        if not (self.is_postgres and self.engine.dialect.driver == "psycopg2"):
+            conn.execute(insert(events_table), [record.to_row() for record in chunk])
+            return len(chunk)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in chunk:
+            writer.writerow([
+                record.id,
+                record.aggregate_id,
+                record.event_type,
+                json.dumps(record.event_data),
+                record.timestamp.isoformat(),
+                record.version,
+                json.dumps(record.metadata) if record.metadata is not None else None,
+            ])
+        buffer.seek(0)
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {SCHEMA}.events ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+        return len(chunk)
+
+    def read_stream(self,
+                    aggregate_id: str,
+                    from_version: int = 1,
+                    to_version: Optional[int] = None,
+                    batch_size: int = 500,
+                    since: Optional[datetime] = None) -> Iterator[EventRecord]:
+        """Yield an aggregate's events in version order, fetching ``batch_size`` rows at a time
+
+        ``since`` is a lower bound on the events' timestamps (see
+        ``partitions.prune_bound``) that lets PostgreSQL skip the monthly
+        partitions before it.
+        """
+        query = (
+            select(events_table)
+            .where(events_table.c.aggregate_id == aggregate_id, events_table.c.version >= from_version)
+            .order_by(events_table.c.version)
+        )
+        if to_version is not None:
+            query = query.where(events_table.c.version <= to_version)
+        if since is not None:
+            query = query.where(events_table.c.timestamp >= since)
+        with self.engine.connect() as conn:
+            # Server-side cursor on PostgreSQL, so long streams never sit in memory at once
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+            for row in result:
+                yield EventRecord(**row._mapping)
@@ -1,3 +1,6 @@
+import os
+from typing import Any, Dict, Set
+
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
@@ -6,9 +9,18 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_token_claims(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload["sub"]
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+
+def get_current_user(claims: Dict[str, Any] = Depends(get_token_claims)):
+    return claims["sub"]
+
+def token_roles(claims: Dict[str, Any]) -> Set[str]:
+    """Roles from a ``roles`` list or a single ``role`` claim"""
+    roles = claims.get("roles") or claims.get("role") or []
+    if isinstance(roles, str):
+        roles = [roles]
+    return set(roles)
@@ -0,0 +1,71 @@
+import os
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from audit_log import (
+    AUDIT_MAX_PAGE_SIZE,
+    AUDIT_PAGE_SIZE,
+    AuditFilter,
+    InvalidCursor,
+    fetch_page,
+    iter_ndjson,
+)
+from ..auth import get_token_claims, token_roles
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+# Token roles that may read every user's audit entries
+AUDIT_ROLES = {role.strip() for role in os.getenv("AUDIT_ROLES", "admin,auditor").split(",") if role.strip()}
+
+
+def get_engine():
+    from db_init import engine
+    return engine
+
+
+def audit_filter(user_id: Optional[str] = None,
+                 target_entity: Optional[str] = None,
+                 action_type: Optional[str] = None,
+                 since: Optional[datetime] = None,
+                 until: Optional[datetime] = None,
+                 order: str = Query("desc", pattern="^(asc|desc)$")) -> AuditFilter:
+    return AuditFilter(user_id, target_entity, action_type, since, until, descending=order == "desc")
+
+
+def scoped_audit_filter(filters: AuditFilter = Depends(audit_filter),
+                        claims: Dict[str, Any] = Depends(get_token_claims)) -> AuditFilter:
+    """Admins and auditors see every entry; anyone else only their own"""
+    if token_roles(claims) & AUDIT_ROLES:
+        return filters
+    user = claims.get("sub")
+    if filters.user_id is not None and filters.user_id != user:
+        raise HTTPException(status_code=403, detail="Not allowed to read other users' audit entries")
+    return replace(filters, user_id=user)
+
+
+@router.get("")
+def query_audit_log(filters: AuditFilter = Depends(scoped_audit_filter),
+                    cursor: Optional[str] = None,
+                    limit: int = Query(AUDIT_PAGE_SIZE, ge=1, le=AUDIT_MAX_PAGE_SIZE),
+                    engine=Depends(get_engine)):
+    """Audit entries newest first (or oldest with order=asc); pass next_cursor back for the next page
+
+    A plain def: FastAPI runs it in its threadpool, so the blocking query
+    does not stall the event loop.
+    """
+    try:
+        entries, next_cursor = fetch_page(engine, filters, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"entries": entries, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+def export_audit_log(filters: AuditFilter = Depends(scoped_audit_filter),
+                     engine=Depends(get_engine)):
+    """All matching entries as newline-delimited JSON, streamed in keyset batches"""
+    return StreamingResponse(iter_ndjson(engine, filters), media_type="application/x-ndjson")
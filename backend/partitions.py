@@ -0,0 +1,119 @@
+"""Monthly partitions of gacp_events.events (database/postgresql/migrations/005_partition_events.sql)
+
+Usage:
+    python partitions.py ensure     # create this month and PARTITION_MONTHS_AHEAD more
+    python partitions.py list
+"""
+import argparse
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# Bound on how far an event's timestamp may trail the previous event of the
+# same stream or checkpoint (clock skew between writers, long transactions)
+EVENT_TIMESTAMP_SKEW = timedelta(seconds=int(os.getenv("EVENT_TIMESTAMP_SKEW_SECONDS", "3600")))
+
+CREATE_PARTITION = text("SELECT gacp_events.create_events_partition(:month)")
+LIST_PARTITIONS = text("""
+    SELECT child.relname AS name,
+           pg_get_expr(child.relpartbound, child.oid) AS bounds,
+           child.reltuples::bigint AS estimated_rows,
+           pg_total_relation_size(child.oid) AS total_bytes
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+    WHERE ns.nspname = 'gacp_events' AND parent.relname = 'events'
+    ORDER BY child.relname
+""")
+
+
+def month_start(moment: datetime) -> date:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(start: datetime, end: datetime) -> List[date]:
+    """Every month from ``start``'s to ``end``'s, inclusive"""
+    first, last = month_start(start), month_start(end)
+    months = []
+    while first <= last:
+        months.append(first)
+        first = add_months(first, 1)
+    return months
+
+
+def prune_bound(last_timestamp: Optional[datetime]) -> Optional[datetime]:
+    """Lower timestamp bound for events after ``last_timestamp``; None means unbounded"""
+    if last_timestamp is None:
+        return None
+    return last_timestamp - EVENT_TIMESTAMP_SKEW
+
+
+class PartitionManager:
+    """Create monthly event partitions before rows need them
+
+    Months already ensured by this process are remembered, so calling
+    ``ensure_range`` on every write costs a set lookup after the first
+    write of each month.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, months_ahead: int = PARTITION_MONTHS_AHEAD):
+        if engine is None:
+            from db_init import engine
+        self.engine = engine
+        self.months_ahead = months_ahead
+        self._ensured: Set[date] = set()
+        self._lock = threading.Lock()
+
+    def ensure_months(self, months: Iterable[date]) -> List[str]:
+        missing = sorted(set(months) - self._ensured)
+        if not missing:
+            return []
+        with self._lock, self.engine.begin() as conn:
+            names = [conn.execute(CREATE_PARTITION, {"month": month}).scalar_one() for month in missing]
+            self._ensured.update(missing)
+        return names
+
+    def ensure_range(self, start: datetime, end: datetime) -> List[str]:
+        """Partitions covering every month from ``start`` to ``end``"""
+        return self.ensure_months(months_between(start, end))
+
+    def ensure(self, now: Optional[datetime] = None) -> List[str]:
+        """This month plus ``months_ahead`` months"""
+        current = month_start(now or datetime.now(timezone.utc))
+        return self.ensure_months(add_months(current, i) for i in range(self.months_ahead + 1))
+
+    def partitions(self) -> List[Dict]:
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(LIST_PARTITIONS)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage gacp_events.events partitions")
+    parser.add_argument("command", choices=["ensure", "list"])
+    args = parser.parse_args()
+
+    manager = PartitionManager()
+    if args.command == "ensure":
+        for name in manager.ensure():
+            print(name)
+    else:
+        for partition in manager.partitions():
+            print(f"{partition['name']:20s} {partition['bounds']} "
+                  f"rows~{partition['estimated_rows']} {partition['total_bytes'] / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
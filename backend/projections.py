@@ -0,0 +1,355 @@
+"""Incremental read-model projections over gacp_events.events
+
+Each projection keeps a checkpoint in projection_checkpoints and applies
+only the events after it, a batch per transaction, together with the
+checkpoint update. Usage:
+
+    python projections.py run                       # follow new events
+    python projections.py rebuild certificate_status
+"""
+import argparse
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Integer,
+    Table,
+    Text,
+    bindparam,
+    delete,
+    func,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from event_store import SCHEMA, EventRecord, JsonColumn, event_metadata
+
+PROJECTION_BATCH_SIZE = int(os.getenv("PROJECTION_BATCH_SIZE", "500"))
+PROJECTION_POLL_INTERVAL = float(os.getenv("PROJECTION_POLL_INTERVAL", "1.0"))
+
+logger = logging.getLogger("gacp.projections")
+
+# ==========================================
+# Tables (database/postgresql/migrations/002_incremental_projections.sql)
+# ==========================================
+checkpoints_table = Table(
+    "projection_checkpoints",
+    event_metadata,
+    Column("projection_name", Text, primary_key=True),
+    # xid8 in PostgreSQL; handled as its text form
+    Column("transaction_id", Text, nullable=False, server_default="0"),
+    Column("position", BigInteger, nullable=False, server_default="0"),
+    # Timestamp of the last event read past, for watching projection lag
+    Column("event_timestamp", DateTime(timezone=True)),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.current_timestamp()),
+)
+
+certificate_status_table = Table(
+    "certificate_status",
+    event_metadata,
+    Column("certificate_id", Text, primary_key=True),
+    Column("certificate_number", Text),
+    Column("company_name", Text),
+    Column("issue_date", DateTime(timezone=True)),
+    Column("expiry_date", DateTime(timezone=True)),
+    Column("revoked", Boolean, nullable=False, default=False),
+    Column("suspended", Boolean, nullable=False, default=False),
+    Column("current_version", Integer, nullable=False),
+)
+
+application_status_table = Table(
+    "application_status",
+    event_metadata,
+    Column("application_id", Text, primary_key=True),
+    Column("company_name", Text),
+    Column("status", Text),
+    Column("submission_date", DateTime(timezone=True)),
+    Column("approval_date", DateTime(timezone=True)),
+    Column("current_version", Integer, nullable=False),
+)
+
+# Every event after the checkpoint is scanned, whatever its type, so the
+# checkpoint moves past events a projection ignores; only matching rows
+# carry their (possibly TOASTed) payload.
+EVENT_COLUMNS = """id, aggregate_id, event_type, timestamp, version,
+    event_type IN :event_types AS matches,
+    CASE WHEN event_type IN :event_types THEN event_data END AS event_data,
+    CASE WHEN event_type IN :event_types THEN metadata END AS metadata"""
+
+# Only events from transactions older than every in-flight one are read, so a
+# slow writer committing a lower position later can never be skipped. There is
+# no timestamp bound: commit order says nothing about event timestamps (a bulk
+# import commits events from any month), so every partition's
+# (transaction_id, position) index is probed.
+POSTGRES_EVENTS_AFTER = text(f"""
+    SELECT {EVENT_COLUMNS}, transaction_id::text AS transaction_id, position
+    FROM {SCHEMA}.events
+    WHERE (transaction_id, position) > (CAST(:transaction_id AS xid8), :position)
+      AND transaction_id < pg_snapshot_xmin(pg_current_snapshot())
+    ORDER BY transaction_id, position
+    LIMIT :limit
+""")
+
+# SQLite stand-in (tests): a single writer, and rowid follows insert order
+SQLITE_EVENTS_AFTER = text(f"""
+    SELECT {EVENT_COLUMNS}, '0' AS transaction_id, rowid AS position
+    FROM {SCHEMA}.events
+    WHERE rowid > :position
+    ORDER BY rowid
+    LIMIT :limit
+""")
+
+
+# ==========================================
+# Projections
+# ==========================================
+class Projection(ABC):
+    """A read model table folded from a subset of event types
+
+    ``fold`` receives the current row (None for a new aggregate) and one
+    event, and returns the updated row.
+    """
+
+    name: str = ""
+    event_types: Tuple[str, ...] = ()
+    table: Table = None
+
+    @property
+    def key(self) -> Column:
+        return self.table.primary_key.columns[0]
+
+    @abstractmethod
+    def fold(self, row: Optional[Dict[str, Any]], event: EventRecord) -> Dict[str, Any]:
+        """Row after applying ``event``"""
+
+
+class CertificateStatusProjection(Projection):
+    name = "certificate_status"
+    event_types = ("CertificateIssued", "CertificateExpired", "CertificateRevoked", "CertificateSuspended")
+    table = certificate_status_table
+
+    def fold(self, row, event):
+        row = dict(row) if row else {
+            "certificate_id": event.aggregate_id, "certificate_number": None, "company_name": None,
+            "issue_date": None, "expiry_date": None, "revoked": False, "suspended": False,
+        }
+        data = event.event_data or {}
+        row["certificate_number"] = data.get("certificateNumber", row["certificate_number"])
+        row["company_name"] = data.get("companyName", row["company_name"])
+        if event.event_type == "CertificateIssued":
+            row["issue_date"] = event.timestamp
+        elif event.event_type == "CertificateExpired":
+            row["expiry_date"] = event.timestamp
+        elif event.event_type == "CertificateRevoked":
+            row["revoked"] = True
+        elif event.event_type == "CertificateSuspended":
+            row["suspended"] = True
+        row["current_version"] = event.version
+        return row
+
+
+class ApplicationStatusProjection(Projection):
+    name = "application_status"
+    event_types = ("ApplicationSubmitted", "ApplicationApproved", "ApplicationRejected")
+    table = application_status_table
+    default_status = {
+        "ApplicationSubmitted": "submitted",
+        "ApplicationApproved": "approved",
+        "ApplicationRejected": "rejected",
+    }
+
+    def fold(self, row, event):
+        row = dict(row) if row else {
+            "application_id": event.aggregate_id, "company_name": None, "status": None,
+            "submission_date": None, "approval_date": None,
+        }
+        data = event.event_data or {}
+        row["company_name"] = data.get("companyName", row["company_name"])
+        row["status"] = data.get("status", self.default_status[event.event_type])
+        if event.event_type == "ApplicationSubmitted":
+            row["submission_date"] = event.timestamp
+        elif event.event_type == "ApplicationApproved":
+            row["approval_date"] = event.timestamp
+        row["current_version"] = event.version
+        return row
+
+
+PROJECTIONS: List[Projection] = [CertificateStatusProjection(), ApplicationStatusProjection()]
+
+
+# ==========================================
+# Runner
+# ==========================================
+class ProjectionRunner:
+    """Apply new events to projections batch by batch
+
+    The checkpoint row is locked for the duration of each batch, so a
+    follower and a rebuild (or two followers) never apply the same event
+    twice; whichever holds the lock advances the checkpoint for both.
+    """
+
+    def __init__(self,
+                 projections: Sequence[Projection] = PROJECTIONS,
+                 engine: Optional[Engine] = None,
+                 batch_size: int = PROJECTION_BATCH_SIZE):
+        if engine is None:
+            from db_init import engine
+        self.engine = engine
+        self.projections = {p.name: p for p in projections}
+        self.batch_size = batch_size
+        self.is_postgres = engine.dialect.name == "postgresql"
+        self._insert = postgresql.insert if self.is_postgres else sqlite.insert
+        events_after = POSTGRES_EVENTS_AFTER if self.is_postgres else SQLITE_EVENTS_AFTER
+        self._events_after = events_after.bindparams(
+            bindparam("event_types", expanding=True),
+        ).columns(
+            event_data=JsonColumn, metadata=JsonColumn, timestamp=DateTime(timezone=True)
+        )
+
+    def _lock_checkpoint(self, conn, projection: Projection) -> Tuple[str, int]:
+        conn.execute(
+            self._insert(checkpoints_table)
+            .values(projection_name=projection.name)
+            .on_conflict_do_nothing(index_elements=["projection_name"])
+        )
+        row = conn.execute(
+            select(checkpoints_table.c.transaction_id, checkpoints_table.c.position)
+            .where(checkpoints_table.c.projection_name == projection.name)
+            .with_for_update()
+        ).one()
+        return row.transaction_id, row.position
+
+    def run_once(self, projection: Projection) -> int:
+        """Apply one batch of new events; returns how many were applied"""
+        return self._run_batch(projection)[0]
+
+    def _run_batch(self, projection: Projection) -> Tuple[int, int]:
+        with self.engine.begin() as conn:
+            return self._apply_batch(conn, projection)
+
+    def _apply_batch(self, conn, projection: Projection) -> Tuple[int, int]:
+        """Scan up to batch_size new events and apply the matching ones
+
+        Returns (applied, scanned). The checkpoint moves to the last event
+        scanned, so events of other types are read past once, not on
+        every poll until the projection's next matching event.
+        """
+        transaction_id, position = self._lock_checkpoint(conn, projection)
+        scanned = conn.execute(self._events_after, {
+            "transaction_id": transaction_id,
+            "position": position,
+            "event_types": list(projection.event_types),
+            "limit": self.batch_size,
+        }).all()
+        if not scanned:
+            return 0, 0
+        rows = [row for row in scanned if row.matches]
+        if rows:
+            self._fold_rows(conn, projection, rows)
+        conn.execute(
+            update(checkpoints_table)
+            .where(checkpoints_table.c.projection_name == projection.name)
+            .values(transaction_id=scanned[-1].transaction_id, position=scanned[-1].position,
+                    event_timestamp=scanned[-1].timestamp, updated_at=func.current_timestamp())
+        )
+        return len(rows), len(scanned)
+
+    def _fold_rows(self, conn, projection: Projection, rows):
+        aggregate_ids = {row.aggregate_id for row in rows}
+        current = {
+            row._mapping[projection.key.name]: dict(row._mapping)
+            for row in conn.execute(select(projection.table).where(projection.key.in_(aggregate_ids)))
+        }
+        for row in rows:
+            event = EventRecord(
+                row.id, row.aggregate_id, row.event_type, row.event_data, row.timestamp, row.version,
+                row.metadata,
+            )
+            current[event.aggregate_id] = projection.fold(current.get(event.aggregate_id), event)
+
+        changed = [current[aggregate_id] for aggregate_id in aggregate_ids]
+        upsert = self._insert(projection.table)
+        conn.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[projection.key.name],
+                set_={c.name: upsert.excluded[c.name] for c in projection.table.columns if not c.primary_key},
+            ),
+            changed,
+        )
+
+    def catch_up(self, names: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """Apply batches until each projection has no new events"""
+        applied = {}
+        for name in names or self.projections:
+            projection = self.projections[name]
+            total = 0
+            while True:
+                applied_count, scanned = self._run_batch(projection)
+                total += applied_count
+                if scanned < self.batch_size:
+                    break
+            applied[name] = total
+        return applied
+
+    def rebuild(self, name: str) -> int:
+        """Empty a projection and replay every event into it
+
+        The reset and the whole replay share one transaction, so readers
+        keep seeing the previous contents until the rebuilt table commits
+        and never an empty or half-replayed one. Followers of this
+        projection wait on the checkpoint lock meanwhile.
+        """
+        projection = self.projections[name]
+        logger.info(f"Rebuilding projection {name}")
+        with self.engine.begin() as conn:
+            self._lock_checkpoint(conn, projection)
+            conn.execute(delete(projection.table))
+            conn.execute(
+                update(checkpoints_table)
+                .where(checkpoints_table.c.projection_name == name)
+                .values(transaction_id="0", position=0, event_timestamp=None, updated_at=func.current_timestamp())
+            )
+            total = 0
+            while True:
+                applied_count, scanned = self._apply_batch(conn, projection)
+                total += applied_count
+                if scanned < self.batch_size:
+                    return total
+
+    def run_forever(self, names: Optional[Sequence[str]] = None,
+                    poll_interval: float = PROJECTION_POLL_INTERVAL):
+        while True:
+            applied = self.catch_up(names)
+            if any(applied.values()):
+                logger.info(f"Projected events: {applied}")
+            else:
+                time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run or rebuild GACP event projections")
+    parser.add_argument("command", choices=["run", "rebuild"])
+    parser.add_argument("projections", nargs="*", help="Projection names (default: all)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    runner = ProjectionRunner()
+    if args.command == "rebuild":
+        for name in args.projections or list(runner.projections):
+            print(f"{name}: {runner.rebuild(name)} events")
+    else:
+        runner.run_forever(args.projections)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import aggregates  # noqa: E402,F401  registers the snapshots table
+import audit_log  # noqa: E402,F401  registers the audit_log table
+import projections  # noqa: E402,F401  registers the projection tables
+from event_store import EventStore, event_metadata  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    # SQLite stand-in for Postgres: the gacp_events schema is an attached in-memory database.
+    # The PostgreSQL-only paths are covered by test_postgres.py when TEST_DATABASE_URL is set.
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def attach_schema(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS gacp_events")
+
+    event_metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def store(engine):
+    return EventStore(engine)
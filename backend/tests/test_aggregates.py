@@ -0,0 +1,63 @@
+from sqlalchemy import select
+
+from aggregates import AggregateLoader, CertificateAggregate, SnapshotPolicy, snapshots_table
+from event_store import NewEvent
+
+
+def snapshot_version(engine, aggregate_id):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(snapshots_table.c.last_event_version).where(snapshots_table.c.aggregate_id == aggregate_id)
+        ).scalar()
+
+
+def issue_and_renew(store, aggregate_id, renewals):
+    events = [NewEvent("CertificateIssued", {"certificateNumber": "GACP-1", "companyName": "A"})]
+    events += [NewEvent("CertificateRenewed", {"expiryDate": f"2030-01-{i % 28 + 1:02d}"}) for i in range(renewals)]
+    store.append(aggregate_id, events)
+
+
+def test_cold_load_resumes_from_snapshot(engine, store):
+    issue_and_renew(store, "cert-1", 9)
+    writer = AggregateLoader(store, CertificateAggregate(), SnapshotPolicy(every=5, max_replay_bytes=0))
+    assert writer.load("cert-1").replayed == 10
+    assert snapshot_version(engine, "cert-1") == 10
+
+    store.append("cert-1", [NewEvent("CertificateSuspended", {})])
+    cold = AggregateLoader(store, CertificateAggregate(), SnapshotPolicy(every=5, max_replay_bytes=0))
+    loaded = cold.load("cert-1")
+
+    assert loaded.replayed == 1
+    assert loaded.version == 11
+    assert loaded.state["status"] == "suspended"
+    assert loaded.state["renewals"] == 9
+    assert loaded.state["certificateNumber"] == "GACP-1"
+
+
+def test_size_threshold_and_no_snapshot_below_policy(engine, store):
+    issue_and_renew(store, "cert-small", 2)
+    issue_and_renew(store, "cert-large", 2)
+    store.append("cert-large", [NewEvent("InspectionRecorded", {"notes": "x" * 2000})])
+
+    loader = AggregateLoader(store, CertificateAggregate(), SnapshotPolicy(every=100, max_replay_bytes=1000))
+    loader.load("cert-small")
+    loader.load("cert-large")
+
+    assert snapshot_version(engine, "cert-small") is None
+    assert snapshot_version(engine, "cert-large") == 4
+
+
+def test_lru_hits_still_see_new_events_and_evict_oldest(store):
+    issue_and_renew(store, "cert-1", 1)
+    issue_and_renew(store, "cert-2", 1)
+    loader = AggregateLoader(store, CertificateAggregate(), SnapshotPolicy(every=0, max_replay_bytes=0), cache_size=1)
+
+    loader.load("cert-1")
+    store.append("cert-1", [NewEvent("CertificateRevoked", {})])
+    hit = loader.load("cert-1")
+    assert (hit.replayed, hit.version, hit.state["status"]) == (1, 3, "revoked")
+
+    loader.load("cert-2")
+    assert loader.load("cert-1").replayed == 3
+    assert loader.stats()["cache_hits"] == 1
+    assert loader.stats()["cached"] == 1
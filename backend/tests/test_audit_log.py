@@ -0,0 +1,109 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from audit_log import AuditFilter, InvalidCursor, audit_log_table, fetch_page, iter_ndjson
+from event_store import NewEvent
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def audit_entries(engine, store):
+    event_id = store.append("app-1", [NewEvent("ApplicationSubmitted", {})])[0].id
+    rows = [
+        {
+            "id": uuid.UUID(int=i),
+            "event_id": event_id,
+            "user_id": f"user-{i % 3}",
+            "action_type": "review",
+            "target_entity": f"application:{i % 2}",
+            "details": {"i": i},
+            # Pairs share a timestamp so the id tie-breaker matters
+            "recorded_at": START + timedelta(minutes=i // 2),
+        }
+        for i in range(25)
+    ]
+    with engine.begin() as conn:
+        conn.execute(audit_log_table.insert(), rows)
+    return rows
+
+
+def all_pages(engine, audit_filter, limit):
+    cursor, seen = None, []
+    while True:
+        entries, cursor = fetch_page(engine, audit_filter, cursor, limit)
+        seen.extend(entry["details"]["i"] for entry in entries)
+        if cursor is None:
+            return seen
+
+
+def test_pages_cover_every_entry_once_in_order(engine, audit_entries):
+    assert all_pages(engine, AuditFilter(), limit=4) == list(range(24, -1, -1))
+    assert all_pages(engine, AuditFilter(descending=False), limit=5) == list(range(25))
+
+
+def test_filters_combine_with_cursor(engine, audit_entries):
+    audit_filter = AuditFilter(user_id="user-1", since=START + timedelta(minutes=2),
+                               until=START + timedelta(minutes=10))
+
+    assert all_pages(engine, audit_filter, limit=2) == [19, 16, 13, 10, 7, 4]
+    with pytest.raises(InvalidCursor):
+        fetch_page(engine, audit_filter, cursor="not-a-cursor")
+
+
+def test_ndjson_export_streams_in_batches(engine, audit_entries):
+    lines = list(iter_ndjson(engine, AuditFilter(target_entity="application:0", descending=False), batch_size=3))
+
+    entries = [json.loads(line) for line in lines]
+    assert [e["details"]["i"] for e in entries] == list(range(0, 25, 2))
+    assert entries[0]["recorded_at"].startswith("2026-01-01T00:00:00")
+
+
+def test_routes_page_and_export(engine, audit_entries):
+    pytest.importorskip("jose")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from fastapi_app.auth import get_token_claims
+    from fastapi_app.routes import audit
+
+    app = FastAPI()
+    app.include_router(audit.router)
+    app.dependency_overrides[audit.get_engine] = lambda: engine
+    app.dependency_overrides[get_token_claims] = lambda: {"sub": "alice", "roles": ["auditor"]}
+    client = TestClient(app)
+
+    page = client.get("/audit", params={"user_id": "user-0", "limit": 3}).json()
+    assert [e["details"]["i"] for e in page["entries"]] == [24, 21, 18]
+    second = client.get("/audit", params={"user_id": "user-0", "limit": 3, "cursor": page["next_cursor"]}).json()
+    assert [e["details"]["i"] for e in second["entries"]] == [15, 12, 9]
+    assert client.get("/audit", params={"cursor": "bogus"}).status_code == 400
+
+    export = client.get("/audit/export", params={"order": "asc"})
+    assert export.headers["content-type"] == "application/x-ndjson"
+    assert len(export.text.splitlines()) == 25
+
+
+def test_routes_limit_other_users_to_their_own_entries(engine, audit_entries):
+    pytest.importorskip("jose")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from fastapi_app.auth import get_token_claims
+    from fastapi_app.routes import audit
+
+    app = FastAPI()
+    app.include_router(audit.router)
+    app.dependency_overrides[audit.get_engine] = lambda: engine
+    app.dependency_overrides[get_token_claims] = lambda: {"sub": "user-1", "role": "inspector"}
+    client = TestClient(app)
+
+    page = client.get("/audit", params={"limit": 100}).json()
+    assert {e["user_id"] for e in page["entries"]} == {"user-1"}
+    assert len(page["entries"]) == 8
+    assert client.get("/audit", params={"user_id": "user-0"}).status_code == 403
+    assert client.get("/audit/export", params={"user_id": "user-0"}).status_code == 403
+    assert len(client.get("/audit/export").text.splitlines()) == 8
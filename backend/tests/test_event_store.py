@@ -0,0 +1,106 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from event_store import ConcurrencyException, EventRecord, NewEvent, stream_heads_table
+
+
+def test_multi_row_append_assigns_consecutive_versions(store):
+    store.append("farm-1", [NewEvent("FarmRegistered", {"name": "a"})], expected_version=0)
+
+    records = store.append("farm-1", [
+        NewEvent("PlotAdded", {"plot": 1}),
+        NewEvent("PlotAdded", {"plot": 2}, metadata={"user_id": "u1"}),
+    ], expected_version=1)
+
+    assert [r.version for r in records] == [2, 3]
+    stream = list(store.read_stream("farm-1"))
+    assert [(r.event_type, r.version) for r in stream] == [
+        ("FarmRegistered", 1), ("PlotAdded", 2), ("PlotAdded", 3)
+    ]
+    assert stream[2].event_data == {"plot": 2}
+    assert stream[2].metadata == {"user_id": "u1"}
+
+
+def test_stale_expected_version_is_rejected_without_writing(store):
+    store.append("farm-1", [NewEvent("FarmRegistered", {})])
+
+    with pytest.raises(ConcurrencyException):
+        store.append("farm-1", [NewEvent("FarmRenamed", {}), NewEvent("FarmRenamed", {})], expected_version=0)
+
+    assert store.current_version("farm-1") == 1
+    assert store.current_version("farm-2") == 0
+
+
+def test_bulk_import_in_chunks_and_stream_ranges(store):
+    now = datetime.now(timezone.utc)
+    records = (
+        EventRecord(uuid.uuid4(), f"farm-{i % 3}", "Observed", {"i": i}, now, i // 3 + 1)
+        for i in range(30)
+    )
+
+    assert store.bulk_import(records, chunk_size=7) == 30
+
+    assert store.current_version("farm-2") == 10
+    ranged = list(store.read_stream("farm-2", from_version=4, to_version=6, batch_size=2))
+    assert [r.version for r in ranged] == [4, 5, 6]
+    assert [r.event_data["i"] for r in ranged] == [11, 14, 17]
+
+
+def test_stream_heads_track_version_and_last_timestamp(store):
+    records = store.append("farm-1", [NewEvent("FarmRegistered", {}), NewEvent("PlotAdded", {})])
+
+    with store.engine.connect() as conn:
+        head = conn.execute(select(stream_heads_table)).one()
+    assert (head.aggregate_id, head.version) == ("farm-1", 2)
+    assert head.last_timestamp.replace(tzinfo=timezone.utc) == records[-1].timestamp
+
+
+def test_bulk_import_continues_from_the_stream_head(store):
+    now = datetime.now(timezone.utc)
+    store.append("farm-1", [NewEvent("FarmRegistered", {})])
+
+    with pytest.raises(ConcurrencyException):
+        store.bulk_import([EventRecord(uuid.uuid4(), "farm-1", "PlotAdded", {}, now + timedelta(seconds=1), 3)])
+    with pytest.raises(ValueError):
+        store.bulk_import([EventRecord(uuid.uuid4(), "farm-1", "PlotAdded", {}, now - timedelta(days=1), 2)])
+    assert store.current_version("farm-1") == 1
+
+    store.bulk_import([EventRecord(uuid.uuid4(), "farm-1", "PlotAdded", {}, now + timedelta(days=1), 2)])
+    assert store.current_version("farm-1") == 2
+
+
+def test_bulk_import_creates_its_partitions_before_importing(store):
+    class RecordingPartitions:
+        def __init__(self):
+            self.calls = []
+
+        def ensure_months(self, months):
+            # Nothing imported yet: the partitions exist before the import transaction
+            self.calls.append((sorted(months), store.current_version("legacy")))
+
+    store.partitions = RecordingPartitions()
+    records = [
+        EventRecord(uuid.uuid4(), "legacy", "Observed", {}, datetime(2019, month, 15, tzinfo=timezone.utc), month)
+        for month in (1, 2, 3)
+    ]
+
+    assert store.bulk_import(iter(records)) == 3
+    assert store.partitions.calls == [([date(2019, 1, 1), date(2019, 2, 1), date(2019, 3, 1)], 0)]
+
+    late = EventRecord(uuid.uuid4(), "legacy", "Observed", {}, datetime(2019, 6, 1, tzinfo=timezone.utc), 4)
+    with pytest.raises(ValueError):
+        store.bulk_import(iter([late]), time_range=(records[0].timestamp, records[-1].timestamp))
+    assert store.current_version("legacy") == 3
+
+
+def test_append_never_goes_back_before_the_last_event(store):
+    future = datetime.now(timezone.utc) + timedelta(hours=1)
+    store.bulk_import([EventRecord(uuid.uuid4(), "farm-1", "FarmRegistered", {}, future, 1)])
+
+    record, = store.append("farm-1", [NewEvent("PlotAdded", {})], expected_version=1)
+
+    assert record.version == 2
+    assert record.timestamp == future
@@ -0,0 +1,27 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from event_store import EventRecord
+from partitions import EVENT_TIMESTAMP_SKEW, add_months, month_start, prune_bound
+
+
+def test_month_arithmetic_uses_utc_months():
+    bangkok = timezone(timedelta(hours=7))
+    assert month_start(datetime(2026, 3, 1, 3, 0, tzinfo=bangkok)) == date(2026, 2, 1)
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_stream_reads_bounded_by_timestamp(store):
+    old = datetime(2025, 1, 15, tzinfo=timezone.utc)
+    store.bulk_import([
+        EventRecord(uuid.uuid4(), "cert-1", "CertificateIssued", {}, old, 1),
+        EventRecord(uuid.uuid4(), "cert-1", "CertificateRenewed", {},
+                    old + timedelta(days=365), 2),
+    ])
+
+    assert prune_bound(None) is None
+    assert prune_bound(old) == old - EVENT_TIMESTAMP_SKEW
+    bounded = list(store.read_stream("cert-1", since=prune_bound(old + timedelta(days=30))))
+    assert [event.version for event in bounded] == [2]
+    assert [event.version for event in store.read_stream("cert-1", since=prune_bound(old))] == [1, 2]
@@ -0,0 +1,146 @@
+"""Event store, partitions and projections against a real PostgreSQL
+
+The SQLite stand-in in conftest.py cannot run COPY, partitioning, row
+locks or the xid8 snapshot bound, so these tests run the PostgreSQL paths
+against TEST_DATABASE_URL (e.g. postgresql+psycopg2://gacp@localhost/gacp_test).
+The gacp_events schema in that database is dropped and rebuilt from
+database/postgresql/migrations for every test.
+"""
+import glob
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import NullPool
+
+from event_store import ConcurrencyException, EventRecord, EventStore, NewEvent
+from partitions import PartitionManager
+from projections import ProjectionRunner, application_status_table, certificate_status_table
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "database", "postgresql", "migrations")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+def _migrate():
+    engine = create_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.autocommit = True
+        cursor = raw.driver_connection.cursor()
+        cursor.execute("DROP SCHEMA IF EXISTS gacp_events CASCADE")
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql"))):
+            with open(path, encoding="utf-8") as f:
+                sql = f.read()
+            # CREATE INDEX CONCURRENTLY cannot run inside a multi-statement query
+            statements = [s for s in sql.split(";\n") if s.strip()] if "CONCURRENTLY" in sql else [sql]
+            for statement in statements:
+                cursor.execute(statement)
+        cursor.close()
+    finally:
+        raw.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def pg_engine():
+    _migrate()
+    engine = create_engine(TEST_DATABASE_URL)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_store(pg_engine):
+    return EventStore(pg_engine)
+
+
+def partition_names(engine):
+    return {partition["name"] for partition in PartitionManager(engine).partitions()}
+
+
+def test_concurrent_appends_to_one_stream_are_serialized(pg_store):
+    pg_store.append("farm-1", [NewEvent("FarmRegistered", {})])
+    barrier = threading.Barrier(2)
+    outcomes = []
+
+    def append():
+        barrier.wait()
+        try:
+            pg_store.append("farm-1", [NewEvent("PlotAdded", {})], expected_version=1)
+            outcomes.append("appended")
+        except ConcurrencyException:
+            outcomes.append("conflict")
+
+    threads = [threading.Thread(target=append) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert sorted(outcomes) == ["appended", "conflict"]
+    assert pg_store.current_version("farm-1") == 2
+    assert [record.version for record in pg_store.read_stream("farm-1")] == [1, 2]
+
+
+def test_bulk_import_creates_historic_partitions_and_copies_events(pg_engine, pg_store):
+    start = datetime(2019, 1, 15, tzinfo=timezone.utc)
+    records = [
+        EventRecord(uuid.uuid4(), f"legacy-{i % 2}", "Observed", {"i": i}, start + timedelta(days=20 * i), i // 2 + 1,
+                    {"source": "ledger"} if i % 3 == 0 else None)
+        for i in range(6)
+    ]
+
+    assert pg_store.bulk_import(records, chunk_size=4) == 6
+
+    assert {"events_2019_01", "events_2019_02", "events_2019_03", "events_2019_04"} <= partition_names(pg_engine)
+    stream = list(pg_store.read_stream("legacy-0"))
+    assert [record.event_data["i"] for record in stream] == [0, 2, 4]
+    assert stream[0].metadata == {"source": "ledger"}
+    assert stream[1].metadata is None
+    assert pg_store.current_version("legacy-1") == 3
+
+    # Continuing a stream must follow its head
+    with pytest.raises(ConcurrencyException):
+        pg_store.bulk_import([EventRecord(uuid.uuid4(), "legacy-0", "Observed", {}, start + timedelta(days=200), 5)])
+
+
+def test_partition_manager_creates_months_ahead(pg_engine):
+    manager = PartitionManager(pg_engine, months_ahead=2)
+
+    created = manager.ensure(datetime(2031, 11, 3, tzinfo=timezone.utc))
+
+    assert created == ["events_2031_11", "events_2031_12", "events_2032_01"]
+    assert set(created) <= partition_names(pg_engine)
+    # Remembered, and idempotent in the database for another process
+    assert manager.ensure(datetime(2031, 11, 3, tzinfo=timezone.utc)) == []
+    assert PartitionManager(pg_engine).ensure_months([datetime(2031, 11, 1).date()]) == ["events_2031_11"]
+
+
+def test_projections_catch_up_in_commit_order(pg_engine, pg_store):
+    runner = ProjectionRunner(engine=pg_engine, batch_size=2)
+    pg_store.append("cert-1", [NewEvent("CertificateIssued", {"certificateNumber": "GACP-1", "companyName": "A"})])
+    pg_store.append("app-1", [NewEvent("ApplicationSubmitted", {"companyName": "A"})])
+    for i in range(5):
+        pg_store.append(f"farm-{i}", [NewEvent("FarmRegistered", {})])
+    pg_store.append("cert-1", [NewEvent("CertificateRevoked", {})])
+
+    assert runner.catch_up() == {"certificate_status": 2, "application_status": 1}
+
+    # Committed after the checkpoint, stamped years earlier
+    pg_store.bulk_import([EventRecord(uuid.uuid4(), "cert-legacy", "CertificateIssued",
+                                      {"certificateNumber": "GACP-0"}, datetime(2019, 5, 1, tzinfo=timezone.utc), 1)])
+    assert runner.catch_up() == {"certificate_status": 1, "application_status": 0}
+    assert runner.catch_up() == {"certificate_status": 0, "application_status": 0}
+
+    with pg_engine.connect() as conn:
+        certificates = {row.certificate_id: row for row in conn.execute(select(certificate_status_table))}
+        application = conn.execute(select(application_status_table)).one()
+    assert certificates["cert-1"].revoked is True
+    assert certificates["cert-1"].current_version == 2
+    assert certificates["cert-legacy"].certificate_number == "GACP-0"
+    assert application.status == "submitted"
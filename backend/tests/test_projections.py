@@ -0,0 +1,118 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from event_store import EventRecord, NewEvent
+from projections import (
+    ApplicationStatusProjection,
+    CertificateStatusProjection,
+    ProjectionRunner,
+    application_status_table,
+    certificate_status_table,
+    checkpoints_table,
+)
+
+
+def rows(engine, table):
+    with engine.connect() as conn:
+        return {row[0]: dict(row._mapping) for row in conn.execute(select(table))}
+
+
+def test_only_new_events_are_applied_in_batches(engine, store):
+    runner = ProjectionRunner(engine=engine, batch_size=2)
+    store.append("cert-1", [NewEvent("CertificateIssued", {"certificateNumber": "GACP-1", "companyName": "A"})])
+    store.append("app-1", [NewEvent("ApplicationSubmitted", {"companyName": "A"})])
+    store.append("cert-2", [NewEvent("CertificateIssued", {"certificateNumber": "GACP-2"})])
+    store.append("cert-1", [NewEvent("CertificateSuspended", {})])
+    store.append("cert-3", [NewEvent("CertificateIssued", {"certificateNumber": "GACP-3"})])
+
+    assert runner.catch_up() == {"certificate_status": 4, "application_status": 1}
+    assert runner.catch_up() == {"certificate_status": 0, "application_status": 0}
+
+    store.append("app-1", [NewEvent("ApplicationApproved", {"status": "approved_with_conditions"})])
+    assert runner.catch_up() == {"certificate_status": 0, "application_status": 1}
+
+    certificates = rows(engine, certificate_status_table)
+    assert certificates["cert-1"]["certificate_number"] == "GACP-1"
+    assert certificates["cert-1"]["company_name"] == "A"
+    assert certificates["cert-1"]["suspended"] is True
+    assert certificates["cert-1"]["current_version"] == 2
+    application = rows(engine, application_status_table)["app-1"]
+    assert application["status"] == "approved_with_conditions"
+    assert application["company_name"] == "A"
+    assert application["submission_date"] is not None and application["approval_date"] is not None
+
+
+def test_rebuild_replays_from_scratch(engine, store):
+    runner = ProjectionRunner(engine=engine)
+    store.append("cert-1", [NewEvent("CertificateIssued", {"certificateNumber": "GACP-1"}),
+                            NewEvent("CertificateRevoked", {})])
+    runner.catch_up()
+
+    with engine.begin() as conn:
+        conn.execute(certificate_status_table.update().values(certificate_number="tampered"))
+
+    assert runner.rebuild("certificate_status") == 2
+    certificate = rows(engine, certificate_status_table)["cert-1"]
+    assert certificate["certificate_number"] == "GACP-1"
+    assert certificate["revoked"] is True
+
+
+def test_late_events_with_old_timestamps_are_still_projected(engine, store):
+    runner = ProjectionRunner(engine=engine)
+    store.append("cert-1", [NewEvent("CertificateIssued", {"certificateNumber": "GACP-1"})])
+    assert runner.catch_up()["certificate_status"] == 1
+
+    # A ledger import committed after the checkpoint, stamped years earlier
+    store.bulk_import([EventRecord(uuid.uuid4(), "cert-legacy", "CertificateIssued",
+                                   {"certificateNumber": "GACP-0"}, datetime(2019, 5, 1, tzinfo=timezone.utc), 1)])
+
+    assert runner.catch_up()["certificate_status"] == 1
+    assert rows(engine, certificate_status_table)["cert-legacy"]["certificate_number"] == "GACP-0"
+
+
+def test_failed_rebuild_keeps_the_previous_read_model(engine, store):
+    class FailingCertificateStatus(CertificateStatusProjection):
+        def fold(self, row, event):
+            if self.failing and event.event_type == "CertificateRevoked":
+                raise RuntimeError("fold failed")
+            return super().fold(row, event)
+
+    projection = FailingCertificateStatus()
+    projection.failing = False
+    runner = ProjectionRunner([projection], engine=engine, batch_size=1)
+    store.append("cert-1", [NewEvent("CertificateIssued", {"certificateNumber": "GACP-1"})])
+    store.append("cert-2", [NewEvent("CertificateIssued", {"certificateNumber": "GACP-2"})])
+    store.append("cert-2", [NewEvent("CertificateRevoked", {})])
+    runner.catch_up()
+
+    projection.failing = True
+    with pytest.raises(RuntimeError):
+        runner.rebuild("certificate_status")
+
+    # The batches replayed before the failure were rolled back with the reset
+    certificates = rows(engine, certificate_status_table)
+    assert set(certificates) == {"cert-1", "cert-2"}
+    assert certificates["cert-2"]["revoked"] is True
+    assert runner.catch_up() == {"certificate_status": 0}
+
+
+def test_checkpoint_moves_past_events_of_other_types(engine, store):
+    projection = ApplicationStatusProjection()
+    runner = ProjectionRunner([projection], engine=engine, batch_size=3)
+    store.append("app-1", [NewEvent("ApplicationSubmitted", {"companyName": "A"})])
+    for i in range(10):
+        store.append(f"cert-{i}", [NewEvent("CertificateIssued", {"certificateNumber": f"GACP-{i}"})])
+
+    assert runner.catch_up() == {"application_status": 1}
+
+    # The ignored certificate events are behind the checkpoint, not rescanned on every poll
+    checkpoint = rows(engine, checkpoints_table)["application_status"]
+    assert checkpoint["position"] == 11
+    assert runner._run_batch(projection) == (0, 0)
+
+    store.append("app-1", [NewEvent("ApplicationApproved", {})])
+    assert runner.catch_up() == {"application_status": 1}
+    assert rows(engine, application_status_table)["app-1"]["status"] == "approved"
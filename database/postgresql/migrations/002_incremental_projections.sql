@@ -0,0 +1,81 @@
+-- Migration: 002_incremental_projections
+-- Created at: 2026-10-17
+--
+-- Replaces the statement-level REFRESH MATERIALIZED VIEW trigger with
+-- projection tables that backend/projections.py updates incrementally.
+-- Run `python projections.py rebuild` once after this migration to fill them.
+
+BEGIN;
+
+-- Drop full-refresh trigger and views
+DROP TRIGGER IF EXISTS refresh_views_trigger ON gacp_events.events;
+DROP FUNCTION IF EXISTS gacp_events.trigger_refresh_views();
+DROP FUNCTION IF EXISTS gacp_events.refresh_views();
+DROP MATERIALIZED VIEW IF EXISTS gacp_events.certificate_status_view;
+DROP MATERIALIZED VIEW IF EXISTS gacp_events.application_status_view;
+
+-- Global commit-ordered position for projection checkpoints
+ALTER TABLE gacp_events.events ADD COLUMN position BIGSERIAL NOT NULL;
+ALTER TABLE gacp_events.events ADD COLUMN transaction_id xid8 NOT NULL DEFAULT pg_current_xact_id();
+COMMENT ON COLUMN gacp_events.events.position IS 'Insert order across all aggregates';
+COMMENT ON COLUMN gacp_events.events.transaction_id IS 'Writing transaction, used to read only committed-in-order events';
+
+CREATE INDEX idx_events_transaction_position ON gacp_events.events (transaction_id, position);
+
+-- Create projection checkpoints table
+CREATE TABLE gacp_events.projection_checkpoints (
+    projection_name TEXT PRIMARY KEY,
+    transaction_id xid8 NOT NULL DEFAULT '0',
+    position BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+COMMENT ON TABLE gacp_events.projection_checkpoints IS 'Last event applied to each projection';
+
+-- Create projection tables
+CREATE TABLE gacp_events.certificate_status (
+    certificate_id TEXT PRIMARY KEY,
+    certificate_number TEXT,
+    company_name TEXT,
+    issue_date TIMESTAMPTZ,
+    expiry_date TIMESTAMPTZ,
+    revoked BOOLEAN NOT NULL DEFAULT FALSE,
+    suspended BOOLEAN NOT NULL DEFAULT FALSE,
+    current_version INTEGER NOT NULL
+);
+COMMENT ON TABLE gacp_events.certificate_status IS 'Certificate projection maintained by the projection runner';
+
+CREATE TABLE gacp_events.application_status (
+    application_id TEXT PRIMARY KEY,
+    company_name TEXT,
+    status TEXT,
+    submission_date TIMESTAMPTZ,
+    approval_date TIMESTAMPTZ,
+    current_version INTEGER NOT NULL
+);
+COMMENT ON TABLE gacp_events.application_status IS 'Application projection maintained by the projection runner';
+
+CREATE INDEX idx_certificate_status_number ON gacp_events.certificate_status (certificate_number);
+CREATE INDEX idx_application_status_status ON gacp_events.application_status (status);
+
+-- Keep the old view names for readers; expiry is evaluated at read time
+CREATE VIEW gacp_events.certificate_status_view AS
+SELECT
+    certificate_id,
+    certificate_number,
+    company_name,
+    issue_date,
+    expiry_date,
+    CASE
+        WHEN revoked THEN 'revoked'
+        WHEN suspended THEN 'suspended'
+        WHEN expiry_date < CURRENT_TIMESTAMP THEN 'expired'
+        ELSE 'active'
+    END AS status,
+    current_version
+FROM gacp_events.certificate_status;
+
+CREATE VIEW gacp_events.application_status_view AS
+SELECT application_id, company_name, status, submission_date, approval_date, current_version
+FROM gacp_events.application_status;
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Migration: 003_aggregate_stream_index
+-- Created at: 2026-10-17
+--
+-- Aggregate loads read "events of one aggregate after version N"
+-- (snapshot tail or cache refresh). With only idx_events_aggregate_id
+-- that visits the aggregate's whole history; this index seeks straight
+-- to the tail.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_aggregate_version
+    ON gacp_events.events (aggregate_id, version);
@@ -0,0 +1,15 @@
+-- Migration: 004_audit_log_indexes
+-- Created at: 2026-10-17
+--
+-- Composite indexes for keyset pagination over (recorded_at, id), alone
+-- and behind the user_id / target_entity equality filters used by
+-- GET /audit and GET /audit/export.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_recorded
+    ON gacp_events.audit_log (recorded_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_user_recorded
+    ON gacp_events.audit_log (user_id, recorded_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_log_target_recorded
+    ON gacp_events.audit_log (target_entity, recorded_at, id);
@@ -0,0 +1,101 @@
+-- Migration: 005_partition_events
+-- Created at: 2026-10-17
+--
+-- Moves gacp_events.events to monthly RANGE partitions on timestamp.
+-- New months are created ahead of time by backend/partitions.py (and on
+-- demand by the event store) through create_events_partition().
+--
+-- Index changes:
+--   * PRIMARY KEY (id, timestamp): a partitioned table's unique keys
+--     must include the partition key.
+--   * UNIQUE (aggregate_id, version) on every partition. PostgreSQL
+--     cannot enforce it across partitions; since 006_stream_heads the
+--     event store serializes writers to a stream on its stream_heads
+--     row, which makes versions unique across months. Replaces
+--     idx_events_aggregate_id, idx_events_version and
+--     idx_events_aggregate_version.
+--   * BRIN on timestamp instead of a btree; months are pruned anyway.
+--   * idx_events_event_type and the GIN index over all of event_data
+--     are dropped: no query uses them, and every insert paid for them.
+--
+-- audit_log.event_id loses its foreign key, which cannot reference a
+-- partitioned table by id alone.
+--
+-- The copy runs in one transaction and blocks writers; run it in a
+-- maintenance window. It fails if existing streams hold duplicate
+-- (aggregate_id, version) pairs within a month.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION gacp_events.create_events_partition(month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month_start)::date;
+    partition_name TEXT := format('events_%s', to_char(start_date, 'YYYY_MM'));
+BEGIN
+    IF to_regclass(format('gacp_events.%I', partition_name)) IS NULL THEN
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE gacp_events.%I PARTITION OF gacp_events.events FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                start_date::timestamp AT TIME ZONE 'UTC',
+                (start_date + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            EXECUTE format(
+                'CREATE UNIQUE INDEX %I ON gacp_events.%I (aggregate_id, version)',
+                partition_name || '_stream_version', partition_name
+            );
+        EXCEPTION WHEN duplicate_table THEN
+            -- Another session created it first
+            NULL;
+        END;
+    END IF;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE gacp_events.audit_log DROP CONSTRAINT IF EXISTS audit_log_event_id_fkey;
+ALTER TABLE gacp_events.events RENAME TO events_unpartitioned;
+
+CREATE TABLE gacp_events.events (
+    id UUID NOT NULL,
+    aggregate_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    event_data JSONB NOT NULL,
+    timestamp TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    version INTEGER NOT NULL,
+    metadata JSONB,
+    position BIGINT NOT NULL DEFAULT nextval('gacp_events.events_position_seq'),
+    transaction_id xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+COMMENT ON TABLE gacp_events.events IS 'Stores all domain events, partitioned by month';
+
+-- Keep the position sequence when the old table goes
+ALTER SEQUENCE gacp_events.events_position_seq OWNED BY gacp_events.events.position;
+
+SELECT gacp_events.create_events_partition(month::date)
+FROM generate_series(
+    date_trunc('month', COALESCE(
+        (SELECT MIN(timestamp) FROM gacp_events.events_unpartitioned), CURRENT_TIMESTAMP
+    ) AT TIME ZONE 'UTC'),
+    date_trunc('month', CURRENT_TIMESTAMP AT TIME ZONE 'UTC') + INTERVAL '3 months',
+    INTERVAL '1 month'
+) AS month;
+
+INSERT INTO gacp_events.events
+    (id, aggregate_id, event_type, event_data, timestamp, version, metadata, position, transaction_id)
+SELECT id, aggregate_id, event_type, event_data, timestamp, version, metadata, position, transaction_id
+FROM gacp_events.events_unpartitioned
+ORDER BY position;
+
+DROP TABLE gacp_events.events_unpartitioned;
+
+CREATE INDEX idx_events_transaction_position ON gacp_events.events (transaction_id, position);
+CREATE INDEX idx_events_timestamp ON gacp_events.events USING BRIN (timestamp);
+
+-- Last event timestamps let stream and projection reads skip old partitions
+ALTER TABLE gacp_events.snapshots ADD COLUMN last_event_timestamp TIMESTAMPTZ;
+ALTER TABLE gacp_events.projection_checkpoints ADD COLUMN event_timestamp TIMESTAMPTZ;
+
+COMMIT;
@@ -0,0 +1,54 @@
+-- Migration: 006_stream_heads
+-- Created at: 2026-10-17
+--
+-- One row per aggregate stream holding its latest version and event
+-- timestamp. backend/event_store.py locks the row for every append and
+-- bulk import and updates it in the same transaction, so:
+--   * version checks read one row instead of max(version) probed in
+--     every monthly partition;
+--   * (aggregate_id, version) is unique across partitions, not only
+--     within a month, and the advisory lock is no longer needed;
+--   * a stream's timestamps never go backwards, which makes
+--     "timestamp >= last snapshot event" a safe partition-pruning bound
+--     for stream reads.
+--
+-- The backfill holds a SHARE lock on events, blocking writers until the
+-- migration commits. It fails if an existing stream already has an
+-- event older than the version before it (e.g. from an earlier bulk
+-- import); such streams would be read wrongly with the pruning bound.
+
+BEGIN;
+
+CREATE TABLE gacp_events.stream_heads (
+    aggregate_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    last_timestamp TIMESTAMPTZ
+);
+COMMENT ON TABLE gacp_events.stream_heads IS 'Latest version and event timestamp per aggregate stream';
+
+LOCK TABLE gacp_events.events IN SHARE MODE;
+
+DO $$
+DECLARE
+    offending TEXT;
+BEGIN
+    SELECT aggregate_id INTO offending
+    FROM (
+        SELECT aggregate_id,
+               timestamp < lag(timestamp) OVER (PARTITION BY aggregate_id ORDER BY version) AS goes_back
+        FROM gacp_events.events
+    ) AS ordered
+    WHERE goes_back
+    LIMIT 1;
+    IF offending IS NOT NULL THEN
+        RAISE EXCEPTION 'Stream % has an event older than the version before it', offending;
+    END IF;
+END;
+$$;
+
+INSERT INTO gacp_events.stream_heads (aggregate_id, version, last_timestamp)
+SELECT aggregate_id, MAX(version), MAX(timestamp)
+FROM gacp_events.events
+GROUP BY aggregate_id;
+
+COMMIT;